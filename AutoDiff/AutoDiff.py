@@ -3,14 +3,22 @@ This file contains class AutoDiff and RAutoDiff.
 AutoDiff is for forward mode, and it contains two methods:
 ___call___() is for getting the value of the function.
 grad() is for getting the derivative of the variables via forward AD mode.
+RAutoDiff is for reverse mode, it has the same methods as AutoDiff,
+but grad() gets the derivative of the variables via reverse AD mode.
 """
-from .DualNumber import DualNumber
+from .DualNumber import DualNumber, _Validation, unchecked
+from .ReverseNode import ReverseNode, backward
+from .DualArray import DualArray
+from .TaylorNumber import TaylorNumber
+from .Trace import Trace
+from .Parameters import Parameters
 from .ElementFunction import *
 import numpy as np
 from inspect import signature
-from copy import deepcopy
 import types
 import warnings
+import weakref
+from collections import OrderedDict
 
 def exam_user_function(function):
     """Check if the user defined function is a valid mathematical function for AutoDiff.
@@ -56,7 +64,28 @@ def exam_user_function(function):
         raise TypeError("The input of your given function is empty")
     # generate a fake input to get the output dimension
     fake_input = (1,)*dim_x
-    output = function(*fake_input)
+    check_output(function(*fake_input))
+    return True
+
+
+def check_output(output):
+    """Check the output of a user defined function evaluated on floats, see exam_user_function().
+
+        Input Arguments:
+        =================
+        output: the output of a user defined function
+
+        Return Arguments:
+        =================
+        the output kind, "scalar", "list" or "array", raise TypeError if the output is not valid
+
+        Examples
+        =================
+        >>> check_output([1.0, 2.0])
+        'list'
+        >>> check_output(np.float64(1.0))
+        'scalar'
+        """
     if isinstance(output, (list, np.ndarray)):
         # check if it is a 0-d array
         try:
@@ -66,25 +95,240 @@ def exam_user_function(function):
         if all(isinstance(out_i, (int, float, np.number)) for out_i in output):
             if len(output) == 0:
                 raise TypeError("The output of your given function is empty")
-            return True
+            return "list" if isinstance(output, list) else "array"
         else:
             raise TypeError("The output of your given function contains non-numeric elements/we don't take multi-dimensional output")
     elif isinstance(output, (int, float, np.number)):
-        return True
+        return "scalar"
     else:
         raise TypeError("The output of your given function is NOT a valid mathematical function")
+
+
+# (dim_f, output kind) of the functions seen so far, keyed by their code object, so that a new AutoDiff
+# of the same function needs no evaluation to get them. A closure is keyed by the function object itself,
+# since the values it captures (e.g. the length of an output list) can differ between closures of one code.
+# Each entry is a dict keyed by (dim_x, vector_input): the output length of a function of *x or of a
+# vector x can depend on the number of inputs.
+_METADATA = weakref.WeakKeyDictionary()
+_OUTPUT_KINDS = ("scalar", "list", "array")
+
+
+def _metadata_key(function):
+    return function if function.__closure__ else function.__code__
+
+
+
+def output_components(output):
+    """Return the components of a function output as a list-like object.
         
+        Input Arguments:
+        =================
+        output: the output of a user defined function, a scalar or a list/np.array of scalars
+        
+        Return Arguments:
+        =================
+        output itself if it is a list/np.array, otherwise [output]
+        
+        Examples
+        =================
+        >>> output_components(1.0)
+        [1.0]
+        >>> output_components([1.0, 2.0])
+        [1.0, 2.0]
+        """
+    if isinstance(output, (list, np.ndarray)):
+        return output
+    return [output]
+
+
+def batch_components(output, N):
+    """Return the components of a function output evaluated on a batch of N points as DualArrays.
+        
+        Input Arguments:
+        =================
+        output: the output of a user defined function evaluated on DualArrays of shape (N,)
+        N: the number of input points
+        
+        Return Arguments:
+        =================
+        a list of DualArrays, constant components get no tangent directions
+        """
+    components = []
+    for f_j in output_components(output):
+        if isinstance(f_j, np.ndarray) and f_j.dtype == object:
+            # np.array([...]) splits DualArrays into 0-d DualArrays, put them back together
+            f_j = np.stack(list(f_j))
+        if not isinstance(f_j, DualArray):
+            f_j = DualArray._new(np.broadcast_to(np.asarray(f_j, dtype=np.float64), (N,)), np.zeros((N, 0)), True)
+        components.append(f_j)
+    return components
+
+
+def real_output(output):
+    """Return the function output evaluated on DualNumbers or ReverseNodes with its real parts only.
+
+    Input Arguments:
+    =================
+    output: the output of a user defined function, a scalar or a list/np.array of scalars
+
+    Return Arguments:
+    =================
+    the output in the same format with every DualNumber/ReverseNode/DualArray replaced by its real part
+
+    Examples
+    =================
+    >>> real_output([DualNumber(1.0, 2.0), 3.0])
+    [1.0, 3.0]
+    """
+    if isinstance(output, (DualNumber, ReverseNode)):
+        return output.real
+    if isinstance(output, DualArray):
+        # the output of a vector_input function evaluated on a DualArray
+        return output._real.item() if output.ndim == 0 else output._real.copy()
+    if isinstance(output, list):
+        return [real_output(f_j) for f_j in output]
+    if isinstance(output, np.ndarray) and output.dtype == object:
+        return np.array([real_output(f_j) for f_j in output])
+    return output
+
+
+def vector_components(output):
+    """Return the tangents of the output components of a vector_input function evaluated on a DualArray.
+
+    Input Arguments:
+    =================
+    output: the output of the function, a 0-d or 1D DualArray, or a list/np.array of 0-d DualArrays and scalars
+
+    Return Arguments:
+    =================
+    a list with the tangent np.array of shape (k,) of each output component, None for constant components
+    """
+    if isinstance(output, DualArray):
+        return [output._dual] if output.ndim == 0 else list(output._dual)
+    return [f_j._dual.reshape(-1) if isinstance(f_j, DualArray) else None for f_j in output_components(output)]
+
+
+def fill_value(output, value_out):
+    """Write the real parts of the output components of a function into value_out.
+
+    Input Arguments:
+    =================
+    output: the output of a user defined function evaluated on floats, DualNumbers, ReverseNodes or a DualArray
+    value_out: np.array of shape (dim_f,)
+
+    Examples
+    =================
+    >>> value_out = np.empty(2)
+    >>> fill_value([DualNumber(1.0, 2.0), 3.0], value_out)
+    >>> value_out
+    array([1., 3.])
+    """
+    if isinstance(output, DualArray):
+        value_out[:] = output._real.reshape(-1)
+        return
+    for j, f_j in enumerate(output_components(output)):
+        value_out[j] = real_output(f_j)
+
+
+# in vector_input mode without a chunk_size, grad() seeds at most this many tangent entries per pass,
+# i.e. dim_x * chunk <= _VECTOR_TANGENTS (32 MB of float64 per DualArray)
+_VECTOR_TANGENTS = 2**22
+
+
+def color_columns(rows, cols, dim_x):
+    """Greedy column coloring of a sparse Jacobian (Curtis, Powell and Reid).
+    Two columns get the same color only if no row has a nonzero entry in both of them,
+    so the columns of one color can share a seed direction and be recovered from J S.
+
+    Input Arguments:
+    =================
+    rows, cols: int np.arrays, the sparsity pattern, entry (rows[k], cols[k]) may be nonzero
+    dim_x: number of columns
+
+    Return Arguments:
+    =================
+    colors: int np.array of length dim_x with the color 0, 1, ... of each column
+
+    Examples
+    =================
+    >>> # tridiagonal pattern of 5 columns
+    >>> rows = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4])
+    >>> cols = np.array([0, 1, 0, 1, 2, 1, 2, 3, 2, 3, 4, 3, 4])
+    >>> color_columns(rows, cols, 5)
+    array([0, 1, 2, 0, 1])
+    """
+    rows_of_col = [[] for _ in range(dim_x)]
+    cols_of_row = {}
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        rows_of_col[c].append(r)
+        cols_of_row.setdefault(r, []).append(c)
+    colors = np.full(dim_x, -1, dtype=int)
+    for c in range(dim_x):
+        # colors of the columns that share a row with column c
+        taken = {colors[other] for r in rows_of_col[c] for other in cols_of_row[r]}
+        color = 0
+        while color in taken:
+            color += 1
+        colors[c] = color
+    return colors
 
 
 class AutoDiff():
 
-    def __init__(self, function):
+    def __init__(self, function, chunk_size=None, trace=False, sparse=False, cache_size=0,
+                 dim_x=None, dim_f=None, output_kind=None, vector_input=False, parameters=None):
         """Constructor for the AutoDiff class.
         
         Input Arguments:
         =================
         function: a mathematical function
         *** see exam_user_function() for the requirements of the function
+        chunk_size: number of seed directions propagated together in one function evaluation of grad(),
+        None (default) seeds all dim_x directions at once, i.e. the whole Jacobian in a single pass;
+        a smaller chunk_size uses less memory per DualNumber but needs ceil(dim_x/chunk_size) passes
+        trace: if True, the first call of grad() records the function as a flat list of operations
+        (see Trace.py), and later calls replay that list instead of running the function on DualNumbers.
+        __call__() keeps running the function on floats, which is already cheaper than a replay.
+        trace="compile" generates straight-line Python source for the value and the Jacobian from the
+        recorded trace and compiles it once (see Trace.compile()); __call__() and grad() then are a
+        single call of the generated code, which can be read from the source attribute.
+        A recorded trace is simplified by constant folding, common subexpression elimination and
+        dead operation removal, see the trace_stats attribute for the savings.
+        sparse: if True, grad() detects the sparsity pattern of the Jacobian by tracing the function
+        (see sparsity()), colors the columns so that columns without a common nonzero row share one seed
+        direction (see color_columns()), and propagates one tangent entry per color instead of per variable,
+        e.g. 3 instead of dim_x for a tridiagonal Jacobian. The pattern is detected again at a point
+        where the function takes another branch of an if.
+        cache_size: number of input points whose function value and gradient are kept (0, the default,
+        turns the cache off). __call__() and grad() at a point that is in the cache return the stored
+        result instead of evaluating the function again, and grad() also stores the function value it
+        computes on the way, so f(x) after f.grad(x) is a hit. Points are compared by the bytes of their
+        float64 values, so 0.0 and -0.0 are two points. The least recently used point is evicted when
+        the cache is full, see cache_stats and cache_clear().
+        dim_x: number of input variables, by default the number of arguments of function,
+        needed for a function with *args
+        dim_f: number of output components; output_kind: "scalar", "list" or "array", the type of the output.
+        Declared values are trusted, and the function is not evaluated by the constructor. Without dim_f, the output dimension and kind are
+        taken from the first evaluation at a real input point (the first __call__(), grad(), ...) and cached
+        for the code object of function, so another AutoDiff of the same function knows them right away.
+        Reading dim_f or output_kind before anything was evaluated runs the function at (1, ..., 1).
+        vector_input: if True, function takes a single np.array x of length dim_x (dim_x must be given)
+        instead of dim_x scalar arguments. grad() then calls it with one DualArray holding x and a block of
+        seed directions, so the whole evaluation runs on arrays. Without a chunk_size the block is limited to
+        2**22 tangent entries, e.g. 419 directions per pass for dim_x = 10000. The other derivative methods
+        pass an object np.array of their variables. trace, sparse and the batch methods are not supported.
+        parameters: a Parameters object (see Parameters.py), function then takes a single argument with its
+        nested structure (e.g. a dict of weight matrices) instead of the flat array of vector_input, which
+        is implied, dim_x being the number of parameters. grad() and value_and_grad() accept a Parameters
+        object of the same layout or its flat array, seed the flat buffer, and return the gradient as
+        Parameters whose leaves are views into the rows of the Jacobian (a list of them if dim_f > 1).
+        A call where the trace is not valid (the function takes another branch of an if, or is out of
+        the domain of an elementary function) and a function that can not be traced run the normal way.
+        grad() keeps its seed DualNumbers (DualArray buffers in vector_input mode) in a workspace that is
+        reused by the next call, so the function must not keep or modify its inputs, and an AutoDiff object
+        must not run grad() from two threads at once. With out= and value_out= (see grad()) a forward
+        mode grad() without cache and trace then allocates nothing besides what the function allocates.
+        The function must not have side effects, since everything except its inputs is frozen into the trace.
         
         Return Arguments:
         =================
@@ -96,18 +340,145 @@ class AutoDiff():
         ad1 = AutoDiff(f1)
         f2 = lambda x, y: [sin(x*y),x+y,x] # 2 to 2 mapping
         ad2 = AutoDiff(f2)
+        ad3 = AutoDiff(f2, chunk_size=1)   # one pass per input variable
+        ad4 = AutoDiff(f2, trace=True)     # replay a recorded trace from the second call on
+        ad5 = AutoDiff(f2, trace="compile")
+        ad5.grad([1, 2]); print(ad5.source) # the generated code
+        ad6 = AutoDiff(f2, sparse=True)    # compressed evaluation of a sparse Jacobian
+        ad7 = AutoDiff(f2, cache_size=16)  # remember the last 16 points
+        ad8 = AutoDiff(lambda *x: sum(x), dim_x=3, dim_f=1, output_kind="scalar")
+        ad9 = AutoDiff(lambda x: np.sum(x**2), dim_x=10000, vector_input=True)
+        p = Parameters({"W": np.ones((2, 3)), "b": np.zeros(2)})
+        ad10 = AutoDiff(lambda p: np.sum(tanh(p["W"] @ np.ones(3) + p["b"])), parameters=p)
+        ad10.grad(p)["W"]                  # the gradient with respect to W, of shape (2, 3)
         """
-        ## check if the user defined function is a valid mathematical function
-        if exam_user_function(function):
-            self.function = function
-            self.dim_x = len(signature(function).parameters)
-            ## get the output dimension
-            fake_input = (1,)*self.dim_x
-            output = function(*fake_input)
-            if isinstance(output, (list, np.ndarray)):
-                self.dim_f = len(output)
-            else:
-                self.dim_f = 1
+        if chunk_size is not None:
+            if not isinstance(chunk_size, (int, np.integer)) or isinstance(chunk_size, bool):
+                raise TypeError("chunk_size should be a positive int or None")
+            if chunk_size < 1:
+                raise ValueError("chunk_size should be a positive int or None")
+        self.chunk_size = chunk_size
+        if not (isinstance(trace, bool) or trace == "compile"):
+            raise TypeError("trace should be True, False or 'compile'")
+        self.trace = trace
+        # None: not traced yet, False: the function can not be traced, otherwise a Trace
+        self._plan = None
+        if not isinstance(sparse, bool):
+            raise TypeError("sparse should be True or False")
+        self.sparse = sparse
+        # (Trace or None, rows, cols, colors) of the last detected sparsity pattern
+        self._sparsity = None
+        # (rows, cols, colors) the trace was seeded with, kept apart from _sparsity, which is
+        # detected again when the function takes another branch
+        self._plan_pattern = None
+        if not isinstance(cache_size, (int, np.integer)) or isinstance(cache_size, bool):
+            raise TypeError("cache_size should be a non-negative int")
+        if cache_size < 0:
+            raise ValueError("cache_size should be a non-negative int")
+        self.cache_size = cache_size
+        # input bytes -> {"value": ..., "grad": ...}, ordered from the least to the most recently used
+        self._cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # buffers of grad() that are reused from one call to the next, see _seeded_inputs() and _buffer()
+        self._workspace = {}
+        ## check if the user defined function is a valid mathematical function,
+        ## its output is checked on the first evaluation
+        if function.__class__ != types.FunctionType:
+            raise TypeError("The input is NOT of function type")
+        if not isinstance(vector_input, bool):
+            raise TypeError("vector_input should be True or False")
+        if parameters is not None:
+            if not isinstance(parameters, Parameters):
+                raise TypeError("parameters should be a Parameters object or None")
+            if dim_x is not None and dim_x != parameters.size:
+                raise ValueError("dim_x does not match the number of parameters")
+            dim_x = parameters.size
+            vector_input = True
+        self.parameters = parameters
+        self.vector_input = vector_input
+        arguments = signature(function).parameters.values()
+        if vector_input:
+            if dim_x is None:
+                raise ValueError("dim_x should be given for a vector_input function")
+            if len(arguments) != 1:
+                raise ValueError("A vector_input function should take a single argument")
+            if trace or sparse:
+                raise ValueError("trace and sparse are not supported for a vector_input function")
+        if dim_x is None:
+            dim_x = len(arguments)
+            if dim_x == 0:
+                raise TypeError("The input of your given function is empty")
+        else:
+            if not isinstance(dim_x, (int, np.integer)) or isinstance(dim_x, bool):
+                raise TypeError("dim_x should be a positive int or None")
+            if dim_x < 1:
+                raise ValueError("dim_x should be a positive int or None")
+            if dim_x != len(arguments) and not vector_input and not any(p.kind == p.VAR_POSITIONAL for p in arguments):
+                raise ValueError("dim_x does not match the number of arguments of your given function")
+        if dim_f is not None:
+            if not isinstance(dim_f, (int, np.integer)) or isinstance(dim_f, bool):
+                raise TypeError("dim_f should be a positive int or None")
+            if dim_f < 1:
+                raise ValueError("dim_f should be a positive int or None")
+        if output_kind is not None:
+            if output_kind not in _OUTPUT_KINDS:
+                raise ValueError("output_kind should be 'scalar', 'list', 'array' or None")
+            if output_kind == "scalar":
+                if dim_f not in (None, 1):
+                    raise ValueError("A scalar output has dim_f == 1")
+                dim_f = 1
+        self.function = function
+        self.dim_x = int(dim_x)
+        self._dim_f = None if dim_f is None else int(dim_f)
+        self._output_kind = output_kind
+        if self._dim_f is None:
+            known = _METADATA.get(_metadata_key(function), {})
+            self._dim_f, self._output_kind = known.get((self.dim_x, self.vector_input), (None, None))
+
+
+    @property
+    def dim_f(self):
+        """Number of output components of the function, see the dim_f argument of the constructor."""
+        if self._dim_f is None:
+            # nothing was evaluated yet, probe at (1, ..., 1) as exam_user_function does
+            self._learn(self._call([1.0]*self.dim_x))
+        return self._dim_f
+
+
+    @property
+    def output_kind(self):
+        """Type of the function output, "scalar", "list" or "array", see the constructor."""
+        if self._output_kind is None:
+            self._learn(self._call([1.0]*self.dim_x))
+        return self._output_kind
+
+
+    def _learn(self, output):
+        """Check the output of function evaluated on floats and keep its dimension and kind,
+        here and in the metadata cache of the function."""
+        kind = check_output(output)
+        dim_f = 1 if kind == "scalar" else len(output)
+        if self._dim_f is not None and dim_f != self._dim_f:
+            raise ValueError("The output dimension of your given function does not match dim_f")
+        self._dim_f, self._output_kind = dim_f, kind
+        known = _METADATA.setdefault(_metadata_key(self.function), {})
+        known[(self.dim_x, self.vector_input)] = (dim_f, kind)
+
+
+    def _call(self, x_vec):
+        """Evaluate function at x_vec, a sequence of dim_x floats or variables (DualNumbers, ...).
+        A vector_input function gets them as one np.array, of floats or of objects, or as the DualArray
+        x_vec, laid out in the nested structure of the parameters if there are any."""
+        if not self.vector_input:
+            return self.function(*x_vec)
+        if isinstance(x_vec, (np.ndarray, DualArray)):
+            x = x_vec
+        elif all(isinstance(x_i, (int, float, np.number)) for x_i in x_vec):
+            x = np.array(x_vec, dtype=np.float64)
+        else:
+            x = np.fromiter(x_vec, dtype=object, count=len(x_vec))
+        return self.function(x if self.parameters is None else self.parameters.view(x))
 
 
     def __call__(self, x_vec):
@@ -115,11 +486,14 @@ class AutoDiff():
         
         Input Arguments:
         =================
-        x_vec: a scalar (float/int/np.number) or a list of scalars
+        x_vec: a scalar (float/int/np.number) or a list of scalars,
+        or a 2D np.array of shape (N, dim_x) holding N input points (one per row)
 
         Return Arguments:
         =================
-        output of the function at x_vec
+        output of the function at x_vec,
+        for a batch of N input points: np.array of shape (N,) if the function returns a scalar,
+        and of shape (N, dim_f) otherwise
         
         Examples
         =================
@@ -141,8 +515,24 @@ class AutoDiff():
         >>> f = AutoDiff(lambda x: np.array([sin(x), cos(x)]))
         >>> f(1)
         array([0.84147098, 0.54030231])
+        >>> f(np.array([[0], [1]]))
+        array([[0.        , 1.        ],
+               [0.84147098, 0.54030231]])
         """
+        if self.vector_input:
+            return self._value(self._as_point(x_vec))
+        # a 2D array is a batch of input points
+        if isinstance(x_vec, np.ndarray) and x_vec.ndim == 2:
+            X = self._check_batch(x_vec)
+            output = self.function(*[DualArray._new(np.ascontiguousarray(X[:, i]), np.zeros((len(X), 0)), True)
+                                     for i in range(self.dim_x)])
+            values = np.stack([np.broadcast_to(f_j.real, len(X)) for f_j in batch_components(output, len(X))], axis=1)
+            if not isinstance(output, (list, np.ndarray)):
+                return values[:, 0]
+            return values
 
+        if not _Validation.checked:
+            return self._value(self._as_point(x_vec))
         if self.dim_x == 1:
             # in case user input a length-1 list/np.array
             if isinstance(x_vec, (list, np.ndarray)):
@@ -152,9 +542,9 @@ class AutoDiff():
                     x_vec = float(x_vec[0])
                 else:
                     raise TypeError("Input contains a non-int or non-float") 
-                return self.function(x_vec)
+                return self._value([x_vec])
             elif isinstance(x_vec, (int, float, np.number)):
-                return self.function(float(x_vec))
+                return self._value([float(x_vec)])
             else:
                 raise TypeError("Input contains a non-int or non-float")
         else:
@@ -169,7 +559,7 @@ class AutoDiff():
                     # convert the input to float
                     x_vec = [float(x_i) for x_i in list(x_vec)]
                     # return a n-dim array with rows as the output dimension
-                    return self.function(*x_vec)
+                    return self._value(x_vec)
                 else:
                     raise TypeError("Input contains a non-int or non-float")    
             else:
@@ -185,19 +575,24 @@ class AutoDiff():
         return self.__repr__()
         
 
-    def grad(self, x_vec):
+    def grad(self, x_vec, out=None, value_out=None):
         """Evaluate the gradient of function at x_vec
 
         Input Arguments:
         =================
-        x_vec: a scalar (float/int/np.number) or a list of scalars
+        x_vec: a scalar (float/int/np.number) or a list of scalars,
+        or Parameters of the layout of the parameters of the function
+        out: None, or a C-contiguous float64 np.array of shape (dim_f, dim_x) that the Jacobian is written
+        into and that is returned (also for a 1 to 1 mapping), instead of allocating a new np.array
+        value_out: None, or a float64 np.array of shape (dim_f,) that the function value is written into
 
         Return Arguments:
         =================
         gradient of the function at x_vec in np.array format with shape (dim_f, dim_x)
         EXCEPT when the the function is 1 to 1 mapping, 
         i.e. f: R -> R, f: R -> [R], f: R -> np.array([R])
-        then, the output will mimic your function output format
+        then, the output will mimic your function output format,
+        and for a function with parameters: Parameters holding the gradient (a list of them if dim_f > 1)
 
         Examples
         =================
@@ -224,7 +619,160 @@ class AutoDiff():
                [2.]])
         >>> f.grad(1).shape
         (2, 1)
+        >>> J = np.empty((2, 1)); f.grad(1, out=J) is J
+        True
+        """
+        return self.value_and_grad(x_vec, out=out, value_out=value_out)[1]
+
+
+    def value_and_grad(self, x_vec, out=None, value_out=None):
+        """Evaluate the function and its gradient at x_vec with a single evaluation of the function
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars,
+        or Parameters of the layout of the parameters of the function
+        out, value_out: buffers for the gradient and the value, see grad()
+
+        Return Arguments:
+        =================
+        value: output of the function at x_vec, the same as __call__(x_vec), value_out if it is given
+        gradient: gradient of the function at x_vec, the same as grad(x_vec), out if it is given
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: sin(x*y))
+        >>> f.value_and_grad([1,2])
+        (0.9092974268256817, array([[-0.83229367, -0.41614684]]))
+        >>> f = AutoDiff(lambda x: x**2)
+        >>> f.value_and_grad(3)
+        (9.0, 6.0)
+        """
+        x_vec = self._check_point(x_vec)
+        self._check_buffers(out, value_out)
+        key = self._cache_key(x_vec)
+        cached = self._cache_get(key, "value", "grad")
+        if cached is None:
+            value, Jacobian = self._value_and_grad(x_vec, key, out, value_out)
+        else:
+            value, Jacobian = cached
+            if out is not None:
+                np.copyto(out, Jacobian)
+                Jacobian = out
+            if value_out is not None:
+                fill_value(value, value_out)
+                value = value_out
+        if out is None:
+            Jacobian = self._formatted(Jacobian)
+        return value, self._structured(Jacobian)
+
+
+    def _check_buffers(self, out, value_out):
+        """Check the out= and value_out= buffers of grad() and value_and_grad()."""
+        for name, buffer, shape in (("out", out, (self.dim_f, self.dim_x)), ("value_out", value_out, (self.dim_f,))):
+            if buffer is None:
+                continue
+            if not isinstance(buffer, np.ndarray) or buffer.dtype != np.float64:
+                raise TypeError(f"{name} should be a float64 np.array or None")
+            if buffer.shape != shape or not buffer.flags.c_contiguous or not buffer.flags.writeable:
+                raise ValueError(f"{name} should be a writeable C-contiguous np.array of shape {shape}")
+
+
+    def _formatted(self, Jacobian):
+        """Return the dim_f x dim_x Jacobian in the format of grad(): the derivative of a function of one
+        variable with one output component has the format of the function output."""
+        if self.dim_x != 1 or self.dim_f != 1 or self.parameters is not None:
+            # output components are listed as rows of the Jacobian matrix
+            # i.e. np.array[[df_0/dx_0, df_0/dx_1, ...], [df_1/dx_0, df_1/dx_1, ...], ...]
+            return Jacobian
+        # if user defined function returns a list
+        if self.output_kind == "list":
+            return [Jacobian[0, 0]]
+        # if user defined function returns a np.array
+        if self.output_kind == "array":
+            return np.array([Jacobian[0, 0]])
+        # if user defined function returns a scalar
+        return Jacobian[0, 0]
+
+
+    def _structured(self, Jacobian):
+        """Return the Jacobian as Parameters of the layout of the parameters, one per row, without copies."""
+        if self.parameters is None:
+            return Jacobian
+        rows = [self.parameters.like(row) for row in Jacobian]
+        return rows[0] if self.dim_f == 1 else rows
+
+
+    def _value_and_grad(self, x_vec, key, out=None, value_out=None):
+        """Evaluate the function and its dim_f x dim_x Jacobian at a validated list of floats and cache them
+        under key, into the buffers out and value_out if they are given."""
+        plan = self._plan_at(x_vec)
+        replay = None if plan is None else plan.jacobian(x_vec)
+        if replay is None:
+            output, Jacobian = self._jacobian(x_vec, out)
+        elif self.sparse:
+            # the trace is seeded with the colors of its own sparsity pattern
+            output, compressed = replay
+            rows, cols, colors = self._plan_pattern
+            Jacobian = self._zero_jacobian(out)
+            Jacobian[rows, cols] = compressed[rows, colors[cols]]
+        else:
+            output, Jacobian = replay
+            if out is not None:
+                np.copyto(out, Jacobian)
+                Jacobian = out
+        # the forward pass gave the function value as well
+        if value_out is None:
+            value = real_output(output)
+        else:
+            fill_value(output, value_out)
+            value = value_out
+        if self.cache_size:
+            # the cache keeps the value in the format of the function output and the Jacobian as a matrix,
+            # grad() formats it on every return
+            self._cache_put(key, "value", value if value_out is None else real_output(output))
+            self._cache_put(key, "grad", Jacobian)
+        return value, Jacobian
+
+
+    def _check_point(self, x_vec):
+        """Check the input point of grad() and the other derivative methods.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+
+        Return Arguments:
+        =================
+        x_vec as a list of dim_x floats, or of the scalars of x_vec as they are inside unchecked()
         """
+        x_vec = self._as_point(x_vec)
+        if self._dim_f is None:
+            # the first evaluation gives the output dimension
+            self._learn(self._call(x_vec))
+        return x_vec
+
+
+    def _as_point(self, x_vec):
+        """Validate x_vec for _check_point() without evaluating the function."""
+        if isinstance(x_vec, Parameters):
+            # the flat buffer is the input point, as it is
+            if self.parameters is None or x_vec.size != self.dim_x:
+                raise ValueError("The input parameters do not match the parameters of the function")
+            return x_vec.flat
+        if self.vector_input and isinstance(x_vec, np.ndarray):
+            # checked as a whole, and kept as an array (float64 arrays are not copied)
+            if x_vec.shape != (self.dim_x,):
+                raise ValueError("Input dimension should match the function input dimension")
+            if not np.issubdtype(x_vec.dtype, np.number):
+                raise TypeError("Input contains a non-int or non-float")
+            return np.asarray(x_vec, dtype=np.float64)
+        if not _Validation.checked:
+            if isinstance(x_vec, np.ndarray):
+                x_vec = x_vec.tolist()
+            elif isinstance(x_vec, tuple):
+                x_vec = list(x_vec)
+            return x_vec if isinstance(x_vec, list) else [x_vec]
         if self.dim_x == 1:
             # in case user input a length-1 list/np.array
             if isinstance(x_vec, (list, np.ndarray)):
@@ -235,23 +783,7 @@ class AutoDiff():
                 else:
                     raise TypeError("Input contains a non-int or non-float")  
             if isinstance(x_vec, (int, float, np.number)):
-                x_vec = float(x_vec)
-                if self.dim_f == 1:
-                    output_1step_before = self.function(DualNumber(x_vec))
-                    # if user defined function returns a scalar
-                    if isinstance(output_1step_before, DualNumber):
-                        return self.function(DualNumber(x_vec)).dual
-                    # if user defined function returns a list
-                    elif isinstance(output_1step_before, list):
-                        return [self.function(DualNumber(x_vec))[0].dual]
-                    # if user defined function returns a np.array
-                    elif isinstance(output_1step_before, np.ndarray):
-                        return np.array([self.function(DualNumber(x_vec))[0].dual])   
-                else:
-                    # one var func with multiple outputs f(x) = [f_0(x), f_1(x), ...]
-                    # output components are listed as rows of the Jacobian matrix
-                    # i.e. np.array[[df_0/dx], [df_1/dx], ...]
-                    return np.transpose(np.array([[df_j_dx.dual for df_j_dx in self.function(DualNumber(x_vec))]]))
+                return [float(x_vec)]
             else:
                 raise TypeError("Input should be a scalar (int or float)")
         else:
@@ -259,22 +791,661 @@ class AutoDiff():
                 raise ValueError("Input dimension should match the function input dimension")
             if isinstance(x_vec, (list, np.ndarray)):
                 if all(isinstance(x_i, (int, float, np.number)) for x_i in x_vec):
-                    x_vec = [float(x_i) for x_i in list(x_vec)]
-                    Jacobian = []
-                    for i in range(self.dim_x):
-                        x_vec_4grad = deepcopy(x_vec)
-                        # apply d/dx_i and thus convert the i-th component of x_vec to DualNumber
-                        x_vec_4grad[i] = DualNumber(x_vec[i]) 
-                        df_dx_i = self.function(*x_vec_4grad)
-                        if self.dim_f == 1:
-                            # return a list of gradients i.e. [d/dx_0, d/dx_1, ...]f(x_vec)
-                            Jacobian.append([df_dx_i.dual]) 
-                        else:
-                            # return a list of gradients i.e. [d/dx_0, d/dx_1, ...][f_0(x_vec), f_1(x_vec), ...]
-                            Jacobian.append([df_dx_i[j].dual if isinstance(df_dx_i[j], DualNumber) else 0 for j in range(self.dim_f)]) 
-                    return np.array(Jacobian).transpose()
+                    return [float(x_i) for x_i in list(x_vec)]
                 else:
                     raise TypeError("Input contains a non-int or non-float")
-                    
             else:
                 raise TypeError("Input should be a list of int or float")
+
+
+    def _plan_at(self, x_vec):
+        """Return the Trace of function (recorded at x_vec on first use), None if tracing is off or impossible."""
+        if not self.trace or self._plan is False:
+            return None
+        if self._plan is None:
+            try:
+                self._plan = Trace(self.function, x_vec)
+            except ValueError:
+                # x_vec is outside the domain of the function, trace at the next point
+                return None
+            except Exception:
+                self._plan = False
+                return None
+            if self._plan.dim_f != self.dim_f:
+                self._plan = False
+                return None
+            self._plan.optimize()
+            if self.sparse:
+                rows, cols = self._plan.sparsity()
+                colors = color_columns(rows, cols, self.dim_x)
+                self._plan.seed(colors)
+                self._plan_pattern = (rows, cols, colors)
+                self._sparsity = (self._plan, rows, cols, colors)
+            if self.trace == "compile":
+                self._plan.compile()
+        return self._plan
+
+
+    def _value(self, x_vec):
+        """Evaluate function at a validated list of floats, through the cache if it is on."""
+        key = self._cache_key(x_vec)
+        cached = self._cache_get(key, "value")
+        if cached is not None:
+            return cached[0]
+        if self._output_kind is None:
+            # the first evaluation gives the output dimension and kind
+            output = self._call(x_vec)
+            self._learn(output)
+        else:
+            output = self._evaluate(x_vec)
+        if self.cache_size:
+            self._cache_put(key, "value", output)
+        return output
+
+
+    def _cache_key(self, x_vec):
+        """Return the cache key of a validated list of floats, None if the cache is off."""
+        if not self.cache_size:
+            return None
+        return np.array(x_vec, dtype=np.float64).tobytes()
+
+
+    def _cache_get(self, key, *kinds):
+        """Return a tuple of copies of the cached "value" and/or "grad" at key and count the hit or miss,
+        None on a miss."""
+        if key is None:
+            return None
+        entry = self._cache.get(key)
+        if entry is None or any(kind not in entry for kind in kinds):
+            self._cache_misses += 1
+            return None
+        self._cache_hits += 1
+        self._cache.move_to_end(key)
+        # the caller may modify the results, keep the stored ones intact
+        results = []
+        for kind in kinds:
+            result = entry[kind]
+            if isinstance(result, np.ndarray):
+                result = result.copy()
+            elif isinstance(result, list):
+                result = list(result)
+            results.append(result)
+        return tuple(results)
+
+
+    def _cache_put(self, key, kind, result):
+        """Store a copy of result as the "value" or "grad" at key and evict the least recently used points."""
+        if isinstance(result, np.ndarray):
+            result = result.copy()
+        elif isinstance(result, list):
+            result = list(result)
+        self._cache.setdefault(key, {})[kind] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+    @property
+    def cache_stats(self):
+        """Hits and misses of __call__() and grad() in the cache, and the number of cached points.
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: x*y, cache_size=2)
+        >>> f.grad([1, 2]); f([1, 2]); f([1, 3])
+        >>> f.cache_stats
+        {'hits': 1, 'misses': 2, 'size': 2, 'max_size': 2}
+        """
+        return {"hits": self._cache_hits, "misses": self._cache_misses,
+                "size": len(self._cache), "max_size": self.cache_size}
+
+
+    def cache_clear(self):
+        """Empty the cache and reset its hit and miss counters, e.g. after the function has changed."""
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+
+    def _evaluate(self, x_vec):
+        """Evaluate function at a validated list of floats, by the generated code with trace="compile"."""
+        if self.trace == "compile":
+            plan = self._plan_at(x_vec)
+            if plan is not None:
+                output = plan.value(x_vec)
+                if output is not None:
+                    return output
+        return self._call(x_vec)
+
+
+    @property
+    def trace_stats(self):
+        """Number of recorded operations of the trace and of the operations each optimization pass removed
+        (see Trace.optimize()), None before the first call or if the function can not be traced.
+
+        Example
+        =================
+        >>> f = AutoDiff(lambda x, y: [sin(x*y), x*y + y, cos(x*y)], trace=True)
+        >>> f.grad([1, 2])
+        >>> f.trace_stats
+        {'ops': 4, 'fold': 0, 'cse': 2, 'dead': 0}
+        """
+        return {"ops": len(self._plan), **self._plan.removed} if self._plan else None
+
+
+    @property
+    def source(self):
+        """Generated source of the recorded trace, None before the first call or if the function can not be traced."""
+        return self._plan.source if self._plan else None
+
+
+    def _sparsity_at(self, x_vec):
+        """Return (Trace or None, rows, cols, colors) of the sparsity pattern, detected again when
+        the trace it was detected with takes another branch at x_vec."""
+        if self._sparsity is not None:
+            plan = self._sparsity[0]
+            if plan is None or not plan.has_guards or plan.value(x_vec) is not None:
+                return self._sparsity
+        try:
+            plan = Trace(self.function, x_vec)
+            rows, cols = plan.sparsity()
+        except ValueError:
+            # x_vec is outside the domain of the function
+            raise
+        except Exception:
+            # the function can not be traced, every entry may be nonzero
+            plan = None
+            rows, cols = np.divmod(np.arange(self.dim_f * self.dim_x), self.dim_x)
+        self._sparsity = (plan, rows, cols, color_columns(rows, cols, self.dim_x))
+        return self._sparsity
+
+
+    def sparsity(self, x_vec):
+        """Detect the sparsity pattern of the Jacobian at x_vec by tracing the function once.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+
+        Return Arguments:
+        =================
+        rows, cols: int np.arrays, the entries (rows[k], cols[k]) of the Jacobian that may be nonzero,
+        every entry if the function can not be traced
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y, z: [x*y, sin(z)])
+        >>> f.sparsity([1, 2, 3])
+        (array([0, 0, 1]), array([0, 1, 2]))
+        """
+        return self._sparsity_at(self._check_point(x_vec))[1:3]
+
+
+    def grad_sparse(self, x_vec):
+        """Evaluate the nonzero entries of the Jacobian at x_vec with one tangent entry per column color.
+        Unlike grad(), the dense (dim_f, dim_x) matrix is never built.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+
+        Return Arguments:
+        =================
+        rows, cols, values: np.arrays, the Jacobian has the entry values[k] at (rows[k], cols[k])
+        and zeros elsewhere
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y, z: [x*y, sin(z)])
+        >>> f.grad_sparse([1, 2, 3])
+        (array([0, 0, 1]), array([0, 1, 2]), array([ 2.        ,  1.        , -0.98999249]))
+        """
+        x_vec = self._check_point(x_vec)
+        plan, rows, cols, colors = self._sparsity_at(x_vec)
+        output, compressed = self._compressed_jacobian(x_vec, colors)
+        return rows, cols, compressed[rows, colors[cols]]
+
+    def jvp(self, x_vec, v):
+        """Evaluate the function and its directional derivative J v at x_vec in one forward pass.
+        Every variable x_i is a DualNumber with dual part v_i, so the Jacobian is never built.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+        v: the direction, a scalar or a list of scalars with the same length as x_vec
+
+        Return Arguments:
+        =================
+        output: the output of the function at x_vec, in the format of the function output
+        tangent: J v, a scalar if the function returns a scalar, otherwise np.array of shape (dim_f,)
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: [x*y, sin(x)])
+        >>> f.jvp([1, 2], [1, 0])
+        ([2.0, 0.8414709848078965], array([2.        , 0.54030231]))
+        """
+        x_vec = self._check_point(x_vec)
+        v = self._check_point(v)
+        output, tangent = self._directional(x_vec, v)
+        if not isinstance(output, (list, np.ndarray)):
+            return output, tangent[0]
+        return output, tangent
+
+
+    def jvp_batch(self, x_vec, V):
+        """Evaluate the directional derivatives J v_1, ..., J v_k at x_vec in one forward pass.
+        The dual part of x_i is the vector (v_1[i], ..., v_k[i]), i.e. all directions are propagated together.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+        V: the directions, a 2D list/np.array of shape (k, dim_x), one direction per row
+
+        Return Arguments:
+        =================
+        output: the output of the function at x_vec, in the format of the function output
+        tangents: np.array of shape (k, dim_f), row l is J v_l
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: [x*y, sin(x)])
+        >>> f.jvp_batch([1, 2], [[1, 0], [0, 1]])
+        ([2.0, 0.8414709848078965], array([[2.        , 0.54030231],
+                                            [1.        , 0.        ]]))
+        """
+        x_vec = self._check_point(x_vec)
+        V = self._check_batch(V)
+        output, tangents = self._directional(x_vec, V.T)
+        return output, tangents.T
+
+
+    def _directional(self, x_vec, seeds):
+        """Evaluate the function on DualNumbers with dual parts seeds[i] (scalars or 1D np.arrays).
+
+        Return Arguments:
+        =================
+        output: the output of the function with every DualNumber replaced by its real part
+        tangents: np.array of shape (dim_f,) for scalar seeds, and (dim_f, k) for seeds of length k
+        """
+        seeds = np.asarray(seeds, dtype=float)
+        # scalar seeds as floats keep the scalar fast paths of DualNumber
+        output = self._call([DualNumber(x_i, seed) for x_i, seed in zip(x_vec, seeds.tolist() if seeds.ndim == 1 else seeds)])
+        tangents = np.zeros((self.dim_f,) + seeds.shape[1:])
+        values = []
+        for j, f_j in enumerate(output_components(output)):
+            # constant output components carry no DualNumber, their derivative is 0
+            if isinstance(f_j, DualNumber):
+                tangents[j] = f_j.dual
+                values.append(f_j.real)
+            else:
+                values.append(f_j)
+        if isinstance(output, list):
+            return values, tangents
+        if isinstance(output, np.ndarray):
+            return np.array(values), tangents
+        return values[0], tangents
+
+    def hessian(self, x_vec):
+        """Evaluate the exact second derivatives of function at x_vec
+
+        Each variable is a nested DualNumber, so the dual part of the dual part of the output is a second derivative.
+        The Hessian is symmetric, so the i-th pass seeds the pairs (x_i, x_j) with j >= i only:
+        the outer dual part seeds x_i and the inner tangent vector seeds x_i, ..., x_{dim_x-1}.
+        That is dim_x passes for the upper triangle, and the lower triangle is mirrored from it.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+
+        Return Arguments:
+        =================
+        Hessians of the function components at x_vec in np.array format with shape (dim_f, dim_x, dim_x),
+        i.e. H[k, i, j] = d^2 f_k / (dx_i dx_j)
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: x**2 * y)
+        >>> f.hessian([1, 2])
+        array([[[4., 2.],
+                [2., 0.]]])
+        """
+        x_vec = self._check_point(x_vec)
+        Hessian = np.zeros((self.dim_f, self.dim_x, self.dim_x))
+        for i in range(self.dim_x):
+            width = self.dim_x - i
+            seeds = np.eye(width)
+            # x_k with k < i stays a constant in this pass
+            x_vec_4hess = list(x_vec)
+            for k in range(i, self.dim_x):
+                inner = DualNumber(x_vec[k], seeds[k - i])
+                outer_dual = DualNumber(1.0, np.zeros(width)) if k == i else 0.0
+                x_vec_4hess[k] = DualNumber(inner, outer_dual)
+            output = self._call(x_vec_4hess)
+            for j, f_j in enumerate(output_components(output)):
+                # components that do not depend on x_i have no DualNumber in their outer dual part
+                if isinstance(f_j, DualNumber) and isinstance(f_j.dual, DualNumber):
+                    Hessian[j, i, i:] = f_j.dual.dual
+                    Hessian[j, i:, i] = f_j.dual.dual
+        return Hessian
+
+
+    def taylor(self, x_vec, direction, order):
+        """Evaluate the Taylor coefficients of t -> function(x_vec + t * direction) at t = 0 up to order
+
+        Every variable is a TaylorNumber x_k + direction_k * t truncated after t^order, so one pass
+        propagates all coefficients with O(order^2) work per operation.
+        The k-th coefficient is the k-th directional derivative divided by k!.
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+        direction: a scalar or a list of scalars with the same length as x_vec
+        order: int >= 0, the highest coefficient to return
+
+        Return Arguments:
+        =================
+        Taylor coefficients in np.array format with shape (order + 1,) for a function with one output,
+        and with shape (dim_f, order + 1) otherwise
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x: exp(x))
+        >>> f.taylor(0, 1, 3)
+        array([1.        , 1.        , 0.5       , 0.16666667])
+        """
+        if not isinstance(order, (int, np.integer)) or isinstance(order, bool):
+            raise TypeError("The order must be an int.")
+        if order < 0:
+            raise ValueError("The order must be non-negative.")
+        x_vec = self._check_point(x_vec)
+        direction = self._check_point(direction)
+        x_vec_4taylor = [TaylorNumber.variable(x_k, v_k, order) for x_k, v_k in zip(x_vec, direction)]
+        output = self._call(x_vec_4taylor)
+        coefficients = np.zeros((self.dim_f, order + 1))
+        for j, f_j in enumerate(output_components(output)):
+            if isinstance(f_j, TaylorNumber):
+                coefficients[j] = f_j.coefficients
+            else:
+                # a component that does not depend on the variables is a constant polynomial
+                coefficients[j, 0] = f_j
+        if self.dim_f == 1:
+            return coefficients[0]
+        return coefficients
+
+    def hvp(self, x_vec, v):
+        """Evaluate the Hessian-vector products H v of the function components at x_vec without forming H.
+
+        Every variable is the nested DualNumber DualNumber(DualNumber(x_i, e_i), DualNumber(v_i, 0)):
+        the outer dual part carries the directional derivative grad f . v, and its inner tangent vector
+        carries the gradient of that, i.e. grad(grad f . v) = H v. This is one evaluation with the
+        tangent vectors of grad(), so the cost is a small constant multiple of grad() and the memory O(dim_x).
+
+        Input Arguments:
+        =================
+        x_vec: a scalar (float/int/np.number) or a list of scalars
+        v: the vector, a scalar or a list of scalars with the same length as x_vec
+
+        Return Arguments:
+        =================
+        np.array of shape (dim_f, dim_x), row k is H_k v for the Hessian H_k of the k-th component,
+        i.e. hvp(x_vec, v)[k] == hessian(x_vec)[k] @ v
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: x**2 * y)
+        >>> f.hvp([1, 2], [1, 0])
+        array([[4., 2.]])
+        """
+        x_vec = self._check_point(x_vec)
+        v = self._check_point(v)
+        seeds = np.eye(self.dim_x)
+        zeros = np.zeros(self.dim_x)
+        x_vec_4hvp = [DualNumber(DualNumber(x_i, seeds[i]), DualNumber(v_i, zeros))
+                      for i, (x_i, v_i) in enumerate(zip(x_vec, v))]
+        output = self._call(x_vec_4hvp)
+        products = np.zeros((self.dim_f, self.dim_x))
+        for j, f_j in enumerate(output_components(output)):
+            # components that are constant or linear along v have no DualNumber in their outer dual part
+            if isinstance(f_j, DualNumber) and isinstance(f_j.dual, DualNumber):
+                products[j] = f_j.dual.dual
+        return products
+
+    def grad_batch(self, X):
+        """Evaluate the gradient of function at N input points at once
+
+        The function is evaluated on DualArrays, i.e. every variable carries its N values and tangents
+        as arrays over the batch axis, so the cost per point is a vectorized operation instead of a Python call.
+        A function building its output with np.array([...]) is slower than one returning a list,
+        because NumPy splits the DualArrays into objects while building the array.
+
+        Input Arguments:
+        =================
+        X: a 2D np.array of shape (N, dim_x) holding one input point per row,
+        a 1D np.array of shape (N,) is also accepted when dim_x == 1
+
+        Return Arguments:
+        =================
+        Jacobians of the function at the N input points in np.array format with shape (N, dim_f, dim_x)
+
+        Examples
+        =================
+        >>> f = AutoDiff(lambda x, y: [x*y, x+y])
+        >>> f.grad_batch(np.array([[1, 2], [3, 4]]))
+        array([[[2., 1.],
+                [1., 1.]],
+
+               [[4., 3.],
+                [1., 1.]]])
+        """
+        if self.vector_input:
+            raise ValueError("grad_batch() is not supported for a vector_input function")
+        X = self._check_batch(X)
+        N = len(X)
+        if self._dim_f is None and N > 0:
+            self._learn(self.function(*X[0].tolist()))
+        Jacobian = np.zeros((N, self.dim_f, self.dim_x))
+        chunk = self.dim_x if self.chunk_size is None else min(self.chunk_size, self.dim_x)
+        for start in range(0, self.dim_x, chunk):
+            stop = min(start + chunk, self.dim_x)
+            x_batch = []
+            for i in range(self.dim_x):
+                tangents = np.zeros((N, stop - start))
+                if start <= i < stop:
+                    tangents[:, i - start] = 1.0
+                x_batch.append(DualArray._new(np.ascontiguousarray(X[:, i]), tangents, True))
+            output = self.function(*x_batch)
+            for j, f_j in enumerate(batch_components(output, N)):
+                # constant output components have no tangent directions, their derivative is 0
+                if f_j._dual.shape[-1] > 0:
+                    Jacobian[:, j, start:stop] = np.broadcast_to(f_j._dual, (N, stop - start))
+        return Jacobian
+
+
+    def _check_batch(self, X):
+        """Check a batch of input points and return it as a float array of shape (N, dim_x)."""
+        X = np.asarray(X)
+        if X.ndim == 1 and self.dim_x == 1:
+            X = X[:, np.newaxis]
+        if X.ndim != 2 or X.shape[1] != self.dim_x:
+            raise ValueError("The batch input should be an array of shape (N, dim_x)")
+        if not np.issubdtype(X.dtype, np.number):
+            raise TypeError("Input contains a non-int or non-float")
+        return X.astype(np.float64)
+
+
+    def _jacobian(self, x_vec, out=None):
+        """Evaluate the function on DualNumbers and assemble its Jacobian via forward AD mode.
+
+        Input Arguments:
+        =================
+        x_vec: a list of floats of length dim_x (already validated by grad)
+        out: None, or a np.array of shape (dim_f, dim_x) to write the Jacobian into
+
+        Return Arguments:
+        =================
+        output: the output of the function evaluated on DualNumbers (of the last pass)
+        Jacobian: np.array of shape (dim_f, dim_x), out if it is given
+        """
+        if self.vector_input:
+            return self._vector_jacobian(x_vec, out)
+        if not self.sparse:
+            columns = self._workspace.get("columns")
+            if columns is None:
+                columns = self._workspace["columns"] = np.arange(self.dim_x)
+            return self._compressed_jacobian(x_vec, columns, out)
+        plan, rows, cols, colors = self._sparsity_at(x_vec)
+        output, compressed = self._compressed_jacobian(x_vec, colors, self._buffer("compressed", (self.dim_f, int(colors.max()) + 1)))
+        Jacobian = self._zero_jacobian(out)
+        Jacobian[rows, cols] = compressed[rows, colors[cols]]
+        return output, Jacobian
+
+
+    def _zero_jacobian(self, out):
+        """Return out filled with zeros, or a new zero Jacobian if out is None."""
+        if out is None:
+            return np.zeros((self.dim_f, self.dim_x))
+        out.fill(0.0)
+        return out
+
+
+    def _buffer(self, name, shape):
+        """Return the workspace np.array called name, allocated again only when its shape changes."""
+        buffer = self._workspace.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._workspace[name] = np.empty(shape)
+        return buffer
+
+
+    def _seeded_inputs(self, colors, chunk):
+        """Return the workspace of _compressed_jacobian(): the list of function arguments and, for each pass,
+        the (index, DualNumber) pairs of the variables it seeds. The DualNumbers keep their seed direction
+        from call to call and only get the real part of the new point, a new set is made when colors
+        or chunk change."""
+        workspace = self._workspace.get("inputs")
+        if workspace is not None and workspace[0] is colors and workspace[1] == chunk:
+            return workspace[2], workspace[3]
+        n_colors = int(colors.max()) + 1
+        passes = []
+        for start in range(0, n_colors, chunk):
+            stop = min(start + chunk, n_colors)
+            # seed the variables of colors start, ..., stop-1 with one tangent slot per color, so that
+            # a single evaluation gives the columns start, ..., stop-1 of the compressed Jacobian
+            seeds = np.eye(stop - start)
+            passes.append((start, stop, [(i, DualNumber(0.0, seeds[colors[i] - start]))
+                                         for i in range(self.dim_x) if start <= colors[i] < stop]))
+        inputs = [0.0] * self.dim_x
+        self._workspace["inputs"] = (colors, chunk, inputs, passes)
+        return inputs, passes
+
+
+    def _compressed_jacobian(self, x_vec, colors, out=None):
+        """Evaluate the compressed Jacobian J S with S[i, colors[i]] = 1 via forward AD mode,
+        i.e. the variables of one color share a tangent entry. colors = 0, ..., dim_x-1 gives J itself.
+
+        Input Arguments:
+        =================
+        x_vec: a list of floats of length dim_x
+        colors: int np.array of length dim_x
+        out: None, or a np.array of shape (dim_f, number of colors) to write the result into
+
+        Return Arguments:
+        =================
+        output: the output of the function evaluated on DualNumbers (of the last pass)
+        compressed: np.array of shape (dim_f, number of colors), out if it is given
+        """
+        n_colors = int(colors.max()) + 1
+        compressed = np.zeros((self.dim_f, n_colors)) if out is None else out
+        chunk = n_colors if self.chunk_size is None else min(self.chunk_size, n_colors)
+        inputs, passes = self._seeded_inputs(colors, chunk)
+        for start, stop, seeded in passes:
+            inputs[:] = x_vec
+            for i, x_i in seeded:
+                x_i._real = x_vec[i]
+                inputs[i] = x_i
+            output = self.function(*inputs)
+            for j, f_j in enumerate(output_components(output)):
+                # constant output components carry no DualNumber, their derivative is 0
+                if isinstance(f_j, DualNumber):
+                    compressed[j, start:stop] = f_j._dual
+                else:
+                    compressed[j, start:stop] = 0.0
+        return output, compressed
+
+
+    def _vector_jacobian(self, x_vec, out=None):
+        """Evaluate a vector_input function on DualArrays and assemble its Jacobian via forward AD mode.
+        Each pass seeds a block of directions: the DualArray holds x_vec and the tangents e_start, ..., e_stop-1.
+
+        Input Arguments:
+        =================
+        x_vec: a np.array or list of floats of length dim_x
+        out: None, or a np.array of shape (dim_f, dim_x) to write the Jacobian into
+
+        Return Arguments:
+        =================
+        output: the output of the function evaluated on a DualArray (of the last pass)
+        Jacobian: np.array of shape (dim_f, dim_x), out if it is given
+        """
+        n = self.dim_x
+        chunk = self.chunk_size if self.chunk_size is not None else max(1, _VECTOR_TANGENTS // n)
+        chunk = min(chunk, n)
+        Jacobian = self._zero_jacobian(out)
+        # the real part and the blocks of tangents (of the full and of the last, narrower block) are reused
+        x = self._buffer("x", (n,))
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            tangents = self._buffer(("tangents", stop - start), (n, stop - start))
+            tangents.fill(0.0)
+            # the diagonal of the square block of rows start, ..., stop-1
+            tangents[start:stop].reshape(-1)[::stop - start + 1] = 1.0
+            np.copyto(x, x_vec)
+            output = self._call(DualArray._new(x, tangents, True))
+            for j, tangent in enumerate(vector_components(output)):
+                # constant output components carry no DualArray, their derivative is 0
+                if tangent is not None:
+                    Jacobian[j, start:stop] = tangent
+        return output, Jacobian
+
+
+class RAutoDiff(AutoDiff):
+    """Reverse mode counterpart of AutoDiff.
+
+    It takes the same user defined functions and returns the same values and Jacobian layout as AutoDiff,
+    but grad() records the evaluation on a tape of ReverseNodes and gets each row of the Jacobian
+    with one backward sweep. This is cheaper than forward mode for functions with dim_x >> dim_f,
+    e.g. a loss function f: R^n -> R needs one forward and one backward sweep for the whole gradient.
+    With trace=True, grad() replays the recorded trace in forward mode, exactly like AutoDiff.
+
+    Examples
+    =================
+    >>> f = RAutoDiff(lambda x, y: sin(x*y))
+    >>> f.grad([1,2])
+    array([[-0.83229367, -0.41614684]])
+    """
+
+    def _jacobian(self, x_vec, out=None):
+        """Evaluate the function on ReverseNodes and assemble its Jacobian via reverse AD mode.
+
+        Input Arguments:
+        =================
+        x_vec: a list of floats of length dim_x (already validated by grad)
+        out: None, or a np.array of shape (dim_f, dim_x) to write the Jacobian into
+
+        Return Arguments:
+        =================
+        output: the output of the function evaluated on ReverseNodes
+        Jacobian: np.array of shape (dim_f, dim_x), out if it is given
+        """
+        tape = []
+        x_nodes = [ReverseNode(x_i, tape) for x_i in x_vec]
+        output = self._call(x_nodes)
+        Jacobian = self._zero_jacobian(out)
+        for j, f_j in enumerate(output_components(output)):
+            # constant output components are not on the tape, their derivative is 0
+            if isinstance(f_j, ReverseNode):
+                adjoints = backward(f_j)
+                for i, x_i in enumerate(x_nodes):
+                    if adjoints[x_i._index] is not None:
+                        Jacobian[j, i] = adjoints[x_i._index]
+        return output, Jacobian
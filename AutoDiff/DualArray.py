@@ -0,0 +1,423 @@
+# DualArray is the array-backed counterpart of DualNumber.
+# The real parts live in one contiguous float64 array of shape S, and the dual parts in one contiguous
+# float64 array of shape S + (k,), i.e. k tangent directions per element. Arithmetic and the
+# elementary functions work on the whole arrays at once, so elementwise work runs at NumPy speed.
+# NumPy ufuncs (np.add, np.sin, ...) and functions (np.sum, np.dot, ...) dispatch to DualArray through
+# __array_ufunc__ and __array_function__.
+import numpy as np
+
+# ufuncs that have an elementary function of the same name in ElementFunction
+_ELEMENT_UFUNCS = {
+    np.sin: "sin", np.cos: "cos", np.tan: "tan",
+    np.arcsin: "arcsin", np.arccos: "arccos", np.arctan: "arctan",
+    np.exp: "exp", np.log: "log", np.log10: "log10", np.sqrt: "sqrt",
+    np.sinh: "sinh", np.cosh: "cosh", np.tanh: "tanh",
+}
+# comparisons only look at the real part, like DualNumber
+_COMPARISON_UFUNCS = (np.equal, np.not_equal, np.less, np.less_equal, np.greater, np.greater_equal)
+# NumPy functions implemented for DualArray, filled by implements()
+_HANDLED_FUNCTIONS = {}
+
+
+def implements(numpy_function):
+    """Register a DualArray implementation of a NumPy function for __array_function__."""
+    def decorator(func):
+        _HANDLED_FUNCTIONS[numpy_function] = func
+        return func
+    return decorator
+
+
+def _expand(derivative):
+    """Append the tangent axis to a real-shaped array so it broadcasts against dual parts."""
+    return np.asarray(derivative)[..., np.newaxis]
+
+
+class DualArray:
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, real, dual=None):
+        """Constructor for the DualArray class.
+
+        Input Arguments:
+        =================
+        real: array_like of floats of shape S
+        dual: array_like of floats of shape S (one tangent direction) or of shape S + (k,) (k tangent directions),
+        default: ones of shape S
+
+        Return Arguments:
+        =================
+        self: Object of the DualArray class
+
+        Examples
+        =================
+        x1 = DualArray([1.0, 2.0])                        # d/dx of every element
+        x2 = DualArray([1.0, 2.0], [0.5, 0.0])
+        x3 = DualArray([1.0, 2.0], np.eye(2))              # 2 tangent directions, i.e. the full Jacobian
+        """
+        try:
+            real = np.ascontiguousarray(real, dtype=np.float64)
+            dual = np.ones_like(real) if dual is None else np.ascontiguousarray(dual, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise TypeError("Real and dual parts of DualArray must be arrays of numbers.")
+        if dual.shape == real.shape:
+            self._real, self._dual, self._vector = real, dual[..., np.newaxis], False
+        elif dual.shape[:-1] == real.shape:
+            self._real, self._dual, self._vector = real, dual, True
+        else:
+            raise ValueError("Dual part of DualArray must have the shape of the real part, plus an optional tangent axis.")
+
+    @classmethod
+    def _new(cls, real, dual, vector):
+        """Internal constructor from a float64 real part and a dual part with tangent axis, no validation."""
+        self = cls.__new__(cls)
+        self._real, self._dual, self._vector = real, dual, vector
+        return self
+
+    # BEGIN GETTER ---------------------------------------------------------
+    @property
+    def real(self):
+        """Function to return the real parts of a DualArray.
+
+        Example
+        =================
+        DualArray([3.2, 1.0], [1.7, 0.0]).real # array([3.2, 1. ])
+        """
+        return self._real
+
+    @property
+    def dual(self):
+        """Function to return the dual parts of a DualArray, with the tangent axis last if it has more than one direction.
+
+        Example
+        =================
+        DualArray([3.2, 1.0], [1.7, 0.0]).dual # array([1.7, 0. ])
+        """
+        return self._dual if self._vector else self._dual[..., 0]
+
+    @property
+    def shape(self):
+        return self._real.shape
+
+    @property
+    def ndim(self):
+        return self._real.ndim
+
+    @property
+    def size(self):
+        return self._real.size
+
+    def __len__(self):
+        return len(self._real)
+
+    # BEGIN STR ----------------------------------------------------
+    def __repr__(self):
+        """Returns a user-readable string output for a DualArray.
+
+        Example
+        =================
+        repr(DualArray([1.0], [2.0])) # DualArray(real=array([1.]), dual=array([2.]))
+        """
+        return f"DualArray(real={self._real!r}, dual={self.dual!r})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    # BEGIN INDEXING -----------------------------------------------------
+    def __getitem__(self, key):
+        """Index the real and dual parts together, the tangent axis is always kept.
+
+        Example
+        =================
+        x = DualArray([1.0, 2.0, 3.0])
+        x[1:]  # DualArray(real=array([2., 3.]), dual=array([1., 1.]))
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = tuple(k._real if isinstance(k, DualArray) else k for k in key)
+        return DualArray._new(self._real[key], self._dual[key + (slice(None),)], self._vector)
+
+    def reshape(self, *shape):
+        """Reshape the real and dual parts together, a view of both when NumPy can give one.
+
+        Example
+        =================
+        x = DualArray([1.0, 2.0, 3.0, 4.0])
+        x.reshape(2, 2).shape  # (2, 2)
+        """
+        if len(shape) == 1 and isinstance(shape[0], (tuple, list)):
+            shape = tuple(shape[0])
+        real = self._real.reshape(shape)
+        return DualArray._new(real, self._dual.reshape(real.shape + self._dual.shape[-1:]), self._vector)
+
+    def transpose(self, *axes):
+        """Permute the axes of the real and dual parts together, the tangent axis stays last.
+
+        Example
+        =================
+        DualArray(np.ones((2, 3))).transpose().shape  # (3, 2)
+        """
+        if len(axes) == 1 and isinstance(axes[0], (tuple, list)):
+            axes = tuple(axes[0])
+        axes = tuple(range(self.ndim))[::-1] if not axes else tuple(ax % self.ndim for ax in axes)
+        return DualArray._new(self._real.transpose(axes), self._dual.transpose(axes + (self.ndim,)), self._vector)
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def __setitem__(self, key, value):
+        """Assign DualArray or float values into the real and dual parts, floats get a zero dual part."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if isinstance(value, DualArray):
+            self._real[key] = value._real
+            self._dual[key + (slice(None),)] = value._dual
+        else:
+            self._real[key] = value
+            self._dual[key + (slice(None),)] = 0.0
+
+    # BEGIN CHAIN RULE ------------------------------------------------
+    def _chain(self, real, derivative):
+        """Returns f(self) for an elementary function f, given real = f(self.real) and derivative = f'(self.real),
+        both evaluated on the whole real array at once.
+
+        Example
+        =================
+        x = DualArray([0.0, 1.0])
+        x._chain(np.sin(x.real), np.cos(x.real)) # DualArray(real=array([0., 0.84147098]), dual=array([1., 0.54030231]))
+        """
+        return DualArray._new(np.asarray(real, dtype=np.float64), _expand(derivative) * self._dual, self._vector)
+
+    # BEGIN NUMPY PROTOCOLS -----------------------------------------------
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Dispatch NumPy ufuncs on DualArrays to vectorized derivative rules.
+
+        Arithmetic ufuncs are handled here, elementary ufuncs (np.sin, np.exp, ...) go through
+        the function of the same name in ElementFunction, comparisons act on the real parts.
+        Any other ufunc, method or the out= argument is not supported.
+        """
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        for x in inputs:
+            if not isinstance(x, (DualArray, np.ndarray, int, float, np.number)):
+                return NotImplemented
+        if ufunc in _COMPARISON_UFUNCS:
+            return ufunc(*[x._real if isinstance(x, DualArray) else x for x in inputs])
+        if ufunc in _ELEMENT_UFUNCS:
+            from . import ElementFunction
+            return getattr(ElementFunction, _ELEMENT_UFUNCS[ufunc])(inputs[0])
+        if ufunc is np.negative:
+            return DualArray._new(np.negative(inputs[0]._real), -inputs[0]._dual, inputs[0]._vector)
+        if ufunc is np.positive:
+            return DualArray._new(inputs[0]._real.copy(), inputs[0]._dual.copy(), inputs[0]._vector)
+        if ufunc is np.add:
+            return _binary(inputs[0], inputs[1], np.add, lambda a, b, r: (1.0, 1.0))
+        if ufunc is np.subtract:
+            return _binary(inputs[0], inputs[1], np.subtract, lambda a, b, r: (1.0, -1.0))
+        if ufunc is np.multiply:
+            return _binary(inputs[0], inputs[1], np.multiply, lambda a, b, r: (b, a))
+        if ufunc is np.true_divide:
+            return _binary(inputs[0], inputs[1], np.true_divide, lambda a, b, r: (1.0 / b, -r / b))
+        if ufunc is np.power:
+            # d(a**b) = b * a**(b-1) da + a**b * log(a) db, log(a) is only needed for a DualArray exponent
+            return _binary(inputs[0], inputs[1], np.power,
+                           lambda a, b, r: (b * a ** (b - 1.0), r * np.log(a) if isinstance(inputs[1], DualArray) else 0.0))
+        if ufunc is np.square:
+            return _binary(inputs[0], inputs[0], np.multiply, lambda a, b, r: (b, a))
+        if ufunc is np.matmul:
+            return _dot(inputs[0], inputs[1])
+        return NotImplemented
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Dispatch the NumPy functions registered with implements() to their DualArray versions."""
+        if func not in _HANDLED_FUNCTIONS:
+            return NotImplemented
+        if not all(issubclass(t, (DualArray, np.ndarray)) for t in types):
+            return NotImplemented
+        return _HANDLED_FUNCTIONS[func](*args, **kwargs)
+
+    # BEGIN OPERATORS -----------------------------------------------------
+    def __neg__(self):
+        return np.negative(self)
+
+    def __pos__(self):
+        return np.positive(self)
+
+    def __add__(self, other):
+        return np.add(self, other)
+
+    def __radd__(self, other):
+        return np.add(other, self)
+
+    def __sub__(self, other):
+        return np.subtract(self, other)
+
+    def __rsub__(self, other):
+        return np.subtract(other, self)
+
+    def __mul__(self, other):
+        return np.multiply(self, other)
+
+    def __rmul__(self, other):
+        return np.multiply(other, self)
+
+    def __truediv__(self, other):
+        return np.true_divide(self, other)
+
+    def __rtruediv__(self, other):
+        return np.true_divide(other, self)
+
+    def __pow__(self, other):
+        return np.power(self, other)
+
+    def __rpow__(self, other):
+        return np.power(other, self)
+
+    def __matmul__(self, other):
+        return np.matmul(self, other)
+
+    def __rmatmul__(self, other):
+        return np.matmul(other, self)
+
+    def __eq__(self, other):
+        return np.equal(self, other)
+
+    def __ne__(self, other):
+        return np.not_equal(self, other)
+
+    def __lt__(self, other):
+        return np.less(self, other)
+
+    def __le__(self, other):
+        return np.less_equal(self, other)
+
+    def __gt__(self, other):
+        return np.greater(self, other)
+
+    def __ge__(self, other):
+        return np.greater_equal(self, other)
+
+    # BEGIN REDUCTIONS -----------------------------------------------------
+    def sum(self, axis=None):
+        return np.sum(self, axis=axis)
+
+    def mean(self, axis=None):
+        return np.mean(self, axis=axis)
+
+    def dot(self, other):
+        return np.dot(self, other)
+
+
+def _parts(x):
+    """Split an operand into (real part, dual part or None, vector flag or None)."""
+    if isinstance(x, DualArray):
+        return x._real, x._dual, x._vector
+    return np.asarray(x, dtype=np.float64), None, None
+
+
+def _binary(a, b, ufunc, partials):
+    """Apply a binary ufunc elementwise, with partials(a, b, result) giving (d/da, d/db) on the real parts."""
+    a_real, a_dual, a_vector = _parts(a)
+    b_real, b_dual, b_vector = _parts(b)
+    if a_dual is not None and b_dual is not None and a_dual.shape[-1] != b_dual.shape[-1]:
+        raise ValueError("DualArrays with a different number of tangent directions cannot be combined.")
+    real = np.asarray(ufunc(a_real, b_real))
+    da, db = partials(a_real, b_real, real)
+    dual = None
+    if a_dual is not None:
+        dual = _expand(da) * a_dual
+    if b_dual is not None:
+        dual = _expand(db) * b_dual if dual is None else dual + _expand(db) * b_dual
+    # broadcasting of the real parts may add leading axes the dual part of one operand does not have
+    dual = np.broadcast_to(dual, real.shape + dual.shape[-1:])
+    return DualArray._new(real, np.ascontiguousarray(dual), bool(a_vector or b_vector))
+
+
+def _contract_axis(x):
+    """The axis of the second operand np.dot contracts over."""
+    return 0 if np.ndim(x) == 1 else np.ndim(x) - 2
+
+
+@implements(np.dot)
+def _dot(a, b):
+    """np.dot for DualArrays: d(a.b) = da.b + a.db"""
+    a_real, a_dual, a_vector = _parts(a)
+    b_real, b_dual, b_vector = _parts(b)
+    if a_real.ndim == 0 or b_real.ndim == 0:
+        return np.multiply(a, b)
+    real = np.dot(a_real, b_real)
+    dual = None
+    if a_dual is not None:
+        # contract the last axis of a (the tangent axis of a_dual comes right after it) and move the tangent axis last
+        dual = np.tensordot(a_dual, b_real, axes=([a_real.ndim - 1], [_contract_axis(b_real)]))
+        dual = np.moveaxis(dual, a_real.ndim - 1, -1)
+    if b_dual is not None:
+        term = np.tensordot(a_real, b_dual, axes=([a_real.ndim - 1], [_contract_axis(b_real)]))
+        dual = term if dual is None else dual + term
+    return DualArray._new(np.asarray(real), np.ascontiguousarray(dual), bool(a_vector or b_vector))
+
+
+def _normalize_axis(axis, ndim):
+    """Turn an axis argument of a reduction into a tuple of non-negative axes."""
+    if axis is None:
+        return tuple(range(ndim))
+    if not isinstance(axis, tuple):
+        axis = (axis,)
+    return tuple(ax % ndim for ax in axis)
+
+
+@implements(np.sum)
+def _sum(a, axis=None):
+    """np.sum for DualArrays, the tangent axis is never summed over."""
+    axes = _normalize_axis(axis, a.ndim)
+    return DualArray._new(np.asarray(a._real.sum(axis=axes)), a._dual.sum(axis=axes), a._vector)
+
+
+@implements(np.mean)
+def _mean(a, axis=None):
+    """np.mean for DualArrays."""
+    axes = _normalize_axis(axis, a.ndim)
+    count = int(np.prod([a.shape[ax] for ax in axes]))
+    return _sum(a, axis=axes) / count
+
+
+def _as_dual_arrays(arrays):
+    """Convert a sequence of DualArrays and constant arrays to DualArrays with the same number of tangent directions."""
+    ndir = {x._dual.shape[-1] for x in arrays if isinstance(x, DualArray)}
+    if len(ndir) != 1:
+        raise ValueError("DualArrays with a different number of tangent directions cannot be combined.")
+    k = ndir.pop()
+    return [x if isinstance(x, DualArray) else DualArray(x, np.zeros(np.shape(x) + (k,))) for x in arrays]
+
+
+@implements(np.reshape)
+def _reshape(a, newshape=None, order="C", shape=None):
+    """np.reshape for DualArrays, only the default C order is supported."""
+    if order != "C":
+        raise ValueError("DualArray only supports reshaping in C order.")
+    return a.reshape(newshape if shape is None else shape)
+
+
+@implements(np.transpose)
+def _transpose(a, axes=None):
+    """np.transpose for DualArrays."""
+    return a.transpose() if axes is None else a.transpose(axes)
+
+
+@implements(np.stack)
+def _stack(arrays, axis=0):
+    """np.stack for DualArrays and constant arrays."""
+    arrays = _as_dual_arrays(arrays)
+    axis = axis % (arrays[0].ndim + 1)
+    return DualArray._new(np.stack([x._real for x in arrays], axis=axis),
+                          np.stack([x._dual for x in arrays], axis=axis),
+                          any(x._vector for x in arrays))
+
+
+@implements(np.concatenate)
+def _concatenate(arrays, axis=0):
+    """np.concatenate for DualArrays and constant arrays."""
+    arrays = _as_dual_arrays(arrays)
+    axis = axis % arrays[0].ndim
+    return DualArray._new(np.concatenate([x._real for x in arrays], axis=axis),
+                          np.concatenate([x._dual for x in arrays], axis=axis),
+                          any(x._vector for x in arrays))
@@ -1,13 +1,53 @@
 # All functions:
-# '__add__', '__class__', '__delattr__', '__dict__', '__dir__', '__doc__', 
+# '__add__', '__class__', '__delattr__', '__dir__', '__doc__', 
 # '__eq__', '__format__', '__ge__', '__getattribute__', '__gt__', '__hash__',
 # '__init__', '__init_subclass__', '__le__', '__lt__', '__module__', '__mul__', 
 # '__ne__', '__neg__', '__new__', '__pos__', '__pow__', '__radd__', '__reduce__', 
 # '__reduce_ex__', '__repr__', '__rmul__', '__rpow__', '__rsub__', 
-# '__rtruediv__', '__setattr__', '__sizeof__', '__str__', '__sub__', 
-# '__subclasshook__', '__truediv__', '__weakref__', 'dual', 'real'
-import pdb
+# '__rtruediv__', '__setattr__', '__sizeof__', '__slots__', '__str__', '__sub__', 
+# '__subclasshook__', '__truediv__', '_chain', 'dual', 'real', '__mod__',
+# and the NumPy object methods 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan',
+# 'exp', 'log', 'log10', 'sqrt', 'sinh', 'cosh', 'tanh'
+import math
+import operator
 import numpy as np
+from contextlib import contextmanager
+
+# operand types handled by the scalar fast paths of the operators, they are never promoted to a DualNumber
+_SCALARS = (int, float)
+_new = object.__new__
+
+class _Validation:
+    """Process-wide switch of the input validation of the DualNumber constructor, the ElementFunction
+    primitives and the AutoDiff entry points, turned off inside `with unchecked():`."""
+    checked = True
+
+@contextmanager
+def unchecked():
+    """
+    Context manager that skips input validation for code that only passes already valid inputs,
+    e.g. the inner loop of an optimizer. Inside it, the DualNumber constructor does not check the types
+    of its parts, the elementary functions do not check their domains (log(-1.0) gives nan, tan at a pole
+    a huge number) and AutoDiff.__call__/grad and the other derivative methods take x_vec as it is.
+    Invalid inputs then give NaN/inf or an error from deeper down instead of a TypeError/ValueError.
+    This holds for DualNumbers, DualArrays, ReverseNodes and TaylorNumbers alike. A TraceNode keeps its
+    domain checks, since a trace can only record a point inside the domain: a traced function is not
+    recorded at such a point and runs untraced there, i.e. unchecked as well.
+    The switch is process-wide, so it also applies to the other threads while the block runs.
+
+    Examples
+    =================
+    f = AutoDiff(lambda x, y: log(x) * y)
+    with unchecked():
+        for i in range(1000):
+            x = x - 0.01 * f.grad(x)[0]
+    """
+    previous = _Validation.checked
+    _Validation.checked = False
+    try:
+        yield
+    finally:
+        _Validation.checked = previous
 
 def check_type_convert(other):
     """
@@ -31,15 +71,57 @@ def check_type_convert(other):
     else:
         return DualNumber(other, 0.0)
 
+def _make(real, dual):
+    """
+    Internal constructor of DualNumber used by the operators, it skips the validation of __init__ since the
+    real and dual parts computed from valid DualNumbers are valid.
+    
+    Input Arguments:
+    =================
+    real: int/float
+    dual: int/float or 1D np.array
+    
+    Return Arguments:
+    =================
+    Object of the DualNumber class
+    """
+    x = _new(DualNumber)
+    x._real = real
+    x._dual = dual
+    return x
+
+def _is_zero(dual):
+    """
+    Check whether a dual part is exactly zero, for scalar, tangent vector and nested dual parts.
+    
+    Examples
+    =================
+    _is_zero(0.0) # True
+    _is_zero(np.array([0.0, 1.0])) # False
+    _is_zero(DualNumber(0.0, 0.0)) # True
+    """
+    if isinstance(dual, DualNumber):
+        return _is_zero(dual._real) and _is_zero(dual._dual)
+    return not np.any(dual)
+
+def _element_function(name):
+    """Look up an elementary function of ElementFunction, which imports this module itself."""
+    from . import ElementFunction
+    return getattr(ElementFunction, name)
+
 class DualNumber:
+    # only the real and dual parts are stored, no per-instance __dict__
+    __slots__ = ("_real", "_dual")
+
     # BEGIN CONSTRUCTOR ----------------------------------------------------
     def __init__(self, real, dual=1.0):
         """Constructor for the DualNumber class.
         
         Input Arguments:
         =================
-        real: int/float
-        dual: int/float
+        real: int/float, or a DualNumber for nested (higher order) dual numbers
+        dual: int/float, or a 1D np.array of floats holding one tangent per seed direction,
+        or a DualNumber for nested (higher order) dual numbers
         
         Return Arguments:
         =================
@@ -50,15 +132,23 @@ class DualNumber:
         x1 = DualNumber(4, 1.2)
         x2 = DualNumber(2.2, 6)
         x3 = DualNumber(2, 1)
+        x4 = DualNumber(2, np.array([1.0, 0.0])) # multi-directional: d/dx and d/dy at once
+        x5 = DualNumber(DualNumber(2, 1), 1)     # nested: its dual part of the dual part is a 2nd derivative
         """
-        if isinstance(real, (int, float)):
+        if not _Validation.checked:
+            self._real = real
+            self._dual = dual
+            return
+        if isinstance(real, (int, float, DualNumber)):
             self._real = real
         else:
-            raise TypeError("Real part of DualNumber must be an int or float.")
-        if isinstance(dual, (int, float)):
+            raise TypeError("Real part of DualNumber must be an int, a float or a DualNumber.")
+        if isinstance(dual, (int, float, DualNumber)):
+            self._dual = dual
+        elif isinstance(dual, np.ndarray) and dual.ndim == 1 and np.issubdtype(dual.dtype, np.number):
             self._dual = dual
         else:
-            raise TypeError("Dual part of DualNumber must be an int or float.")
+            raise TypeError("Dual part of DualNumber must be an int, a float, a 1D np.array of numbers or a DualNumber.")
     
     # BEGIN GETTER ---------------------------------------------------------
     @property
@@ -117,6 +207,27 @@ class DualNumber:
         """
         return f"{self._real} + {self._dual} eps"
 
+    # BEGIN CHAIN RULE ------------------------------------------------
+    def _chain(self, real, derivative):
+        """Returns f(self) for an elementary function f, given real = f(self.real) and derivative = f'(self.real).
+        
+        Input Arguments:
+        =================
+        self: DualNumber
+        real: f(self.real)
+        derivative: f'(self.real)
+        
+        Return Arguments:
+        =================
+        A DualNumber whose dual part follows the chain rule
+        
+        Example
+        =================
+        x1 = DualNumber(0, 2)
+        str(x1._chain(np.sin(0), np.cos(0))) # 0.0 + 2.0 eps
+        """
+        return _make(real, derivative * self._dual)
+
     # BEGIN NEG -----------------------------------------------------
     def __neg__(self):
         """Returns the negation of a DualNumber by overloading the negation operator.
@@ -133,7 +244,7 @@ class DualNumber:
         =================
         x1 = -DualNumber(3, 1) # DualNumber(-3, -1)
         """
-        return DualNumber(-self._real, -self._dual)
+        return _make(-self._real, -self._dual)
                               
     # BEGIN POS -----------------------------------------------------
     def __pos__(self):
@@ -151,7 +262,7 @@ class DualNumber:
         =================
         x1 = +DualNumber(3, 1) # DualNumber(3, 1)
         """
-        return DualNumber(self._real, self._dual)
+        return _make(self._real, self._dual)
 
     # BEGIN ADD -----------------------------------------------------
     def __add__(self, other):
@@ -172,8 +283,11 @@ class DualNumber:
         x2 = DualNumber(2, 7)
         str(x1 + x2) # 5 + 8 eps
         """
-        other = check_type_convert(other)
-        return DualNumber(self._real + other._real, self._dual + other._dual)
+        if isinstance(other, DualNumber):
+            return _make(self._real + other._real, self._dual + other._dual)
+        if isinstance(other, _SCALARS):
+            return _make(self._real + other, self._dual)
+        return NotImplemented
 
     def __radd__(self, other): 
         """Perform same as __add__ but handle input reversal for the addition of two objects of the DualNumber class.
@@ -213,8 +327,11 @@ class DualNumber:
         x2 = DualNumber(2, 7)
         str(x1 - x2) # 1 + - 6 eps
         """
-        other = check_type_convert(other)
-        return DualNumber(self._real - other._real, self._dual - other._dual)
+        if isinstance(other, DualNumber):
+            return _make(self._real - other._real, self._dual - other._dual)
+        if isinstance(other, _SCALARS):
+            return _make(self._real - other, self._dual)
+        return NotImplemented
         
     def __rsub__(self, other): 
         """Perform same as __sub__ but handle input reversal for the subtraction of two objects of the DualNumber class.
@@ -233,8 +350,9 @@ class DualNumber:
         x1 = DualNumber(3, 1)
         str(5 - x1) # 2  + -1.0 eps
         """
-        other = check_type_convert(other)
-        return other.__sub__(self)
+        if isinstance(other, _SCALARS):
+            return _make(other - self._real, -self._dual)
+        return NotImplemented
     
     # BEGIN MUL -----------------------------------------------------
     def __mul__(self, other):
@@ -255,8 +373,11 @@ class DualNumber:
         x2 = DualNumber(2, 7)
         str(x1 * x2) # 6 + 23 eps
         """
-        other = check_type_convert(other)
-        return DualNumber(self._real * other._real, self._real * other._dual + self._dual * other._real)
+        if isinstance(other, DualNumber):
+            return _make(self._real * other._real, self._real * other._dual + self._dual * other._real)
+        if isinstance(other, _SCALARS):
+            return _make(self._real * other, self._dual * other)
+        return NotImplemented
 
     def __rmul__(self, other):
         """Perform same as __sub__ but handle input reversal for the multiplication of two objects of the DualNumber class.
@@ -298,8 +419,13 @@ class DualNumber:
         x2 = DualNumber(2, 7) 
         print(str(x1 / x2)) # 1.5  + -4.75 eps
         """
-        other = check_type_convert(other)
-        return DualNumber(self._real/other._real, (self._dual*other._real-self._real*other._dual)/other._real**2)
+        # d(a/b) = (da - q db)/b with q = a/b, b is never squared so a large or small b does not overflow
+        if isinstance(other, DualNumber):
+            q = self._real/other._real
+            return _make(q, (self._dual - q*other._dual)/other._real)
+        if isinstance(other, _SCALARS):
+            return _make(self._real/other, self._dual/other)
+        return NotImplemented
     
     def __rtruediv__(self, other):
         """Perform same as __truediv__ but handle input reversal for the division of two objects of the DualNumber class.
@@ -319,8 +445,10 @@ class DualNumber:
         x2 = DualNumber(2, 7) 
         print(str(5 / x2)) # 2.5  + -8.75 eps
         """
-        other = check_type_convert(other)
-        return other.__truediv__(self)
+        if isinstance(other, _SCALARS):
+            q = other/self._real
+            return _make(q, (-q*self._dual)/self._real)
+        return NotImplemented
 
     # BEGIN POW -----------------------------------------------------
     # https://math.stackexchange.com/questions/1914591/dual-number-ab-varepsilon-raised-to-a-dual-power-e-g-ab-varepsilon
@@ -344,11 +472,14 @@ class DualNumber:
         x2 = DualNumber(2, 7) 
         print(str(x1 ** x2)) # 9  + 75.21257418609092 eps
         """
-        other = check_type_convert(other)
-        if other._dual == 0:
-            return DualNumber(self._real**other._real, self._real**other._real*(self._dual*other._real/self._real))
+        if isinstance(other, _SCALARS):
+            return _make(self._real**other, self._real**other*(self._dual*other/self._real))
+        if not isinstance(other, DualNumber):
+            return NotImplemented
+        if _is_zero(other._dual):
+            return _make(self._real**other._real, self._real**other._real*(self._dual*other._real/self._real))
         else:
-            return DualNumber(self._real**other._real, self._real**other._real*(self._dual*other._real/self._real + other._dual*np.log(self._real)))
+            return _make(self._real**other._real, self._real**other._real*(self._dual*other._real/self._real + other._dual*np.log(self._real)))
     
     def __rpow__(self, other):
         """Perform same as __pow__ but handle input reversal for the exponentation of two objects of the DualNumber class.
@@ -368,10 +499,68 @@ class DualNumber:
         x2 = DualNumber(2, 7) 
         print(str(2 ** x1)) # 8  + 5.545177444479562 eps
         """
-        other = check_type_convert(other)
-        return other.__pow__(self)
+        if isinstance(other, _SCALARS):
+            value = other**self._real
+            return _make(value, value*(self._dual*np.log(other)))
+        return NotImplemented
               
                               
+    # BEGIN MOD -----------------------------------------------------
+    def __mod__(self, other):
+        """Overload the modulo operator for a scalar modulus, d(x mod c)/dx = 1 away from the jumps.
+        
+        Example
+        =================
+        x1 = DualNumber(7, 2)
+        str(x1 % 3) # 1 + 2 eps
+        """
+        if isinstance(other, _SCALARS):
+            return _make(self._real % other, self._dual)
+        return NotImplemented
+
+    # BEGIN NUMPY METHODS ------------------------------------------------
+    # NumPy ufuncs on objects call the method of the same name, e.g. np.sin(x) calls x.sin().
+    # They make np.sin/np.exp/... work on DualNumbers and on object arrays of DualNumbers,
+    # and let ElementFunction evaluate its rules on nested DualNumbers.
+    def sin(self):
+        return _element_function("sin")(self)
+
+    def cos(self):
+        return _element_function("cos")(self)
+
+    def tan(self):
+        return _element_function("tan")(self)
+
+    def arcsin(self):
+        return _element_function("arcsin")(self)
+
+    def arccos(self):
+        return _element_function("arccos")(self)
+
+    def arctan(self):
+        return _element_function("arctan")(self)
+
+    def exp(self):
+        return _element_function("exp")(self)
+
+    def log(self):
+        return _element_function("log")(self)
+
+    def log10(self):
+        return _element_function("log10")(self)
+
+    def sqrt(self):
+        return _element_function("sqrt")(self)
+
+    def sinh(self):
+        return _element_function("sinh")(self)
+
+    def cosh(self):
+        return _element_function("cosh")(self)
+
+    def tanh(self):
+        return _element_function("tanh")(self)
+
     # BEGIN EQ ---------------------------------------------------------------
     def __eq__(self, other):
         """Determines whether one DualNumber equals another DualNumber.
@@ -515,4 +704,191 @@ class DualNumber:
             return (self._real >= other._real)
         except AttributeError:
             return (self._real >= other)
-    
+
+
+# BEGIN ACCUMULATION ---------------------------------------------------------
+# A DualNumber is a value: the operators always return a new DualNumber, and x += y rebinds x to
+# x + y without touching the object x referred to, so a DualNumber can be shared freely (an input
+# variable of AutoDiff is referenced by every expression that uses it). An Accumulator is the one
+# mutable kind: its in-place operators update the object itself, and its tangent np.array is private
+# to it, copied in when it is created and never handed to the results of other operators. Aliasing an
+# Accumulator therefore aliases the running total, everything computed from it is an ordinary DualNumber.
+class Accumulator(DualNumber):
+    __slots__ = ()
+
+    def __init__(self, real=0.0, dual=None):
+        """Constructor for the Accumulator class, a DualNumber whose +=, -=, *= and /= work in place.
+
+        Input Arguments:
+        =================
+        real, dual: as for DualNumber, default: the constant 0 + 0 eps,
+        or a DualNumber as real (and no dual) to start from its value, which is copied
+
+        Return Arguments:
+        =================
+        self: Object of the Accumulator class
+
+        Examples
+        =================
+        total = Accumulator()
+        for x_i in terms:
+            total += x_i ** 2    # no new DualNumber per term
+        str(Accumulator(DualNumber(2, 1)))  # 2 + 1 eps
+        """
+        if dual is None:
+            real, dual = (real._real, real._dual) if isinstance(real, DualNumber) else (real, 0.0)
+        super().__init__(real, dual)
+        self._dual = _owned(self._dual)
+
+    def snapshot(self):
+        """Return an ordinary DualNumber with the current value, which later updates do not change.
+
+        Example
+        =================
+        total = Accumulator(1.0, np.zeros(2)); x = total.snapshot(); total += 1
+        x.real  # 1.0
+        """
+        return _make(self._real, _owned(self._dual))
+
+    # the operators of DualNumber that pass the dual part on unchanged must not share the private array
+    def __pos__(self):
+        return self.snapshot()
+
+    def __add__(self, other):
+        return self.snapshot().__add__(other)
+
+    def __radd__(self, other):
+        return self.snapshot().__add__(other)
+
+    def __sub__(self, other):
+        return self.snapshot().__sub__(other)
+
+    def __mod__(self, other):
+        return self.snapshot().__mod__(other)
+
+    # BEGIN IN-PLACE -----------------------------------------------------
+    def __iadd__(self, other):
+        if isinstance(other, DualNumber):
+            self._real = self._real + other._real
+            self._dual = operator.iadd(self._dual, other._dual)
+        elif isinstance(other, _SCALARS):
+            self._real = self._real + other
+        else:
+            return NotImplemented
+        return self
+
+    def __isub__(self, other):
+        if isinstance(other, DualNumber):
+            self._real = self._real - other._real
+            self._dual = operator.isub(self._dual, other._dual)
+        elif isinstance(other, _SCALARS):
+            self._real = self._real - other
+        else:
+            return NotImplemented
+        return self
+
+    def __imul__(self, other):
+        if isinstance(other, DualNumber):
+            # d(ab) = b da + a db, with a the value before the update
+            term = self._real * other._dual
+            self._dual = operator.iadd(operator.imul(self._dual, other._real), term)
+            self._real = self._real * other._real
+        elif isinstance(other, _SCALARS):
+            self._dual = operator.imul(self._dual, other)
+            self._real = self._real * other
+        else:
+            return NotImplemented
+        return self
+
+    def __itruediv__(self, other):
+        if isinstance(other, DualNumber):
+            # d(a/b) = (da - q db)/b with q = a/b, as in DualNumber.__truediv__
+            q = self._real / other._real
+            self._dual = operator.itruediv(operator.isub(self._dual, q * other._dual), other._real)
+            self._real = q
+        elif isinstance(other, _SCALARS):
+            self._dual = operator.itruediv(self._dual, other)
+            self._real = self._real / other
+        else:
+            return NotImplemented
+        return self
+
+def accumulator(start):
+    """
+    Return a running total that starts at start, for sums and products built up in a loop of a function
+    that runs on floats as well as on DualNumbers: an Accumulator with a copy of the value of a DualNumber,
+    and start itself otherwise, where += and the other in-place operators rebind as usual.
+
+    Input Arguments:
+    =================
+    start: a DualNumber, an int/float or any other variable type (ReverseNode, ...)
+
+    Return Arguments:
+    =================
+    an Accumulator for a DualNumber start, start otherwise
+
+    Examples
+    =================
+    def loss(*w):
+        total = accumulator(w[0] ** 2)
+        for w_i in w[1:]:
+            total += w_i ** 2
+        return total
+    """
+    if isinstance(start, DualNumber):
+        return Accumulator(start)
+    return start
+
+def _owned(dual):
+    """A private float64 copy of a tangent np.array, other dual parts are immutable and shared as they are.
+    The in-place operators of an Accumulator then write into its np.array (operator.iadd, ... update an
+    np.array in place and return a new object for floats and DualNumbers)."""
+    return np.array(dual, dtype=np.float64) if isinstance(dual, np.ndarray) else dual
+
+def fsum(terms):
+    """
+    Sum an iterable of numbers and DualNumbers without building a DualNumber per partial sum.
+    The real parts are added with math.fsum, i.e. exactly rounded, the tangent arrays are added into
+    one buffer. Terms that are neither (nested DualNumbers, ReverseNodes, ...) are added with +.
+
+    Input Arguments:
+    =================
+    terms: an iterable of int/float and DualNumbers
+
+    Return Arguments:
+    =================
+    a DualNumber, or a float if no term is a DualNumber
+
+    Examples
+    =================
+    str(fsum([DualNumber(0.1, 1.0)] * 10))  # 1.0 + 10.0 eps
+    fsum([0.1] * 10)                         # 1.0
+    """
+    reals, scalar_duals, array_duals, others = [], [], [], []
+    for term in terms:
+        if isinstance(term, DualNumber) and isinstance(term._real, _SCALARS):
+            if isinstance(term._dual, _SCALARS):
+                scalar_duals.append(term._dual)
+            elif isinstance(term._dual, np.ndarray):
+                array_duals.append(term._dual)
+            else:
+                others.append(term)
+                continue
+            reals.append(term._real)
+        elif isinstance(term, (int, float, np.number)) and not isinstance(term, np.complexfloating):
+            reals.append(term)
+        else:
+            others.append(term)
+    total = math.fsum(reals)
+    if array_duals:
+        dual = np.array(array_duals[0], dtype=np.float64)
+        for d in array_duals[1:]:
+            dual += d
+        if scalar_duals:
+            dual += math.fsum(scalar_duals)
+        total = _make(total, dual)
+    elif scalar_duals:
+        total = _make(total, math.fsum(scalar_duals))
+    for term in others:
+        total = total + term
+    return total
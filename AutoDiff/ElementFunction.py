@@ -1,7 +1,257 @@
+import math
 import numpy as np
-from .DualNumber import DualNumber
+from operator import methodcaller
+from .DualNumber import DualNumber, _Validation, Accumulator, accumulator, fsum
+from .ReverseNode import ReverseNode
+from .DualArray import DualArray
+from .TaylorNumber import TaylorNumber
+from .Trace import TraceNode
 # import pdb
 
+# variable types an elementary function differentiates through: each of them implements
+# _chain(real, derivative), which builds f(z) from f(z.real) and f'(z.real) by the chain rule.
+# z.real is a scalar for DualNumber/ReverseNode and an array for DualArray, so the rules below
+# are written to work on both, and a DualArray goes through them in one vectorized call.
+# A TaylorNumber needs all derivatives of f, not only f', so it is dispatched to its own recurrences,
+# and a TraceNode records the call on its trace; both implement f as a method of the same name.
+_METHOD_TYPES = (TaylorNumber, TraceNode)
+_DUAL_TYPES = (DualNumber, ReverseNode, DualArray)
+
+def _any(mask):
+    """Reduce a domain check on z.real, which is a bool for scalars and a bool array for DualArray."""
+    return mask.any() if isinstance(mask, np.ndarray) else mask
+
+def _non_positive(x):
+    """Domain check of log/sqrt, True where x is out of the domain."""
+    return x <= 0
+
+def _tan_pole(x):
+    """Domain check of tan, True where x is a pole pi/2 + n*pi."""
+    return x % np.pi == np.pi/2
+
+
+# BEGIN RULES ---------------------------------------------------------
+# f -> (f, f') of the elementary functions, f'(x, y) gets y = f(x) so that it can reuse the value.
+# _MATH_RULES work on python floats and are much cheaper than NumPy calls on a single float,
+# _NUMPY_RULES work on np.arrays, on NumPy scalars and on nested DualNumbers (via their NumPy methods).
+_MATH_RULES = {
+    "sin": (math.sin, lambda x, y: math.cos(x)),
+    "cos": (math.cos, lambda x, y: -math.sin(x)),
+    "tan": (math.tan, lambda x, y: 1 / math.cos(x) ** 2),
+    "arcsin": (math.asin, lambda x, y: 1 / math.sqrt(1 - x ** 2)),
+    "arccos": (math.acos, lambda x, y: -1 / math.sqrt(1 - x ** 2)),
+    "arctan": (math.atan, lambda x, y: 1 / (1 + x ** 2)),
+    "exp": (math.exp, lambda x, y: y),
+    "log": (math.log, lambda x, y: 1 / x),
+    "log10": (math.log10, lambda x, y: 1 / (x * math.log(10))),
+    "sqrt": (math.sqrt, lambda x, y: 0.5 / y),
+    "sinh": (math.sinh, lambda x, y: math.cosh(x)),
+    "cosh": (math.cosh, lambda x, y: math.sinh(x)),
+    "tanh": (math.tanh, lambda x, y: 1 - y * y),
+    "logistic": (lambda x: 1 / (1 + math.exp(-x)), lambda x, y: y * (1 - y)),
+}
+_NUMPY_RULES = {
+    "sin": (np.sin, lambda x, y: np.cos(x)),
+    "cos": (np.cos, lambda x, y: -np.sin(x)),
+    "tan": (np.tan, lambda x, y: 1 / np.cos(x) ** 2),
+    "arcsin": (np.arcsin, lambda x, y: 1 / np.sqrt(1 - x ** 2)),
+    "arccos": (np.arccos, lambda x, y: -1 / np.sqrt(1 - x ** 2)),
+    "arctan": (np.arctan, lambda x, y: 1 / (1 + x ** 2)),
+    "exp": (np.exp, lambda x, y: y),
+    "log": (np.log, lambda x, y: 1 / x),
+    "log10": (np.log10, lambda x, y: 1 / (x * np.log(10))),
+    "sqrt": (np.sqrt, lambda x, y: 0.5 / y),
+    "sinh": (np.sinh, lambda x, y: np.cosh(x)),
+    "cosh": (np.cosh, lambda x, y: np.sinh(x)),
+    "tanh": (np.tanh, lambda x, y: 1 - y * y),
+    "logistic": (lambda x: 1 / (1 + np.exp(-x)), lambda x, y: y * (1 - y)),
+}
+# f -> (check returning True where x is outside the domain of f, the reason used in the ValueError)
+_DOMAINS = {
+    "tan": (_tan_pole, "pi/2 + n*pi"),
+    "log": (_non_positive, "non-positive"),
+    "log10": (_non_positive, "non-positive"),
+    "sqrt": (_non_positive, "non-positive"),
+}
+# END RULES -----------------------------------------------------------
+
+
+class _Rule:
+    """An elementary function f with everything the handlers below need to apply it to one input kind.
+
+    method: callable applying f to a variable of _METHOD_TYPES, e.g. methodcaller("sin")
+    scalar: (f, f') on python floats, from _MATH_RULES
+    vector: (f, f') on np.arrays, from _NUMPY_RULES
+    invalid: None, or a function returning True (a bool mask for arrays) where x is outside the domain of f
+    reason: what is wrong with an input outside the domain, used in the ValueError message
+    array: return a np.array instead of a list for a list input
+    """
+    __slots__ = ("method", "scalar", "vector", "invalid", "reason", "array")
+
+    def __init__(self, method, scalar, vector, invalid=None, reason=None, array=False):
+        self.method = method
+        self.scalar = scalar
+        self.vector = vector
+        self.invalid = invalid
+        self.reason = reason
+        self.array = array
+
+    @classmethod
+    def named(cls, name, array=False):
+        """Build the rule of the elementary function name from the tables above."""
+        return cls(methodcaller(name), _MATH_RULES[name], _NUMPY_RULES[name], *_DOMAINS.get(name, (None, None)), array)
+
+    def check(self, x, message):
+        """Raise ValueError(message) if any of x is outside the domain, never inside unchecked()."""
+        if self.invalid is not None and _Validation.checked and _any(self.invalid(x)):
+            raise ValueError(message.format(self.reason))
+
+    def pair(self, x):
+        """Return f(x), f'(x) for a float or np.array x.
+        The math backend takes python floats, and falls back to NumPy where math raises instead of
+        returning inf or nan (e.g. exp(1000.0), arcsin(2.0)), so both backends give the same results."""
+        if isinstance(x, (int, float)):
+            f, df = self.scalar
+            try:
+                y = f(x)
+                return y, df(x, y)
+            except (ValueError, ArithmeticError):
+                pass
+        f, df = self.vector
+        y = f(x)
+        return y, df(x, y)
+
+
+# BEGIN HANDLERS ------------------------------------------------------
+# how an elementary function is applied to each input type, see _elementwise()
+# the scalar handlers look at the switch themselves, so that unchecked() saves the call of check() too
+def _on_number(z, rule):
+    if _Validation.checked:
+        rule.check(z, "The function input is {}")
+    if isinstance(z, (int, float)):
+        try:
+            return rule.scalar[0](z)
+        except (ValueError, ArithmeticError):
+            pass
+    return rule.vector[0](z)
+
+def _on_method(z, rule):
+    return rule.method(z)
+
+def _on_dual(z, rule):
+    x = z._real
+    if _Validation.checked:
+        rule.check(x, "The function input is a Dual Number whose real part is {}")
+    return z._chain(*rule.pair(x))
+
+def _on_array(z, rule):
+    if not np.issubdtype(z.dtype, np.number):
+        # e.g. an object array of DualNumbers, of any shape
+        return np.array(_on_list(z.ravel(), rule)).reshape(z.shape)
+    x = z.astype(np.float64)
+    rule.check(x, "The function input vector contains a number that is {}")
+    return rule.vector[0](x)
+
+def _on_list(z, rule):
+    """A list of numbers only converts to a numeric 1D array in C and needs a single ufunc call.
+    Any other list is partitioned once into its numbers, its DualNumbers/ReverseNodes with float
+    real parts and the other variables: the numbers need one call of f, the dual numbers one call of
+    f and f' on their real parts, and the domain check is a mask test on each part. The other
+    variables (nested DualNumbers, DualArrays, TaylorNumbers, TraceNodes) are handled one by one."""
+    if isinstance(z, list):
+        x = np.asarray(z)
+        if x.ndim == 1 and x.dtype.kind in "iuf":
+            fz = _on_array(x, rule)
+            return fz if rule.array else list(fz)
+    numbers, duals, others = [], [], []
+    for i, z_i in enumerate(z):
+        handler = _handler(z_i)
+        if handler is _on_number:
+            numbers.append(i)
+        elif handler is _on_dual and isinstance(z_i._real, (int, float)) and not isinstance(z_i, DualArray):
+            duals.append(i)
+        elif handler in (_on_dual, _on_method):
+            others.append(i)
+        else:
+            raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
+    fz = [None] * len(z)
+    if numbers:
+        x = np.array([z[i] for i in numbers], dtype=np.float64)
+        rule.check(x, "The function input vector contains a number that is {}")
+        for i, fx in zip(numbers, rule.vector[0](x)):
+            fz[i] = fx
+    if duals:
+        x = np.array([z[i]._real for i in duals], dtype=np.float64)
+        rule.check(x, "The function input vector contains Dual Number whose real part is {}")
+        fx, dfx = rule.pair(x)
+        # tolist() hands python floats to _chain, which keeps nested dual parts away from np.float64
+        for i, fx_i, dfx_i in zip(duals, fx.tolist(), dfx.tolist()):
+            fz[i] = z[i]._chain(fx_i, dfx_i)
+    for i in others:
+        fz[i] = _handler(z[i])(z[i], rule)
+    if rule.array:
+        return np.array(fz)
+    return fz
+
+# input type -> handler, subclasses and NumPy scalar types are added on their first use by _handler()
+_HANDLERS = {
+    float: _on_number,
+    int: _on_number,
+    np.number: _on_number,
+    DualNumber: _on_dual,
+    ReverseNode: _on_dual,
+    DualArray: _on_dual,
+    TaylorNumber: _on_method,
+    TraceNode: _on_method,
+    list: _on_list,
+    np.ndarray: _on_array,
+}
+
+def _handler(z):
+    """Return the handler of the type of z from _HANDLERS, None if z is not a valid input."""
+    handler = _HANDLERS.get(type(z))
+    if handler is None:
+        for cls, cls_handler in list(_HANDLERS.items()):
+            if isinstance(z, cls):
+                handler = _HANDLERS[type(z)] = cls_handler
+                break
+    return handler
+# END HANDLERS --------------------------------------------------------
+
+
+def _elementwise(z, rule):
+    """Apply an elementary function to a scalar, a DualNumber-like variable, or a list/np.array of them.
+
+    Input Arguments:
+    =================
+    z: int/float/np.number, a variable of _METHOD_TYPES or _DUAL_TYPES, or a list/np.array of them
+    rule: the _Rule of the elementary function
+
+    Return Arguments:
+    =================
+    f(z) of the same kind as z: a float, a variable, a list, or a np.array of the same shape as z
+    """
+    handler = _handler(z)
+    if handler is None:
+        raise TypeError("The function input is neither a scalar nor DualNumber")
+    return handler(z, rule)
+
+_SIN = _Rule.named("sin")
+_ARCSIN = _Rule.named("arcsin")
+_COS = _Rule.named("cos")
+_ARCCOS = _Rule.named("arccos")
+_TAN = _Rule.named("tan")
+_ARCTAN = _Rule.named("arctan")
+_EXP = _Rule.named("exp")
+# log and tanh have always returned a np.array for a list input
+_LOG = _Rule.named("log", array=True)
+_SQRT = _Rule.named("sqrt")
+_LOG10 = _Rule.named("log10")
+_SINH = _Rule.named("sinh")
+_COSH = _Rule.named("cosh")
+_TANH = _Rule.named("tanh", array=True)
+_LOGISTIC = _Rule.named("logistic")
+
 def sin(z):
     """
     Function to calculate sin of an int/float/Dual Number. If input is a list, calculate the sin of each element. 
@@ -19,24 +269,8 @@ def sin(z):
     x1 = sin(DualNumber(3,2)) 
     sin(x1) # sin(3) + cos(3) * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.sin(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.sin(z_i.real), np.cos(z_i.real) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.sin(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.sin(z.real), np.cos(z.real) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-            
+    return _elementwise(z, _SIN)
+
 def arcsin(z):
     """
     Function to calculate arcsin of an int/float/Dual Number. If input is a list, calculate the arcsin of each element. 
@@ -54,23 +288,7 @@ def arcsin(z):
     x1 = arcsin(DualNumber(3,2)) 
     arcsin(x1) # arcsin(3) + 1/sqrt(1-9) * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.arcsin(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.arcsin(z_i.real), 1/np.sqrt(1 - z_i.real**2) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.arcsin(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.arcsin(z.real), 1/np.sqrt(1 - z.real**2) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _ARCSIN)
 
 def cos(z):
     """
@@ -89,24 +307,8 @@ def cos(z):
     x1 = cos(DualNumber(3,2)) 
     cos(x1) # cos(3) - sin(3) * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.cos(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.cos(z_i.real), -np.sin(z_i.real) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.cos(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.cos(z.real), -np.sin(z.real) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-            
+    return _elementwise(z, _COS)
+
 def arccos(z):
     """
     Function to calculate arccos of an int/float/Dual Number. If input is a list, calculate the arccos of each element. 
@@ -124,24 +326,7 @@ def arccos(z):
     x1 = arccos(DualNumber(3,2)) 
     arccos(x1) # arccos(3) - 1/sqrt(1-9) * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.arccos(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.arccos(z_i.real), -1/np.sqrt(1 - z_i.real**2) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.arccos(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.arccos(z.real), -1/np.sqrt(1 - z.real**2) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-
+    return _elementwise(z, _ARCCOS)
 
 def tan(z):
     """
@@ -160,36 +345,7 @@ def tan(z):
     x1 = tan(DualNumber(3,2)) 
     tan(x1) # tan(3) + 1/cos(3)^2 * 2 eps
     """
-    ### add ValueError for tan(np.pi/2)
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                if z_i%(np.pi) == np.pi/2:
-                    raise ValueError("The input for tan() cannot be pi/2 + n*pi")
-                else:
-                    fz.append(np.tan(z_i))
-            elif isinstance(z_i, DualNumber):
-                if z_i.real%(np.pi) == np.pi/2:
-                    raise ValueError("The input for tan() cannot be pi/2 + n*pi")
-                else:
-                    fz.append(DualNumber(np.tan(z_i.real), z_i.dual / np.cos(z_i.real) ** 2))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            if z%(np.pi) == np.pi/2:
-                raise ValueError("The input for tan() cannot be pi/2 + n*pi")
-            else:
-                return np.tan(z)
-        elif isinstance(z, DualNumber):
-            if z.real%(np.pi) == np.pi/2:
-                raise ValueError("The input for tan() cannot be pi/2 + n*pi")
-            else:
-                return DualNumber(np.tan(z.real), z.dual / np.cos(z.real) ** 2)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _TAN)
 
 def arctan(z):
     """
@@ -208,24 +364,8 @@ def arctan(z):
     x1 = arcsin(DualNumber(3,2)) 
     arctan(x1) # arctan(3) + 1/10 * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.arctan(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.arctan(z_i.real), z_i.dual/(1+z_i.real**2)))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.arctan(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.arctan(z.real), z.dual/(1+z.real**2))
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-            
+    return _elementwise(z, _ARCTAN)
+
 def exp(z):
     """
     Function to calculate exponential of an int/float/Dual Number. If input is a list, calculate the exponential of each element. 
@@ -243,23 +383,7 @@ def exp(z):
     x1 = exp(DualNumber(3,2)) 
     exp(x1) # exp(3) + exp(3) * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.exp(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.exp(z_i.real), np.exp(z_i.real) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.exp(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.exp(z.real), np.exp(z.real) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _EXP)
 
 def log(z):
     """
@@ -278,40 +402,7 @@ def log(z):
     x1 = log(DualNumber(3,2)) 
     log(x1) # log(3) + 1/3 * 2 eps
     """
-    if isinstance(z, (list, np.ndarray)):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, DualNumber):
-                ## float.real exists, but float.dual does not
-                if z_i.real <= 0:
-                    raise ValueError("The function input vector contains Dual Number whose real part is non-positive")
-                else:
-                    fz.append(DualNumber(np.log(z_i.real), z_i.dual / z_i.real))
-                    #if isinstance(z_i, (int, float)):
-                    #    fz.append(np.log(z_i))
-            elif isinstance(z_i,(int, float, np.number)):
-                if z_i <= 0:
-                    raise ValueError('The function input vector contains a non-positive number')
-                else:
-                    fz.append(np.log(z_i))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        # if isinstance(z, np.ndarray):
-        #     return np.array(fz)
-        return np.array(fz)
-    else:
-        if isinstance(z, DualNumber):
-            if z.real <= 0:
-                raise ValueError("The function input is a Dual Number whose real part is non-positive")
-            else:
-                return DualNumber(np.log(z.real), z.dual / z.real)
-        elif isinstance(z, (int,float)):
-                if z <= 0:
-                    raise ValueError('The function input is non-positive')
-                else:
-                    return np.log(z)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _LOG)
 
 #David's Version
 # def log(z):
@@ -399,42 +490,7 @@ def sqrt(z):
     x1 = sqrt(DualNumber(3,2)) 
     sqrt(x1) # sqrt(3) + 1/2 * 3^(-1/2) * 2 eps = sqrt(3) + 1/sqrt(3) eps
     """
- #   if not isinstance(z, (int, float, DualNumber)):
-  #      raise TypeError("The function input is neither a scalar nor DualNumber")
-   # return DualNumber(z.real ** 0.5, 0.5 * z.real ** (-0.5) * z.dual)
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, DualNumber):
-                ## float.real exists, but float.dual does not
-                if z_i.real <= 0:
-                    raise ValueError("The function input vector contains Dual Number whose real part is non-positive")
-                else:
-                    fz.append(DualNumber(z_i.real ** 0.5, 0.5 * z_i.real ** (-0.5) * z_i.dual))
-                    #if isinstance(z_i, (int, float)):
-                    #    fz.append(np.log(z_i))
-            elif isinstance(z_i,(int,float)):
-                if z_i <= 0:
-                    raise ValueError('The function input vector contains a non-positive number')
-                else:
-                    fz.append(np.sqrt(z_i))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, DualNumber):
-            if z.real <= 0:
-                raise ValueError("The function input is a Dual Number whose real part is non-positive")
-            else:
-                return DualNumber(z.real ** 0.5, 0.5 * z.real ** (-0.5) * z.dual)
-        elif isinstance(z, (int,float)):
-                if z <= 0:
-                    raise ValueError('The function input is non-positive')
-                else:
-                    return np.sqrt(z)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-
+    return _elementwise(z, _SQRT)
 
 def logBase(b,z):
     """
@@ -454,38 +510,12 @@ def logBase(b,z):
     logBase(x1) # log2(3) + 1/(3 * log(2)) * 2 eps
     """
     assert b > 0 and isinstance(b,(int,float))
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, DualNumber):
-                ## float.real exists, but float.dual does not
-                if z_i.real <= 0:
-                    raise ValueError("The function input vector contains Dual Number whose real part is non-positive")
-                else:
-                    fz.append(DualNumber(np.log(z_i.real)/np.log(b), z_i.dual / (z_i.real* np.log(b))))
-                    #if isinstance(z_i, (int, float)):
-                    #    fz.append(np.log(z_i))
-            elif isinstance(z_i,(int,float)):
-                if z_i <= 0:
-                    raise ValueError('The function input vector contains a non-positive number')
-                else:
-                    fz.append(np.log(z_i.real)/np.log(b))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, DualNumber):
-            if z.real <= 0:
-                raise ValueError("The function input is a Dual Number whose real part is non-positive")
-            else:
-                return DualNumber(np.log(z.real)/np.log(b), z.dual / (z.real* np.log(b)))
-        elif isinstance(z, (int,float)):
-                if z <= 0:
-                    raise ValueError('The function input is non-positive')
-                else:
-                    return np.log(z.real)/np.log(b)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    log_b = math.log(b)
+    rule = _Rule(lambda z: z.log() / log_b,
+                 (lambda x: math.log(x) / log_b, lambda x, y: 1 / (x * log_b)),
+                 (lambda x: np.log(x) / log_b, lambda x, y: 1 / (x * log_b)),
+                 *_DOMAINS["log"])
+    return _elementwise(z, rule)
 
 def log10(z):
     """
@@ -504,40 +534,8 @@ def log10(z):
     x1 = log10(DualNumber(3,2)) 
     log10(x1) # log10(3) + 1/(3 * ln(3)) eps
     """
+    return _elementwise(z, _LOG10)
 
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, DualNumber):
-                ## float.real exists, but float.dual does not
-                if z_i.real <= 0:
-                    raise ValueError("The function input vector contains Dual Number whose real part is non-positive")
-                else:
-                    fz.append(DualNumber(np.log(z_i.real)/np.log(10), z_i.dual / (z_i.real* np.log(10))))
-                    #if isinstance(z_i, (int, float)):
-                    #    fz.append(np.log(z_i))
-            elif isinstance(z_i,(int,float)):
-                if z_i <= 0:
-                    raise ValueError('The function input vector contains a non-positive number')
-                else:
-                    fz.append(np.log(z_i.real)/np.log(10))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, DualNumber):
-            if z.real <= 0:
-                raise ValueError("The function input is a Dual Number whose real part is non-positive")
-            else:
-                return DualNumber(np.log(z.real)/np.log(10), z.dual / (z.real* np.log(10)))
-        elif isinstance(z, (int,float)):
-                if z <= 0:
-                    raise ValueError('The function input is non-positive')
-                else:
-                    return np.log(z.real)/np.log(10)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-            
 def sinh(z):
     """
     Function to calculate sinh of an int/float/Dual Number. If input is a list, calculate the sinh of each element. 
@@ -555,24 +553,7 @@ def sinh(z):
     x1 = sinh(DualNumber(3,2)) 
     sinh(x1) # sinh(3) + cosh(3) * 2 eps
     """
-
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.sinh(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.sinh(z_i.real), np.cosh(z_i.real) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.sinh(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.sinh(z.real), np.cosh(z.real) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _SINH)
 
 def cosh(z):
     """
@@ -591,25 +572,7 @@ def cosh(z):
     x1 = cosh(DualNumber(3,2)) 
     cosh(x1) # cosh(3) + sinh(3) * 2 eps
     """
-
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(np.cosh(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.cosh(z_i.real), np.sinh(z_i.real) * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return np.cosh(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.cosh(z.real), np.sinh(z.real) * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
-
+    return _elementwise(z, _COSH)
 
 def tanh(z):
     """
@@ -628,25 +591,7 @@ def tanh(z):
     x1 = tanh(DualNumber(3,2)) 
     tanh(x1) # tanh(3) + (cosh(3)^2 - sinh(3)^2)/cosh(3)^2 * 2 eps
     """
-    if isinstance(z, (list, np.ndarray)):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float, np.number)):
-                fz.append(np.tanh(z_i))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(np.tanh(z_i.real), (np.cosh(z_i.real)**2 - np.sinh(z_i.real)**2)/ np.cosh(z_i.real)**2 * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        # if isinstance(z, np.ndarray):
-        #     return np.array(fz)
-        return np.array(fz)
-    else:
-        if isinstance(z, (int, float)):
-            return np.tanh(z)
-        elif isinstance(z, DualNumber):
-            return DualNumber(np.tanh(z.real), (np.cosh(z.real)**2 - np.sinh(z.real)**2)/np.cosh(z.real)**2 * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _TANH)
 
 def logistic(z):
     """
@@ -665,20 +610,5 @@ def logistic(z):
     x1 = logistic(DualNumber(3,2)) 
     logistic(x1) # 1/(1+exp(-3)) + exp(-3)/(1+exp(-3))**2 * 2 eps
     """
-    if isinstance(z, list):
-        fz = []
-        for z_i in z:
-            if isinstance(z_i, (int, float)):
-                fz.append(1/(1+np.exp(-z_i)))
-            elif isinstance(z_i, DualNumber):
-                fz.append(DualNumber(1/(1+np.exp(-z_i.real)), np.exp(-z_i.real)/(1+np.exp(-z_i.real))**2 * z_i.dual))
-            else:
-                raise TypeError("The function input vector contains a non-scalar or non-DualNumber value")
-        return fz
-    else:
-        if isinstance(z, (int, float)):
-            return 1/(1+np.exp(-z))
-        elif isinstance(z, DualNumber):
-            return DualNumber(1/(1+np.exp(-z.real)), np.exp(-z.real)/(1+np.exp(-z.real))**2 * z.dual)
-        else:
-            raise TypeError("The function input is neither a scalar nor DualNumber")
+    return _elementwise(z, _LOGISTIC)
+
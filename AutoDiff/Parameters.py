@@ -0,0 +1,174 @@
+# Parameters holds nested containers of weights (dicts, lists and tuples of np.arrays and scalars)
+# in one contiguous float64 buffer. Every leaf of the nested structure is a view into that buffer,
+# so an update of the flat buffer is an update of every weight matrix, and vice versa, without copies.
+# The same layout laid over another flat array (a gradient, a DualArray of seeds, ...) gives that array
+# in the nested structure, again as views.
+import numpy as np
+
+
+def _layout(tree, offset):
+    """Return the layout of a nested structure, with (offset, shape) in place of each leaf, and the next offset."""
+    if isinstance(tree, dict):
+        layout = {}
+        for key, value in tree.items():
+            layout[key], offset = _layout(value, offset)
+        return layout, offset
+    if isinstance(tree, (list, tuple)):
+        layout = []
+        for value in tree:
+            entry, offset = _layout(value, offset)
+            layout.append(entry)
+        return (tuple(layout) if isinstance(tree, tuple) else layout), offset
+    if isinstance(tree, (int, float, np.number)) and not isinstance(tree, bool):
+        return _Leaf(offset, ()), offset + 1
+    if isinstance(tree, np.ndarray) and np.issubdtype(tree.dtype, np.number):
+        return _Leaf(offset, tree.shape), offset + tree.size
+    raise TypeError("Parameters should be nested dicts, lists or tuples of np.arrays of numbers and scalars.")
+
+
+def _view(layout, flat):
+    """Lay a layout over the flat array flat, the leaves are views into flat."""
+    if isinstance(layout, _Leaf):
+        return flat[layout.offset:layout.offset + layout.size].reshape(layout.shape)
+    if isinstance(layout, dict):
+        return {key: _view(value, flat) for key, value in layout.items()}
+    views = [_view(value, flat) for value in layout]
+    return tuple(views) if isinstance(layout, tuple) else views
+
+
+def _fill(layout, tree, flat):
+    """Copy the leaves of tree into their places in flat."""
+    if isinstance(layout, _Leaf):
+        flat[layout.offset:layout.offset + layout.size] = np.ravel(tree)
+    elif isinstance(layout, dict):
+        for key, value in layout.items():
+            _fill(value, tree[key], flat)
+    else:
+        for value, subtree in zip(layout, tree):
+            _fill(value, subtree, flat)
+
+
+class _Leaf:
+    """Position of one leaf in the flat buffer."""
+    __slots__ = ("offset", "shape", "size")
+
+    def __init__(self, offset, shape):
+        self.offset, self.shape = offset, tuple(shape)
+        self.size = int(np.prod(self.shape, dtype=int))
+
+
+class Parameters:
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, tree):
+        """Constructor for the Parameters class.
+
+        Input Arguments:
+        =================
+        tree: nested dicts, lists and tuples whose leaves are np.arrays of numbers or scalars,
+        the values are copied once into the flat buffer
+
+        Return Arguments:
+        =================
+        self: Object of the Parameters class
+
+        Examples
+        =================
+        p = Parameters({"W": np.zeros((3, 2)), "b": np.zeros(3)})
+        p.flat.shape                   # (9,)
+        p["W"][0, 0] = 1.0; p.flat[0]  # 1.0, p["W"] is a view into p.flat
+        p = Parameters([np.eye(2), 0.5])
+        """
+        layout, size = _layout(tree, 0)
+        if size == 0:
+            raise ValueError("Parameters should hold at least one number.")
+        flat = np.empty(size, dtype=np.float64)
+        _fill(layout, tree, flat)
+        self._layout, self._flat, self._tree = layout, flat, _view(layout, flat)
+
+    @classmethod
+    def _new(cls, layout, flat):
+        """Internal constructor of a layout laid over flat, no copy and no validation."""
+        self = cls.__new__(cls)
+        self._layout, self._flat, self._tree = layout, flat, _view(layout, flat)
+        return self
+
+    # BEGIN GETTER ---------------------------------------------------------
+    @property
+    def flat(self):
+        """The flat buffer that holds every parameter.
+
+        Example
+        =================
+        Parameters({"a": np.ones(2), "b": 3.0}).flat # array([1., 1., 3.])
+        """
+        return self._flat
+
+    @property
+    def tree(self):
+        """The nested structure of the parameters, with views into the flat buffer as leaves.
+
+        Example
+        =================
+        Parameters({"a": np.ones(2), "b": 3.0}).tree # {'a': array([1., 1.]), 'b': array(3.)}
+        """
+        return self._tree
+
+    @property
+    def size(self):
+        """Number of parameters, i.e. the length of the flat buffer."""
+        return len(self._flat)
+
+    def __getitem__(self, key):
+        return self._tree[key]
+
+    def __len__(self):
+        return len(self._tree)
+
+    # BEGIN LAYOUT ---------------------------------------------------------
+    def view(self, flat):
+        """Lay the nested structure over another flat array of the same length, without copies.
+
+        Input Arguments:
+        =================
+        flat: a 1D np.array (or DualArray) of length size
+
+        Return Arguments:
+        =================
+        the nested structure of the parameters, with views into flat as leaves
+
+        Example
+        =================
+        p = Parameters({"W": np.zeros((2, 2)), "b": 0.0})
+        p.view(np.arange(5.0))["W"]  # array([[0., 1.], [2., 3.]])
+        """
+        if len(flat) != len(self._flat):
+            raise ValueError("The flat array does not have the length of the parameters.")
+        return _view(self._layout, flat)
+
+    def like(self, flat):
+        """Return Parameters with this layout over flat (a 1D float64 np.array of length size), without copies.
+
+        Example
+        =================
+        g = p.like(gradient_row)  # g["W"] is a view into gradient_row
+        """
+        if not isinstance(flat, np.ndarray) or flat.shape != self._flat.shape or flat.dtype != np.float64:
+            raise ValueError("The flat array should be a 1D float64 np.array of the length of the parameters.")
+        return Parameters._new(self._layout, flat)
+
+    def copy(self):
+        """Return Parameters with the same layout over a copy of the flat buffer."""
+        return Parameters._new(self._layout, self._flat.copy())
+
+    # BEGIN STR ----------------------------------------------------
+    def __repr__(self):
+        """Returns a user-readable string output for Parameters.
+
+        Example
+        =================
+        repr(Parameters({"b": 1.0})) # Parameters({'b': array(1.)})
+        """
+        return f"Parameters({self._tree!r})"
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,267 @@
+# ReverseNode is the variable type of the reverse mode (RAutoDiff).
+# Every arithmetic operation on a ReverseNode appends a new node to a tape (a plain list),
+# the new node remembers its parent nodes together with the local partial derivatives.
+# backward() then sweeps the tape once in reverse order to get the adjoints of all nodes.
+import numpy as np
+
+def check_operand(other):
+    """
+    Function to check that the operand of an arithmetic operation with a ReverseNode is an int/float and return it. A constant operand does not need a node on the tape.
+
+    Input Arguments:
+    =================
+    other: int/float
+
+    Return Arguments:
+    =================
+    other: int/float
+
+    Examples
+    =================
+    check_operand(4) # 4
+    check_operand("4") # TypeError
+    """
+    if isinstance(other, (int, float)):
+        return other
+    raise TypeError("The operand must be an int, a float or a ReverseNode.")
+
+
+class ReverseNode:
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, real, tape, parents=()):
+        """Constructor for the ReverseNode class. The new node is appended to the tape.
+
+        Input Arguments:
+        =================
+        real: int/float, the value of the node
+        tape: list, the tape recording the computational graph in evaluation order
+        parents: tuple of (ReverseNode, local partial derivative) pairs
+
+        Return Arguments:
+        =================
+        self: Object of the ReverseNode class
+
+        Examples
+        =================
+        tape = []
+        x = ReverseNode(2.0, tape)
+        y = ReverseNode(3.0, tape)
+        z = x * y # z.parents == ((x, 3.0), (y, 2.0))
+        """
+        if not isinstance(real, (int, float)):
+            raise TypeError("Value of ReverseNode must be an int or float.")
+        if not isinstance(tape, list):
+            raise TypeError("The tape of ReverseNode must be a list.")
+        self._real = real
+        self._tape = tape
+        self._parents = parents
+        self._index = len(tape)
+        tape.append(self)
+
+    # BEGIN GETTER ---------------------------------------------------------
+    @property
+    def real(self):
+        """Function to return the value of a ReverseNode.
+
+        Example
+        =================
+        ReverseNode(3.2, []).real # 3.2
+        """
+        return self._real
+
+    @property
+    def parents(self):
+        """Function to return the (parent node, local partial derivative) pairs of a ReverseNode.
+
+        Example
+        =================
+        ReverseNode(3.2, []).parents # ()
+        """
+        return self._parents
+
+    # BEGIN STR ----------------------------------------------------
+    def __str__(self):
+        """Returns a user-readable string output for a ReverseNode.
+
+        Example
+        =================
+        str(ReverseNode(3.2, [])) # ReverseNode(3.2)
+        """
+        return f"ReverseNode({self._real})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    # BEGIN CHAIN RULE ------------------------------------------------
+    def _chain(self, real, derivative):
+        """Record an elementary function f applied to self, given real = f(self.real) and derivative = f'(self.real).
+
+        Example
+        =================
+        x = ReverseNode(0.0, [])
+        y = x._chain(np.sin(0.0), np.cos(0.0)) # y.parents == ((x, 1.0),)
+        """
+        return ReverseNode(real, self._tape, ((self, derivative),))
+
+    # BEGIN NEG/POS -----------------------------------------------------
+    def __neg__(self):
+        """Returns the negation of a ReverseNode."""
+        return ReverseNode(-self._real, self._tape, ((self, -1.0),))
+
+    def __pos__(self):
+        """Returns the positive value of a ReverseNode."""
+        return ReverseNode(self._real, self._tape, ((self, 1.0),))
+
+    # BEGIN ADD -----------------------------------------------------
+    def __add__(self, other):
+        """Overload the addition operator for ReverseNode and ReverseNode/int/float.
+
+        Example
+        =================
+        tape = []
+        x = ReverseNode(3, tape)
+        z = x + 2 # z.real == 5, z.parents == ((x, 1.0),)
+        """
+        if isinstance(other, ReverseNode):
+            return ReverseNode(self._real + other._real, self._tape, ((self, 1.0), (other, 1.0)))
+        other = check_operand(other)
+        return ReverseNode(self._real + other, self._tape, ((self, 1.0),))
+
+    def __radd__(self, other):
+        """Perform same as __add__ but handle input reversal."""
+        return self.__add__(other)
+
+    # BEGIN SUB -----------------------------------------------------
+    def __sub__(self, other):
+        """Overload the subtraction operator for ReverseNode and ReverseNode/int/float."""
+        if isinstance(other, ReverseNode):
+            return ReverseNode(self._real - other._real, self._tape, ((self, 1.0), (other, -1.0)))
+        other = check_operand(other)
+        return ReverseNode(self._real - other, self._tape, ((self, 1.0),))
+
+    def __rsub__(self, other):
+        """Perform same as __sub__ but handle input reversal, i.e. other - self."""
+        other = check_operand(other)
+        return ReverseNode(other - self._real, self._tape, ((self, -1.0),))
+
+    # BEGIN MUL -----------------------------------------------------
+    def __mul__(self, other):
+        """Overload the multiplication operator for ReverseNode and ReverseNode/int/float."""
+        if isinstance(other, ReverseNode):
+            return ReverseNode(self._real * other._real, self._tape, ((self, other._real), (other, self._real)))
+        other = check_operand(other)
+        return ReverseNode(self._real * other, self._tape, ((self, other),))
+
+    def __rmul__(self, other):
+        """Perform same as __mul__ but handle input reversal."""
+        return self.__mul__(other)
+
+    # BEGIN TRUEDIV -----------------------------------------------------
+    def __truediv__(self, other):
+        """Overload the division operator for ReverseNode and ReverseNode/int/float."""
+        # d(a/b) = da/b - (q/b) db with q = a/b, b is never squared so a large b does not overflow
+        if isinstance(other, ReverseNode):
+            q = self._real / other._real
+            return ReverseNode(q, self._tape, ((self, 1 / other._real), (other, -q / other._real)))
+        other = check_operand(other)
+        return ReverseNode(self._real / other, self._tape, ((self, 1 / other),))
+
+    def __rtruediv__(self, other):
+        """Perform same as __truediv__ but handle input reversal, i.e. other / self."""
+        other = check_operand(other)
+        q = other / self._real
+        return ReverseNode(q, self._tape, ((self, -q / self._real),))
+
+    # BEGIN POW -----------------------------------------------------
+    # d(a**b) = b * a**(b-1) da + a**b * log(a) db, the db term is dropped for a constant exponent.
+    # a**(b-1) is taken as a**b / a away from a = 0, since a**(b-1) alone overflows for a large a
+    def __pow__(self, other):
+        """Overload the exponent operator for ReverseNode and ReverseNode/int/float."""
+        if isinstance(other, ReverseNode):
+            value = self._real ** other._real
+            return ReverseNode(value, self._tape,
+                               ((self, _power_slope(self._real, other._real, value)), (other, value * np.log(self._real))))
+        other = check_operand(other)
+        value = self._real ** other
+        return ReverseNode(value, self._tape, ((self, _power_slope(self._real, other, value)),))
+
+    def __rpow__(self, other):
+        """Perform same as __pow__ but handle input reversal, i.e. other ** self."""
+        other = check_operand(other)
+        value = other ** self._real
+        return ReverseNode(value, self._tape, ((self, value * np.log(other)),))
+
+    # BEGIN MOD -----------------------------------------------------
+    def __mod__(self, other):
+        """Overload the modulo operator for a scalar modulus, d(x mod c)/dx = 1 away from the jumps, like DualNumber."""
+        if isinstance(other, ReverseNode):
+            return NotImplemented
+        other = check_operand(other)
+        return ReverseNode(self._real % other, self._tape, ((self, 1.0),))
+
+    # BEGIN COMPARISON ---------------------------------------------------------------
+    # comparisons only look at the value, like DualNumber
+    def __eq__(self, other):
+        return self._real == getattr(other, "_real", other)
+
+    def __ne__(self, other):
+        return self._real != getattr(other, "_real", other)
+
+    def __lt__(self, other):
+        return self._real < getattr(other, "_real", other)
+
+    def __le__(self, other):
+        return self._real <= getattr(other, "_real", other)
+
+    def __gt__(self, other):
+        return self._real > getattr(other, "_real", other)
+
+    def __ge__(self, other):
+        return self._real >= getattr(other, "_real", other)
+
+
+def _power_slope(a, b, value):
+    """Return b * a**(b-1), the derivative of a**b in a, given value = a**b."""
+    if a == 0:
+        return b * a ** (b - 1)
+    return b * (value / a)
+
+
+def backward(output):
+    """
+    Sweep the tape of output once in reverse order and accumulate the adjoint d(output)/d(node) of every node.
+
+    Input Arguments:
+    =================
+    output: ReverseNode
+
+    Return Arguments:
+    =================
+    a list of adjoints, the i-th entry belongs to the node with index i on the tape,
+    it is None if output does not depend on that node
+
+    Examples
+    =================
+    tape = []
+    x = ReverseNode(2.0, tape)
+    y = ReverseNode(3.0, tape)
+    adjoints = backward(x * y + x)
+    adjoints[x._index], adjoints[y._index] # 4.0, 2.0
+    """
+    if not isinstance(output, ReverseNode):
+        raise TypeError("backward() needs a ReverseNode as the output.")
+    tape = output._tape
+    # None marks a node that output does not depend on
+    adjoints = [None] * len(tape)
+    adjoints[output._index] = 1.0
+    # nodes are recorded in evaluation order, so each node is finished before its parents are visited
+    for node in reversed(tape[:output._index + 1]):
+        adjoint = adjoints[node._index]
+        if adjoint is None:
+            continue
+        for parent, derivative in node._parents:
+            if adjoints[parent._index] is None:
+                adjoints[parent._index] = adjoint * derivative
+            else:
+                adjoints[parent._index] += adjoint * derivative
+    return adjoints
@@ -0,0 +1,389 @@
+# TaylorNumber is a truncated Taylor polynomial x(t) = c_0 + c_1 t + ... + c_K t^K.
+# Arithmetic and elementary functions map the coefficients of the inputs to the coefficients of the output,
+# so one evaluation of a function on TaylorNumbers gives all derivatives d^k/dt^k f(x + t v), k <= K.
+# Every rule below is an O(K^2) recurrence on the coefficients (no nesting of dual numbers, which costs 2^K).
+# Most rules come from an ODE satisfied by the elementary function, e.g. y = exp(x) gives y' = y x', i.e.
+#     k y_k = sum_{j=1}^{k} j x_j y_{k-j}
+import numpy as np
+from .DualNumber import _Validation
+
+def check_taylor_convert(other, order):
+    """
+    Function to convert an int/float to a constant TaylorNumber of the given order, or return a TaylorNumber of the same order.
+
+    Input Arguments:
+    =================
+    other: int/float or TaylorNumber
+    order: int, the truncation order the operand must have
+
+    Return Arguments:
+    =================
+    TaylorNumber
+
+    Examples
+    =================
+    check_taylor_convert(4, 2) # TaylorNumber([4., 0., 0.])
+    check_taylor_convert("4", 2) # TypeError
+    """
+    if isinstance(other, TaylorNumber):
+        if other.order != order:
+            raise ValueError("TaylorNumbers of different orders cannot be combined.")
+        return other
+    if isinstance(other, (int, float)):
+        coefficients = np.zeros(order + 1)
+        coefficients[0] = other
+        return TaylorNumber(coefficients)
+    raise TypeError("The operand must be an int, a float or a TaylorNumber.")
+
+
+def _integrate(x, y0, g, k):
+    """Return y_k of y = f(x) from the ODE y' = g x', given the coefficients of g up to k - 1."""
+    if k == 0:
+        return y0
+    j = np.arange(1, k + 1)
+    return np.dot(j * x[1:k + 1], g[k - 1::-1]) / k
+
+
+class TaylorNumber:
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, coefficients):
+        """Constructor for the TaylorNumber class.
+
+        Input Arguments:
+        =================
+        coefficients: list/np.array of int/float, the Taylor coefficients c_0, ..., c_K
+
+        Return Arguments:
+        =================
+        self: Object of the TaylorNumber class
+
+        Examples
+        =================
+        x = TaylorNumber([2.0, 1.0, 0.0]) # x(t) = 2 + t, truncated after t^2
+        y = x * x # y.coefficients == [4., 4., 1.]
+        """
+        if isinstance(coefficients, (list, tuple, np.ndarray)):
+            coefficients = np.asarray(coefficients)
+            if coefficients.ndim == 1 and coefficients.size > 0 and np.issubdtype(coefficients.dtype, np.number):
+                self._coefficients = coefficients.astype(float)
+                return
+        raise TypeError("Coefficients of TaylorNumber must be a non-empty 1D list/np.array of int/float.")
+
+    @classmethod
+    def variable(cls, real, direction, order):
+        """Return the TaylorNumber of x(t) = real + direction * t truncated after t^order.
+
+        Example
+        =================
+        TaylorNumber.variable(2.0, 1.0, 3) # TaylorNumber([2., 1., 0., 0.])
+        """
+        coefficients = np.zeros(order + 1)
+        coefficients[0] = real
+        if order > 0:
+            coefficients[1] = direction
+        return cls(coefficients)
+
+    # BEGIN GETTER ---------------------------------------------------------
+    @property
+    def coefficients(self):
+        """Function to return the Taylor coefficients of a TaylorNumber.
+
+        Example
+        =================
+        TaylorNumber([3.2, 1.0]).coefficients # array([3.2, 1. ])
+        """
+        return self._coefficients
+
+    @property
+    def real(self):
+        """Function to return the value c_0 of a TaylorNumber.
+
+        Example
+        =================
+        TaylorNumber([3.2, 1.0]).real # 3.2
+        """
+        return self._coefficients[0]
+
+    @property
+    def order(self):
+        """Function to return the truncation order K of a TaylorNumber.
+
+        Example
+        =================
+        TaylorNumber([3.2, 1.0]).order # 1
+        """
+        return self._coefficients.size - 1
+
+    def derivatives(self):
+        """Function to return the derivatives d^k/dt^k x(0) = k! c_k, k = 0, ..., K.
+
+        Example
+        =================
+        TaylorNumber([1.0, 1.0, 0.5]).derivatives() # array([1., 1., 1.])
+        """
+        factorials = np.cumprod(np.r_[1.0, np.arange(1, self.order + 1)])
+        return self._coefficients * factorials
+
+    # BEGIN STR ----------------------------------------------------
+    def __str__(self):
+        """Returns a user-readable string output for a TaylorNumber.
+
+        Example
+        =================
+        str(TaylorNumber([3.2, 1.0])) # TaylorNumber([3.2 1. ])
+        """
+        return f"TaylorNumber({self._coefficients})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    # BEGIN NEG/POS -----------------------------------------------------
+    def __neg__(self):
+        """Returns the negation of a TaylorNumber."""
+        return TaylorNumber(-self._coefficients)
+
+    def __pos__(self):
+        """Returns the positive value of a TaylorNumber."""
+        return TaylorNumber(self._coefficients.copy())
+
+    # BEGIN ADD -----------------------------------------------------
+    def __add__(self, other):
+        """Overload the addition operator for TaylorNumber and TaylorNumber/int/float.
+
+        Example
+        =================
+        TaylorNumber([1.0, 1.0]) + 2 # TaylorNumber([3. 1.])
+        """
+        other = check_taylor_convert(other, self.order)
+        return TaylorNumber(self._coefficients + other._coefficients)
+
+    def __radd__(self, other):
+        """Perform same as __add__ but handle input reversal."""
+        return self.__add__(other)
+
+    # BEGIN SUB -----------------------------------------------------
+    def __sub__(self, other):
+        """Overload the subtraction operator for TaylorNumber and TaylorNumber/int/float."""
+        other = check_taylor_convert(other, self.order)
+        return TaylorNumber(self._coefficients - other._coefficients)
+
+    def __rsub__(self, other):
+        """Perform same as __sub__ but handle input reversal, i.e. other - self."""
+        other = check_taylor_convert(other, self.order)
+        return TaylorNumber(other._coefficients - self._coefficients)
+
+    # BEGIN MUL -----------------------------------------------------
+    def __mul__(self, other):
+        """Overload the multiplication operator for TaylorNumber and TaylorNumber/int/float.
+        The coefficients of a product are the truncated convolution of the coefficients.
+
+        Example
+        =================
+        TaylorNumber([1.0, 1.0, 0.0]) * TaylorNumber([1.0, 1.0, 0.0]) # TaylorNumber([1. 2. 1.])
+        """
+        if isinstance(other, (int, float)):
+            return TaylorNumber(self._coefficients * other)
+        other = check_taylor_convert(other, self.order)
+        return TaylorNumber(np.convolve(self._coefficients, other._coefficients)[:self.order + 1])
+
+    def __rmul__(self, other):
+        """Perform same as __mul__ but handle input reversal."""
+        return self.__mul__(other)
+
+    # BEGIN TRUEDIV -----------------------------------------------------
+    # y = a / b solves y b = a, i.e. y_k = (a_k - sum_{j=1}^{k} b_j y_{k-j}) / b_0
+    def __truediv__(self, other):
+        """Overload the division operator for TaylorNumber and TaylorNumber/int/float."""
+        if isinstance(other, (int, float)):
+            if other == 0:
+                raise ZeroDivisionError("Division of a TaylorNumber by zero.")
+            return TaylorNumber(self._coefficients / other)
+        other = check_taylor_convert(other, self.order)
+        a, b = self._coefficients, other._coefficients
+        if b[0] == 0:
+            raise ZeroDivisionError("Division by a TaylorNumber whose value is zero.")
+        y = np.zeros_like(a)
+        for k in range(self.order + 1):
+            y[k] = (a[k] - np.dot(b[1:k + 1], y[k - 1::-1] if k else y[:0])) / b[0]
+        return TaylorNumber(y)
+
+    def __rtruediv__(self, other):
+        """Perform same as __truediv__ but handle input reversal, i.e. other / self."""
+        other = check_taylor_convert(other, self.order)
+        return other.__truediv__(self)
+
+    # BEGIN POW -----------------------------------------------------
+    # y = a**r satisfies a y' = r y a', i.e. y_k = sum_{j=1}^{k} (r j - (k - j)) a_j y_{k-j} / (k a_0).
+    # The recurrence needs a_0 != 0, so non-negative integer powers are built by repeated squaring instead.
+    def __pow__(self, other):
+        """Overload the exponent operator for TaylorNumber and TaylorNumber/int/float.
+
+        Example
+        =================
+        TaylorNumber([2.0, 1.0, 0.0]) ** 2 # TaylorNumber([4. 4. 1.])
+        """
+        if isinstance(other, TaylorNumber):
+            return (other * self.log()).exp()
+        if not isinstance(other, (int, float)):
+            raise TypeError("The exponent must be an int, a float or a TaylorNumber.")
+        if float(other).is_integer() and other >= 0:
+            n = int(other)
+            result = check_taylor_convert(1.0, self.order)
+            base = self
+            while n:
+                if n & 1:
+                    result = result * base
+                base = base * base
+                n >>= 1
+            return result
+        a = self._coefficients
+        if a[0] == 0:
+            raise ValueError("A TaylorNumber whose value is zero cannot be raised to a negative or fractional power.")
+        if a[0] < 0 and not float(other).is_integer():
+            raise ValueError("A TaylorNumber whose value is negative cannot be raised to a fractional power.")
+        y = np.zeros_like(a)
+        y[0] = a[0] ** other
+        for k in range(1, self.order + 1):
+            j = np.arange(1, k + 1)
+            y[k] = np.dot((other * j - (k - j)) * a[1:k + 1], y[k - 1::-1]) / (k * a[0])
+        return TaylorNumber(y)
+
+    def __rpow__(self, other):
+        """Perform same as __pow__ but handle input reversal, i.e. other ** self."""
+        if not isinstance(other, (int, float)):
+            raise TypeError("The base must be an int, a float or a TaylorNumber.")
+        if other <= 0:
+            raise ValueError("The base of a TaylorNumber exponent must be positive.")
+        return (self * np.log(other)).exp()
+
+    # BEGIN COMPARISON ---------------------------------------------------------------
+    # comparisons only look at the value, like DualNumber
+    def __eq__(self, other):
+        return self.real == getattr(other, "real", other)
+
+    def __ne__(self, other):
+        return self.real != getattr(other, "real", other)
+
+    def __lt__(self, other):
+        return self.real < getattr(other, "real", other)
+
+    def __le__(self, other):
+        return self.real <= getattr(other, "real", other)
+
+    def __gt__(self, other):
+        return self.real > getattr(other, "real", other)
+
+    def __ge__(self, other):
+        return self.real >= getattr(other, "real", other)
+
+    # BEGIN ELEMENTARY FUNCTIONS ------------------------------------------------------
+    # ElementFunction dispatches a TaylorNumber to these methods; the method names also let
+    # NumPy ufuncs (np.sin, np.exp, ...) work on TaylorNumbers and object arrays of them
+    def exp(self):
+        """y = exp(x) from y' = y x'."""
+        x = self._coefficients
+        y = np.zeros_like(x)
+        for k in range(self.order + 1):
+            y[k] = _integrate(x, np.exp(x[0]), y, k)
+        return TaylorNumber(y)
+
+    def log(self):
+        """y = log(x) from x y' = x', i.e. y_k = (x_k - sum_{j=1}^{k-1} j y_j x_{k-j} / k) / x_0."""
+        x = self._coefficients
+        if _Validation.checked and x[0] <= 0:
+            raise ValueError("The function input is a TaylorNumber whose value is non-positive")
+        y = np.zeros_like(x)
+        y[0] = np.log(x[0])
+        for k in range(1, self.order + 1):
+            j = np.arange(1, k)
+            y[k] = (x[k] - np.dot(j * y[1:k], x[k - 1:0:-1]) / k) / x[0]
+        return TaylorNumber(y)
+
+    def log10(self):
+        """y = log(x) / log(10)."""
+        return self.log() / np.log(10)
+
+    def sqrt(self):
+        """y = sqrt(x) from y y = x, i.e. y_k = (x_k - sum_{j=1}^{k-1} y_j y_{k-j}) / (2 y_0)."""
+        x = self._coefficients
+        if _Validation.checked and x[0] <= 0:
+            raise ValueError("The function input is a TaylorNumber whose value is non-positive")
+        y = np.zeros_like(x)
+        y[0] = np.sqrt(x[0])
+        for k in range(1, self.order + 1):
+            y[k] = (x[k] - np.dot(y[1:k], y[k - 1:0:-1])) / (2 * y[0])
+        return TaylorNumber(y)
+
+    def _sin_cos(self, sign):
+        """s = sin(x), c = cos(x) from s' = c x', c' = -s x' (sign = -1); sinh/cosh for sign = 1."""
+        x = self._coefficients
+        s, c = np.zeros_like(x), np.zeros_like(x)
+        if sign < 0:
+            s0, c0 = np.sin(x[0]), np.cos(x[0])
+        else:
+            s0, c0 = np.sinh(x[0]), np.cosh(x[0])
+        for k in range(self.order + 1):
+            s[k] = _integrate(x, s0, c, k)
+            c[k] = _integrate(x, c0, sign * s, k)
+        return TaylorNumber(s), TaylorNumber(c)
+
+    def sin(self):
+        return self._sin_cos(-1)[0]
+
+    def cos(self):
+        return self._sin_cos(-1)[1]
+
+    def sinh(self):
+        return self._sin_cos(1)[0]
+
+    def cosh(self):
+        return self._sin_cos(1)[1]
+
+    def _tan_tanh(self, sign):
+        """t = tan(x) from t' = (1 + t^2) x' (sign = 1); tanh from t' = (1 - t^2) x' (sign = -1)."""
+        x = self._coefficients
+        t, u = np.zeros_like(x), np.zeros_like(x)
+        t0 = np.tan(x[0]) if sign > 0 else np.tanh(x[0])
+        for k in range(self.order + 1):
+            t[k] = _integrate(x, t0, u, k)
+            # u = 1 + sign t^2 up to t^k, needed by t_{k+1}
+            u[k] = (k == 0) + sign * np.dot(t[:k + 1], t[k::-1])
+        return TaylorNumber(t)
+
+    def tan(self):
+        if _Validation.checked and self.real % np.pi == np.pi / 2:
+            raise ValueError("The input for tan() cannot be pi/2 + n*pi")
+        return self._tan_tanh(1)
+
+    def tanh(self):
+        return self._tan_tanh(-1)
+
+    def _inverse(self, y0, q):
+        """y with q y' = x' and y_0 = y0, i.e. y_k = (k x_k - sum_{j=1}^{k-1} j y_j q_{k-j}) / (k q_0)."""
+        x, q = self._coefficients, q._coefficients
+        y = np.zeros_like(x)
+        y[0] = y0
+        for k in range(1, self.order + 1):
+            j = np.arange(1, k)
+            y[k] = (k * x[k] - np.dot(j * y[1:k], q[k - 1:0:-1])) / (k * q[0])
+        return TaylorNumber(y)
+
+    def arctan(self):
+        """y = arctan(x) from (1 + x^2) y' = x'."""
+        return self._inverse(np.arctan(self.real), 1 + self * self)
+
+    def arcsin(self):
+        """y = arcsin(x) from sqrt(1 - x^2) y' = x'."""
+        if _Validation.checked and not -1 < self.real < 1:
+            raise ValueError("The input for arcsin() must be in (-1, 1)")
+        return self._inverse(np.arcsin(self.real), (1 - self * self).sqrt())
+
+    def arccos(self):
+        """y = arccos(x) = pi/2 - arcsin(x)."""
+        if _Validation.checked and not -1 < self.real < 1:
+            raise ValueError("The input for arccos() must be in (-1, 1)")
+        return np.pi / 2 - self.arcsin()
+
+    def logistic(self):
+        """y = 1 / (1 + exp(-x))."""
+        return 1 / (1 + (-self).exp())
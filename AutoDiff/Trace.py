@@ -0,0 +1,924 @@
+# Trace records one evaluation of a user defined function as a flat list of primitive operations
+# (the DualNumber operators and the ElementFunction calls) and replays that list on new inputs.
+# The function is run once on TraceNodes; every operation on a TraceNode appends a record
+# (output slot, input slots or constant, value rule, derivative rule) and returns a new TraceNode.
+# A replay writes the input values into slot 0, ..., dim_x-1 of a preallocated list of values
+# (and the seed directions into a preallocated array of tangents) and runs the records in order,
+# without calling the user function or creating TraceNodes or DualNumbers. The tangent steps of
+# +, -, the operations with a constant and the elementary functions write into the tangent array in
+# place, those of *, / and ** of two slots still allocate temporary arrays.
+#
+# Comparisons on TraceNodes are recorded as guards. A replay whose guard gives a different result
+# (i.e. the function would take another branch), or which hits a domain error, returns None so that
+# the caller evaluates the function the normal way. Everything else a function does with its inputs
+# is frozen into the trace, so only functions without side effects may be traced.
+#
+# Trace.compile() goes one step further and generates straight-line Python source for the value and
+# for the Jacobian from the records: plain float arithmetic and math calls, one local variable per slot
+# and per nonzero tangent entry. The source is compiled once and can be read from Trace.source.
+import operator
+import math
+import linecache
+import numpy as np
+
+_SCALARS = (int, float)
+
+
+class TraceMiss(Exception):
+    """Raised during a replay when the recorded trace is not valid at the new input."""
+
+
+def _miss():
+    raise TraceMiss()
+
+
+def _positive(f):
+    """Wrap the value rule f of a function that is only defined for positive inputs."""
+    return lambda x: f(x) if x > 0 else _miss()
+
+
+def _tan(x):
+    return math.tan(x) if x % np.pi != np.pi / 2 else _miss()
+
+
+# value and derivative rules of the elementary functions, the derivative gets x and y = f(x),
+# written as the math rules of ElementFunction so that a replay gives the same numbers as a normal
+# evaluation; where math raises (e.g. math.asin(2)) the replay misses and the function runs normally
+_UNARY_RULES = {
+    "neg": (operator.neg, lambda x, y: -1.0),
+    "pos": (operator.pos, lambda x, y: 1.0),
+    "sin": (math.sin, lambda x, y: math.cos(x)),
+    "cos": (math.cos, lambda x, y: -math.sin(x)),
+    "tan": (_tan, lambda x, y: 1 / math.cos(x) ** 2),
+    "arcsin": (math.asin, lambda x, y: 1 / math.sqrt(1 - x ** 2)),
+    "arccos": (math.acos, lambda x, y: -1 / math.sqrt(1 - x ** 2)),
+    "arctan": (math.atan, lambda x, y: 1 / (1 + x ** 2)),
+    "exp": (math.exp, lambda x, y: y),
+    "log": (_positive(math.log), lambda x, y: 1 / x),
+    "log10": (_positive(math.log10), lambda x, y: 1 / (x * math.log(10))),
+    "sqrt": (_positive(math.sqrt), lambda x, y: 0.5 / y),
+    "sinh": (math.sinh, lambda x, y: math.cosh(x)),
+    "cosh": (math.cosh, lambda x, y: math.sinh(x)),
+    "tanh": (math.tanh, lambda x, y: 1 - y * y),
+    "logistic": (lambda x: 1 / (1 + math.exp(-x)), lambda x, y: y * (1 - y)),
+}
+
+# operations of a TraceNode x with a constant c: value rule op(x, c) and derivative rule df(x, y, c),
+# the derivative of the operations in _CONSTANT_SLOPE does not depend on x
+_CONSTANT_RULES = {
+    "add": (operator.add, lambda x, y, c: 1.0),
+    "radd": (lambda x, c: c + x, lambda x, y, c: 1.0),
+    "sub": (operator.sub, lambda x, y, c: 1.0),
+    "rsub": (lambda x, c: c - x, lambda x, y, c: -1.0),
+    "mul": (operator.mul, lambda x, y, c: c),
+    "rmul": (lambda x, c: c * x, lambda x, y, c: c),
+    "truediv": (operator.truediv, lambda x, y, c: 1 / c),
+    "rtruediv": (lambda x, c: c / x, lambda x, y, c: -y / x),
+    "pow": (operator.pow, lambda x, y, c: y * (c / x)),
+    "rpow": (lambda x, c: c ** x, lambda x, y, c: y * np.log(c)),
+    "mod": (operator.mod, lambda x, y, c: 1.0),
+}
+_CONSTANT_SLOPE = {"add", "radd", "sub", "rsub", "mul", "rmul", "truediv", "mod"}
+
+
+# source templates of the rules above for the generated code, {x} is the operand, {y} the result
+_UNARY_SOURCE = {
+    "neg": ("-{x}", "-1.0"),
+    "pos": ("+{x}", "1.0"),
+    "sin": ("math.sin({x})", "math.cos({x})"),
+    "cos": ("math.cos({x})", "-math.sin({x})"),
+    "tan": ("math.tan({x})", "1 / math.cos({x}) ** 2"),
+    "arcsin": ("math.asin({x})", "1 / math.sqrt(1 - {x} ** 2)"),
+    "arccos": ("math.acos({x})", "-1 / math.sqrt(1 - {x} ** 2)"),
+    "arctan": ("math.atan({x})", "1 / (1 + {x} ** 2)"),
+    "exp": ("math.exp({x})", "{y}"),
+    "log": ("math.log({x})", "1 / {x}"),
+    "log10": ("math.log10({x})", "1 / ({x} * math.log(10))"),
+    "sqrt": ("math.sqrt({x})", "0.5 / {y}"),
+    "sinh": ("math.sinh({x})", "math.cosh({x})"),
+    "cosh": ("math.cosh({x})", "math.sinh({x})"),
+    "tanh": ("math.tanh({x})", "1 - {y} * {y}"),
+    "logistic": ("1 / (1 + math.exp(-{x}))", "{y} * (1 - {y})"),
+}
+# domain checks of the generated code, a TraceMiss is raised when the condition holds
+_UNARY_DOMAIN = {
+    "tan": "{x} % math.pi == math.pi / 2",
+    "log": "not {x} > 0",
+    "log10": "not {x} > 0",
+    "sqrt": "not {x} > 0",
+}
+_CONSTANT_SOURCE = {
+    "add": ("{x} + {c}", None),
+    "radd": ("{c} + {x}", None),
+    "sub": ("{x} - {c}", None),
+    "rsub": ("{c} - {x}", None),
+    "mul": ("{x} * {c}", None),
+    "rmul": ("{c} * {x}", None),
+    "truediv": ("{x} / {c}", None),
+    "rtruediv": ("{c} / {x}", "-{y} / {x}"),
+    "pow": ("{x} ** {c}", "{y} * ({c} / {x})"),
+    "rpow": ("{c} ** {x}", "{y} * math.log({c})"),
+    "mod": ("{x} % {c}", None),
+}
+_COMPARE_SOURCE = {"eq": "==", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+
+
+class TraceNode:
+    """Tracer value of a Trace: it holds the value at the traced input and the slot it is stored in."""
+    __slots__ = ("_real", "_trace", "_slot")
+
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, real, trace):
+        """Constructor for the TraceNode class. The new node gets the next free slot of trace.
+
+        Input Arguments:
+        =================
+        real: int/float, the value of the node at the traced input
+        trace: Trace, the trace the node is recorded on
+
+        Return Arguments:
+        =================
+        self: Object of the TraceNode class
+        """
+        self._real = real
+        self._trace = trace
+        self._slot = trace._n_slots
+        trace._n_slots += 1
+
+    def __str__(self):
+        return f"TraceNode({self._real}, slot={self._slot})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    # BEGIN RECORDING ------------------------------------------------------
+    def _unary(self, name):
+        """Record y = f(self) for the rule f = _UNARY_RULES[name]."""
+        node = TraceNode(_UNARY_RULES[name][0](self._real), self._trace)
+        self._trace._records.append(("unary", node._slot, self._slot, name))
+        return node
+
+    def _constant(self, name, c):
+        """Record y = op(self, c) for a constant c and the rule op = _CONSTANT_RULES[name]."""
+        node = TraceNode(_CONSTANT_RULES[name][0](self._real, c), self._trace)
+        self._trace._records.append(("constant", node._slot, self._slot, name, c))
+        return node
+
+    def _binary(self, name, other):
+        """Record y = self <name> other for a TraceNode other, name is an operator of the operator module."""
+        node = TraceNode(getattr(operator, name)(self._real, other._real), self._trace)
+        self._trace._records.append((name, node._slot, self._slot, other._slot))
+        return node
+
+    def _guard(self, name, other):
+        """Record the result of a comparison, a replay with another result is a TraceMiss."""
+        compare = getattr(operator, name)
+        if isinstance(other, TraceNode):
+            result = compare(self._real, other._real)
+            self._trace._records.append(("guard", name, self._slot, other._slot, result))
+        else:
+            result = compare(self._real, other)
+            self._trace._records.append(("guard_const", name, self._slot, other, result))
+        return result
+
+    # BEGIN NEG/POS -----------------------------------------------------
+    def __neg__(self):
+        return self._unary("neg")
+
+    def __pos__(self):
+        return self._unary("pos")
+
+    # BEGIN ARITHMETIC ----------------------------------------------------
+    def __add__(self, other):
+        if isinstance(other, TraceNode):
+            return self._binary("add", other)
+        if isinstance(other, _SCALARS):
+            return self._constant("add", other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("radd", other)
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, TraceNode):
+            return self._binary("sub", other)
+        if isinstance(other, _SCALARS):
+            return self._constant("sub", other)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("rsub", other)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, TraceNode):
+            return self._binary("mul", other)
+        if isinstance(other, _SCALARS):
+            return self._constant("mul", other)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("rmul", other)
+        return NotImplemented
+
+    def __truediv__(self, other):
+        if isinstance(other, TraceNode):
+            return self._binary("truediv", other)
+        if isinstance(other, _SCALARS):
+            return self._constant("truediv", other)
+        return NotImplemented
+
+    def __rtruediv__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("rtruediv", other)
+        return NotImplemented
+
+    def __pow__(self, other):
+        if isinstance(other, TraceNode):
+            return self._binary("pow", other)
+        if isinstance(other, _SCALARS):
+            return self._constant("pow", other)
+        return NotImplemented
+
+    def __rpow__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("rpow", other)
+        return NotImplemented
+
+    def __mod__(self, other):
+        if isinstance(other, _SCALARS):
+            return self._constant("mod", other)
+        return NotImplemented
+
+    # BEGIN COMPARISON ---------------------------------------------------------------
+    def __eq__(self, other):
+        return self._guard("eq", other)
+
+    def __ne__(self, other):
+        return self._guard("ne", other)
+
+    def __lt__(self, other):
+        return self._guard("lt", other)
+
+    def __le__(self, other):
+        return self._guard("le", other)
+
+    def __gt__(self, other):
+        return self._guard("gt", other)
+
+    def __ge__(self, other):
+        return self._guard("ge", other)
+
+    __hash__ = None
+
+    # BEGIN ELEMENTARY FUNCTIONS ------------------------------------------------------
+    # ElementFunction dispatches a TraceNode to these methods, NumPy ufuncs on objects call them too
+    def sin(self):
+        return self._unary("sin")
+
+    def cos(self):
+        return self._unary("cos")
+
+    def tan(self):
+        if self._real % np.pi == np.pi / 2:
+            raise ValueError("The input for tan() cannot be pi/2 + n*pi")
+        return self._unary("tan")
+
+    def arcsin(self):
+        return self._unary("arcsin")
+
+    def arccos(self):
+        return self._unary("arccos")
+
+    def arctan(self):
+        return self._unary("arctan")
+
+    def exp(self):
+        return self._unary("exp")
+
+    def log(self):
+        if self._real <= 0:
+            raise ValueError("The function input is a Dual Number whose real part is non-positive")
+        return self._unary("log")
+
+    def log10(self):
+        if self._real <= 0:
+            raise ValueError("The function input is a Dual Number whose real part is non-positive")
+        return self._unary("log10")
+
+    def sqrt(self):
+        if self._real <= 0:
+            raise ValueError("The function input is a Dual Number whose real part is non-positive")
+        return self._unary("sqrt")
+
+    def sinh(self):
+        return self._unary("sinh")
+
+    def cosh(self):
+        return self._unary("cosh")
+
+    def tanh(self):
+        return self._unary("tanh")
+
+    def logistic(self):
+        return self._unary("logistic")
+
+
+def _value_step(record):
+    """Compile a record into a step that only updates the values."""
+    kind = record[0]
+    if kind == "unary":
+        _, o, a, name = record
+        f = _UNARY_RULES[name][0]
+        def step(v, T):
+            v[o] = f(v[a])
+    elif kind == "constant":
+        _, o, a, name, c = record
+        op = _CONSTANT_RULES[name][0]
+        def step(v, T):
+            v[o] = op(v[a], c)
+    elif kind in ("guard", "guard_const"):
+        _, name, a, b, result = record
+        compare = getattr(operator, name)
+        if kind == "guard":
+            def step(v, T):
+                if compare(v[a], v[b]) != result:
+                    raise TraceMiss()
+        else:
+            def step(v, T):
+                if compare(v[a], b) != result:
+                    raise TraceMiss()
+    else:
+        _, o, a, b = record
+        f = getattr(operator, kind)
+        def step(v, T):
+            v[o] = f(v[a], v[b])
+    return step
+
+
+def _tangent_step(record):
+    """Compile a record into a step that updates the values and the tangents (rows of T)."""
+    kind = record[0]
+    if kind == "unary":
+        _, o, a, name = record
+        f, df = _UNARY_RULES[name]
+        def step(v, T):
+            x = v[a]
+            y = v[o] = f(x)
+            np.multiply(T[a], df(x, y), out=T[o])
+    elif kind == "constant":
+        _, o, a, name, c = record
+        op, df = _CONSTANT_RULES[name]
+        if name in _CONSTANT_SLOPE:
+            slope = df(None, None, c)
+            def step(v, T):
+                v[o] = op(v[a], c)
+                np.multiply(T[a], slope, out=T[o])
+        else:
+            def step(v, T):
+                x = v[a]
+                y = v[o] = op(x, c)
+                np.multiply(T[a], df(x, y, c), out=T[o])
+    elif kind == "add":
+        _, o, a, b = record
+        def step(v, T):
+            v[o] = v[a] + v[b]
+            np.add(T[a], T[b], out=T[o])
+    elif kind == "sub":
+        _, o, a, b = record
+        def step(v, T):
+            v[o] = v[a] - v[b]
+            np.subtract(T[a], T[b], out=T[o])
+    elif kind == "mul":
+        _, o, a, b = record
+        def step(v, T):
+            x, y = v[a], v[b]
+            v[o] = x * y
+            T[o] = x * T[b] + T[a] * y
+    elif kind == "truediv":
+        _, o, a, b = record
+        def step(v, T):
+            x, y = v[a], v[b]
+            # (da - q db) / b with q = a / b, b is never squared so a large or small b does not overflow
+            q = v[o] = x / y
+            T[o] = (T[a] - q * T[b]) / y
+    elif kind == "pow":
+        _, o, a, b = record
+        def step(v, T):
+            x, y = v[a], v[b]
+            z = v[o] = x ** y
+            # like DualNumber, log(x) is only needed when the exponent has a derivative
+            if T[b].any():
+                T[o] = z * (T[a] * y / x + T[b] * np.log(x))
+            else:
+                T[o] = z * (T[a] * y / x)
+    else:
+        step = _value_step(record)
+    return step
+
+
+def _is_atom(expr):
+    """Whether expr is a variable name or a literal, which is used as is instead of a new variable."""
+    return expr.isidentifier() or expr.replace(".", "", 1).isdigit() or (expr.startswith("(-") and expr.endswith(")"))
+
+
+def _scale(p, t):
+    """Source of the tangent entry p * t, None stands for an entry that is known to be 0."""
+    if p is None or t is None:
+        return None
+    if t == "1.0":
+        return p
+    if p == "1.0":
+        return t
+    if p == "(-1.0)" or p == "-1.0":
+        return f"-{t}"
+    return f"{p} * {t}"
+
+
+def _combine(e1, e2):
+    """Source of the tangent entry e1 + e2."""
+    if e1 is None:
+        return e2
+    if e2 is None:
+        return e1
+    if e2.startswith("-"):
+        return f"{e1} - {e2[1:]}"
+    return f"{e1} + {e2}"
+
+
+class _SourceWriter:
+    """Write the generated functions of a Trace, one line per operation."""
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.constants = {}
+
+    def literal(self, c):
+        """Source of a constant, constants without a literal (inf, nan) are passed in the namespace."""
+        c = c if isinstance(c, (bool, int)) else float(c)
+        if isinstance(c, float) and not math.isfinite(c):
+            name = f"c{len(self.constants)}"
+            self.constants[name] = c
+            return name
+        text = repr(c)
+        return f"({text})" if text.startswith("-") else text
+
+    def function(self, name, tangents):
+        """Source of the function value(v0, ...) or jacobian(v0, ...) of the trace."""
+        trace = self.trace
+        n, w = trace.dim_x, trace._width
+        lines = [f"def {name}({', '.join(f'v{i}' for i in range(n))}):"]
+        # T[k][i] is the source of the i-th tangent entry of slot k, None if it is 0,
+        # input x_j is seeded with a 1 in the tangent entry of its color (see Trace.seed())
+        T = {j: [("1.0" if trace._colors[j] == i else None) for i in range(w)] for j in range(n)}
+
+        def emit(line):
+            lines.append("    " + line)
+
+        def assign(var, expr):
+            if expr is None or _is_atom(expr):
+                return expr
+            emit(f"{var} = {expr}")
+            return var
+
+        def propagate(o, partials):
+            """Tangents of slot o from (partial derivative source, operand slot) pairs."""
+            row = []
+            for i in range(w):
+                entry = None
+                for p, a in partials:
+                    entry = _combine(entry, _scale(p, T[a][i]))
+                row.append(assign(f"d{o}_{i}", entry))
+            T[o] = row
+
+        def used(a):
+            return any(t is not None for t in T[a])
+
+        for record in trace._records:
+            kind = record[0]
+            if kind == "unary":
+                _, o, a, rule = record
+                value, derivative = _UNARY_SOURCE[rule]
+                if rule in _UNARY_DOMAIN:
+                    emit(f"if {_UNARY_DOMAIN[rule].format(x=f'v{a}')}: raise TraceMiss()")
+                emit(f"v{o} = {value.format(x=f'v{a}')}")
+                if tangents and used(a):
+                    g = assign(f"g{o}", derivative.format(x=f"v{a}", y=f"v{o}"))
+                    propagate(o, [(g, a)])
+                elif tangents:
+                    T[o] = [None] * w
+            elif kind == "constant":
+                _, o, a, rule, c = record
+                value, derivative = _CONSTANT_SOURCE[rule]
+                c_src = self.literal(c)
+                if rule == "pow" and not float(c).is_integer():
+                    # a float raised to a fractional power is complex for a negative base, NumPy gives nan
+                    emit(f"if v{a} < 0: raise TraceMiss()")
+                emit(f"v{o} = {value.format(x=f'v{a}', c=c_src)}")
+                if tangents:
+                    if derivative is None:
+                        g = self.literal(_CONSTANT_RULES[rule][1](None, None, c))
+                    else:
+                        g = assign(f"g{o}", derivative.format(x=f"v{a}", y=f"v{o}", c=c_src)) if used(a) else None
+                    propagate(o, [(g, a)])
+            elif kind in ("guard", "guard_const"):
+                _, rule, a, b, result = record
+                other = f"v{b}" if kind == "guard" else self.literal(b)
+                condition = f"v{a} {_COMPARE_SOURCE[rule]} {other}"
+                emit(f"if {'not ' if result else ''}({condition}): raise TraceMiss()")
+            else:
+                _, o, a, b = record
+                symbol = {"add": "+", "sub": "-", "mul": "*", "truediv": "/", "pow": "**"}[kind]
+                if kind == "pow":
+                    emit(f"if v{a} < 0 and v{b} % 1: raise TraceMiss()")
+                emit(f"v{o} = v{a} {symbol} v{b}")
+                if not tangents:
+                    continue
+                ua, ub = used(a), used(b)
+                if kind == "add":
+                    partials = [("1.0", a), ("1.0", b)]
+                elif kind == "sub":
+                    partials = [("1.0", a), ("-1.0", b)]
+                elif kind == "mul":
+                    partials = [(f"v{b}", a), (f"v{a}", b)]
+                elif kind == "truediv":
+                    partials = [(assign(f"g{o}a", f"1 / v{b}") if ua else None, a),
+                                (assign(f"g{o}b", f"-v{o} / v{b}") if ub else None, b)]
+                else:
+                    # like DualNumber, log(v_a) is only needed when the exponent has a derivative
+                    partials = [(assign(f"g{o}a", f"v{o} * v{b} / v{a}") if ua else None, a),
+                                (assign(f"g{o}b", f"v{o} * math.log(v{a})") if ub else None, b)]
+                propagate(o, partials)
+        components = [self.literal(c) if o is None else f"v{o}" for o, c in trace._outputs]
+        if trace._kind is float:
+            output = components[0]
+        elif trace._kind is np.ndarray:
+            output = f"np.array([{', '.join(components)}])"
+        else:
+            output = f"[{', '.join(components)}]"
+        if tangents:
+            rows = []
+            for o, c in trace._outputs:
+                row = [None] * w if o is None else T[o]
+                rows.append(f"[{', '.join('0.0' if t is None else t for t in row)}]")
+            emit(f"return {output}, np.array([{', '.join(rows)}])")
+        else:
+            emit(f"return {output}")
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Flat execution plan of a user defined function, recorded once and replayed on new inputs."""
+
+    # BEGIN CONSTRUCTOR ----------------------------------------------------
+    def __init__(self, function, x_vec):
+        """Constructor for the Trace class. Runs function once on TraceNodes at x_vec.
+
+        Input Arguments:
+        =================
+        function: a user defined function (see AutoDiff.exam_user_function)
+        x_vec: a list of floats, the input the function is traced at
+
+        Return Arguments:
+        =================
+        self: Object of the Trace class
+
+        Raises
+        =================
+        TypeError if the output of function is not a scalar, a list or a 1D np.array of scalars/TraceNodes,
+        and any exception raised by function itself on TraceNodes
+
+        Examples
+        =================
+        >>> plan = Trace(lambda x, y: [x * y, sin(x)], [1.0, 2.0])
+        >>> plan.value([2.0, 3.0])
+        [6.0, 0.9092974268256817]
+        """
+        self._records = []
+        self._n_slots = 0
+        self.dim_x = len(x_vec)
+        inputs = [TraceNode(x_i, self) for x_i in x_vec]
+        output = function(*inputs)
+        if isinstance(output, list):
+            self._kind = list
+        elif isinstance(output, np.ndarray):
+            if output.ndim != 1:
+                raise TypeError("Only a scalar, a list or a 1D np.array output can be traced.")
+            self._kind = np.ndarray
+        else:
+            self._kind = float
+            output = [output]
+        # each output component is a slot of the trace or a constant
+        self._outputs = []
+        for f_j in output:
+            if isinstance(f_j, TraceNode):
+                if f_j._trace is not self:
+                    raise TypeError("The output contains a TraceNode of another trace.")
+                self._outputs.append((f_j._slot, None))
+            elif isinstance(f_j, (int, float, np.number)):
+                self._outputs.append((None, f_j))
+            else:
+                raise TypeError("The output contains a value that can not be traced.")
+        self.dim_f = len(self._outputs)
+        self._value_steps = [_value_step(record) for record in self._records]
+        self._tangent_steps = [_tangent_step(record) for record in self._records]
+        # preallocated slot arrays, the seed directions of the inputs are written once
+        self._values = [0.0] * self._n_slots
+        self._source = None
+        self._compiled = None
+        self.removed = {}
+        self.seed(np.arange(self.dim_x))
+
+    def __len__(self):
+        """Number of recorded operations (including guards)."""
+        return len(self._records)
+
+    @property
+    def has_guards(self):
+        """Whether the trace depends on the result of a comparison, i.e. may be invalid at another input."""
+        return any(record[0] in ("guard", "guard_const") for record in self._records)
+
+    # BEGIN SPARSITY -------------------------------------------------------
+    def sparsity(self):
+        """Structural sparsity pattern of the Jacobian: the inputs each output component depends on.
+        The index set of every slot is propagated through the records, so no derivative is evaluated.
+
+        Return Arguments:
+        =================
+        rows, cols: int np.arrays, the Jacobian entry (rows[k], cols[k]) may be nonzero,
+        all other entries are zero wherever the trace is valid
+
+        Example
+        =================
+        >>> Trace(lambda x, y, z: [x * y, sin(z)], [1.0, 2.0, 3.0]).sparsity()
+        (array([0, 0, 1]), array([0, 1, 2]))
+        """
+        deps = [None] * self._n_slots
+        for i in range(self.dim_x):
+            deps[i] = frozenset((i,))
+        for record in self._records:
+            kind = record[0]
+            if kind in ("unary", "constant"):
+                deps[record[1]] = deps[record[2]]
+            elif kind not in ("guard", "guard_const"):
+                deps[record[1]] = deps[record[2]] | deps[record[3]]
+        rows, cols = [], []
+        for j, (o, c) in enumerate(self._outputs):
+            if o is not None:
+                cols_j = sorted(deps[o])
+                rows.extend([j] * len(cols_j))
+                cols.extend(cols_j)
+        return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+    def seed(self, colors):
+        """Seed input x_j with the unit vector of tangent entry colors[j], so that the inputs of one color
+        share a tangent entry and jacobian() returns the compressed Jacobian J S with S[j, colors[j]] = 1.
+        The default colors 0, ..., dim_x-1 give the full Jacobian.
+
+        Input Arguments:
+        =================
+        colors: int np.array of length dim_x, see AutoDiff.color_columns()
+        """
+        self._colors = np.asarray(colors, dtype=int)
+        self._width = int(self._colors.max()) + 1 if self.dim_x else 0
+        self._tangents = np.zeros((self._n_slots, self._width))
+        self._tangents[np.arange(self.dim_x), self._colors] = 1.0
+        self._source = None
+        self._compiled = None
+        return self
+
+    # BEGIN OPTIMIZATION ---------------------------------------------------
+    # The passes below only remove records whose result is known exactly without running them,
+    # so an optimized trace gives bit for bit the values and Jacobians of the recorded one.
+    # A removed record of slot o leaves an alias o -> slot that holds the same value.
+    def optimize(self):
+        """Simplify the recorded operations with three passes and return how many records each pass removed.
+
+        fold: constant folding of the operations with a constant that do not change their operand in IEEE
+              arithmetic (x - 0.0, x + (-0.0), x * 1, x / 1, +x) and of double negation -(-x).
+              x + 0 (which turns -0.0 into 0.0) and x ** 1 (whose slope is nan at 0) are kept.
+              Subexpressions of constants only are folded when the function is traced already,
+              they are computed on floats and never become records.
+        cse: common subexpression elimination, a record with the same operation on the same operands
+             (in any order for + and *) as an earlier record is replaced by the earlier one.
+        dead: records whose result reaches no output and no guard are removed.
+
+        Return Arguments:
+        =================
+        dict with the number of removed records per pass, also stored in Trace.removed
+
+        Example
+        =================
+        >>> plan = Trace(lambda x, y: [sin(x * y), x * y + y, cos(y * x)], [1.0, 2.0])
+        >>> plan.optimize()
+        {'fold': 0, 'cse': 2, 'dead': 0}
+        """
+        self._alias = {}
+        removed = {"fold": self._fold(), "cse": self._cse(), "dead": self._dead()}
+        self._outputs = [(o if o is None else self._resolve(o), c) for o, c in self._outputs]
+        self._value_steps = [_value_step(record) for record in self._records]
+        self._tangent_steps = [_tangent_step(record) for record in self._records]
+        self._source = None
+        self._compiled = None
+        for name, count in removed.items():
+            self.removed[name] = self.removed.get(name, 0) + count
+        return removed
+
+    def _resolve(self, slot):
+        """Follow the aliases of slot to the slot that holds its value."""
+        while slot in self._alias:
+            slot = self._alias[slot]
+        return slot
+
+    def _rewrite(self, record):
+        """Return record with its operand slots resolved."""
+        kind = record[0]
+        if kind in ("unary", "constant"):
+            return record[:2] + (self._resolve(record[2]),) + record[3:]
+        if kind == "guard":
+            return record[:2] + (self._resolve(record[2]), self._resolve(record[3]), record[4])
+        if kind == "guard_const":
+            return record[:2] + (self._resolve(record[2]),) + record[3:]
+        return record[:2] + (self._resolve(record[2]), self._resolve(record[3]))
+
+    def _fold(self):
+        records, producers = [], {}
+        for record in self._records:
+            record = self._rewrite(record)
+            kind = record[0]
+            if kind == "unary" and record[3] == "pos":
+                self._alias[record[1]] = record[2]
+                continue
+            if kind == "unary" and record[3] == "neg":
+                inner = producers.get(record[2])
+                if inner is not None and inner[0] == "unary" and inner[3] == "neg":
+                    self._alias[record[1]] = inner[2]
+                    continue
+            if kind == "constant":
+                name, c = record[3], record[4]
+                # -0.0 + 0.0 is 0.0 and x ** 1 has the slope nan at 0, so x + 0.0 and x ** 1 are kept
+                negative = c == 0 and math.copysign(1.0, c) < 0
+                if (name in ("add", "radd") and negative) or (name == "sub" and c == 0 and not negative) \
+                        or (name in ("mul", "rmul", "truediv") and c == 1):
+                    self._alias[record[1]] = record[2]
+                    continue
+            if kind in ("unary", "constant", "add", "sub", "mul", "truediv", "pow"):
+                producers[record[1]] = record
+            records.append(record)
+        removed = len(self._records) - len(records)
+        self._records = records
+        return removed
+
+    def _cse(self):
+        records, seen = [], {}
+        for record in self._records:
+            record = self._rewrite(record)
+            kind = record[0]
+            if kind == "unary":
+                key = record[2:]
+            elif kind == "constant":
+                # c + x and x + c (c * x and x * c) have the same value and derivative. 0.0 == -0.0,
+                # so the sign of c is part of the key: x * 0.0 and x * -0.0 differ in the sign of a zero
+                name, c = {"radd": "add", "rmul": "mul"}.get(record[3], record[3]), record[4]
+                key = (record[2], name, type(c), math.copysign(1.0, c), c)
+            elif kind in ("guard", "guard_const"):
+                key = record
+            elif kind in ("add", "mul"):
+                key = (kind,) + tuple(sorted(record[2:]))
+            else:
+                key = (kind,) + record[2:]
+            key = (kind,) + key
+            if key in seen:
+                if kind not in ("guard", "guard_const"):
+                    self._alias[record[1]] = seen[key]
+                continue
+            seen[key] = None if kind in ("guard", "guard_const") else record[1]
+            records.append(record)
+        removed = len(self._records) - len(records)
+        self._records = records
+        return removed
+
+    def _dead(self):
+        needed = {self._resolve(o) for o, c in self._outputs if o is not None}
+        records = []
+        for record in reversed(self._records):
+            kind = record[0]
+            if kind in ("guard", "guard_const"):
+                needed.add(record[2])
+                if kind == "guard":
+                    needed.add(record[3])
+            elif record[1] in needed:
+                needed.add(record[2])
+                if kind not in ("unary", "constant"):
+                    needed.add(record[3])
+            else:
+                continue
+            records.append(record)
+        records.reverse()
+        removed = len(self._records) - len(records)
+        self._records = records
+        return removed
+
+    # BEGIN CODE GENERATION ------------------------------------------------
+    @property
+    def source(self):
+        """Generated Python source of the functions value(v0, ...) and jacobian(v0, ...) of the trace.
+
+        Example
+        =================
+        >>> print(Trace(lambda x, y: sin(x * y), [1.0, 2.0]).source)
+        def value(v0, v1):
+            v2 = v0 * v1
+            v3 = math.sin(v2)
+            return v3
+        ...
+        """
+        if self._source is None:
+            writer = _SourceWriter(self)
+            self._source = writer.function("value", False) + "\n\n" + writer.function("jacobian", True)
+            self._constants = writer.constants
+        return self._source
+
+    def compile(self):
+        """Compile the generated source once, value() and jacobian() call the generated functions from then on.
+        The source is registered with linecache, so tracebacks and profilers show the generated lines.
+        """
+        if self._compiled is None:
+            source = self.source
+            filename = f"<AutoDiff trace {id(self):x}>"
+            linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+            namespace = {"math": math, "np": np, "TraceMiss": TraceMiss, **self._constants}
+            exec(compile(source, filename, "exec"), namespace)
+            self._compiled = (namespace["value"], namespace["jacobian"])
+        return self
+
+    def _call(self, function, x_vec):
+        """Call a generated function, None if the trace is not valid at x_vec."""
+        try:
+            return function(*x_vec)
+        except (TraceMiss, ArithmeticError, ValueError):
+            # math raises a ValueError outside the domain of a function, e.g. math.asin(2)
+            return None
+
+    # BEGIN REPLAY ---------------------------------------------------------
+    def _run(self, x_vec, steps):
+        """Replay steps on x_vec, return False if the trace is not valid at x_vec."""
+        v, T = self._values, self._tangents
+        v[:self.dim_x] = x_vec
+        try:
+            for step in steps:
+                step(v, T)
+        except (TraceMiss, ArithmeticError, ValueError):
+            # math raises a ValueError outside the domain of a function, e.g. math.asin(2)
+            return False
+        return True
+
+    def _format(self, components):
+        """Return the output components in the format of the traced function output."""
+        if self._kind is float:
+            return components[0]
+        if self._kind is np.ndarray:
+            return np.array(components)
+        return components
+
+    def value(self, x_vec):
+        """Replay the trace and return the function output at x_vec, None if the trace is not valid at x_vec.
+
+        Input Arguments:
+        =================
+        x_vec: a list of dim_x floats
+        """
+        if self._compiled is not None:
+            return self._call(self._compiled[0], x_vec)
+        if not self._run(x_vec, self._value_steps):
+            return None
+        v = self._values
+        return self._format([c if o is None else v[o] for o, c in self._outputs])
+
+    def jacobian(self, x_vec):
+        """Replay the trace with tangents, None if the trace is not valid at x_vec.
+
+        Input Arguments:
+        =================
+        x_vec: a list of dim_x floats
+
+        Return Arguments:
+        =================
+        output: the function output at x_vec
+        Jacobian: np.array of shape (dim_f, dim_x),
+        or the compressed Jacobian of shape (dim_f, number of colors) after seed()
+        """
+        if self._compiled is not None:
+            return self._call(self._compiled[1], x_vec)
+        if not self._run(x_vec, self._tangent_steps):
+            return None
+        v, T = self._values, self._tangents
+        Jacobian = np.zeros((self.dim_f, self._width))
+        for j, (o, c) in enumerate(self._outputs):
+            if o is not None:
+                Jacobian[j] = T[o]
+        return self._format([c if o is None else v[o] for o, c in self._outputs]), Jacobian
@@ -0,0 +1,46 @@
+"""
+AutoDiff: an automatic differentiation package.
+
+The public names below are imported from their submodules on first use (PEP 562), so `import AutoDiff`
+loads nothing, AutoDiff.sin loads numpy and the variable types, and matplotlib is only loaded by a plot
+(see plotting.py). A class that shares its name with its submodule (AutoDiff, DualNumber, Trace, ...)
+is not among them: AutoDiff.DualNumber is the submodule, as in any package, and the class is imported
+from it, e.g. `from AutoDiff.AutoDiff import AutoDiff`.
+
+Examples
+=================
+import AutoDiff as ad
+from AutoDiff.AutoDiff import AutoDiff
+f = AutoDiff(lambda x, y: ad.sin(x * y))
+f.grad([1, 2])
+ad.RAutoDiff(lambda x, y: ad.sin(x * y)).grad([1, 2])
+ad.grad_descent(lambda x: (x - 1)**2, 4.0, alpha=1e-1)
+"""
+import importlib
+
+# submodule -> the public names it defines, but the class named after its submodule
+_SUBMODULES = {
+    "AutoDiff": ("RAutoDiff", "exam_user_function", "unchecked"),
+    "DualNumber": ("Accumulator", "accumulator", "fsum"),
+    "ElementFunction": ("sin", "cos", "tan", "arcsin", "arccos", "arctan", "exp", "log", "log10", "logBase",
+                        "sqrt", "sinh", "cosh", "tanh", "logistic"),
+    "feature": ("grad_descent",),
+}
+# public name -> submodule
+_EXPORTS = {name: module for module, names in _SUBMODULES.items() for name in names}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # later lookups do not come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
@@ -0,0 +1,231 @@
+"""
+Micro-benchmarks of the hot paths of the package, in three groups:
+DualNumber: every operator with a DualNumber and with a scalar operand,
+ElementFunction: every elementary function on a float, a DualNumber, a list and an np.array,
+AutoDiff: __call__() and grad() for dim_x in (1, 4, 16, 64) and dim_f in (1, 4, 16).
+
+Run `python -m AutoDiff.bench` (or `python -m AutoDiff.bench run -o results.json` to keep the results as
+JSON), and `python -m AutoDiff.bench compare before.json after.json` to list the cases that got slower by
+more than the threshold (10% by default); compare exits with status 1 if there is any.
+
+Examples
+=================
+python -m AutoDiff.bench run --group DualNumber --quick
+python -m AutoDiff.bench run -o main.json
+python -m AutoDiff.bench compare main.json branch.json --threshold 0.2
+"""
+import argparse
+import json
+import operator
+import platform
+import sys
+import time
+import timeit
+import numpy as np
+from .DualNumber import DualNumber
+from .AutoDiff import AutoDiff
+from . import ElementFunction
+
+GROUPS = ("DualNumber", "ElementFunction", "AutoDiff")
+# binary operators of DualNumber, the reflected version is benchmarked with a scalar left operand
+_OPERATORS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv, "**": operator.pow,
+    "<": operator.lt, "==": operator.eq,
+}
+_ELEMENT_FUNCTIONS = ("sin", "cos", "tan", "arcsin", "arccos", "arctan", "exp", "log", "log10", "sqrt",
+                      "sinh", "cosh", "tanh", "logistic")
+_DIM_X = (1, 4, 16, 64)
+_DIM_F = (1, 4, 16)
+
+
+# BEGIN CASES ---------------------------------------------------------
+def dual_number_cases():
+    """Return {name: function without arguments} of the DualNumber operators."""
+    x, y = DualNumber(1.5, 0.5), DualNumber(0.7, 2.0)
+    cases = {}
+    for symbol, op in _OPERATORS.items():
+        cases[f"x {symbol} y"] = lambda op=op: op(x, y)
+        cases[f"x {symbol} 2.5"] = lambda op=op: op(x, 2.5)
+        if symbol not in ("<", "=="):
+            cases[f"2.5 {symbol} x"] = lambda op=op: op(2.5, x)
+    cases["x % 2.5"] = lambda: x % 2.5
+    cases["-x"] = lambda: -x
+    cases["+x"] = lambda: +x
+    cases["DualNumber(1.5, 0.5)"] = lambda: DualNumber(1.5, 0.5)
+    return cases
+
+
+def element_function_cases():
+    """Return {name: function without arguments} of the elementary functions on each input type."""
+    inputs = {
+        "float": 0.5,
+        "dual": DualNumber(0.5, 1.0),
+        "list": list(np.linspace(0.1, 0.9, 100)),
+        "array": np.linspace(0.1, 0.9, 100),
+    }
+    cases = {}
+    for name in _ELEMENT_FUNCTIONS:
+        function = getattr(ElementFunction, name)
+        for kind, z in inputs.items():
+            cases[f"{name}({kind})"] = lambda function=function, z=z: function(z)
+    for kind, z in inputs.items():
+        cases[f"logBase(2, {kind})"] = lambda z=z: ElementFunction.logBase(2, z)
+    return cases
+
+
+def _test_function(dim_x, dim_f):
+    """A function R^dim_x -> R^dim_f (a scalar for dim_f = 1) whose components mix its variables."""
+    def function(*x):
+        components = [ElementFunction.sin(x[j % dim_x]) * x[(j + 1) % dim_x] + ElementFunction.exp(x[0])
+                      for j in range(dim_f)]
+        return components[0] if dim_f == 1 else components
+    return function
+
+
+def autodiff_cases():
+    """Return {name: function without arguments} of AutoDiff.__call__() and grad() over dim_x and dim_f."""
+    cases = {}
+    for dim_x in _DIM_X:
+        point = list(np.linspace(0.5, 1.5, dim_x))
+        for dim_f in _DIM_F:
+            f = AutoDiff(_test_function(dim_x, dim_f), dim_x=dim_x)
+            # the constructor does not evaluate the function, learn dim_f before timing
+            f(point)
+            cases[f"__call__ dim_x={dim_x} dim_f={dim_f}"] = lambda f=f, point=point: f(point)
+            cases[f"grad dim_x={dim_x} dim_f={dim_f}"] = lambda f=f, point=point: f.grad(point)
+    return cases
+
+
+_CASES = {"DualNumber": dual_number_cases, "ElementFunction": element_function_cases, "AutoDiff": autodiff_cases}
+
+
+# BEGIN RUN ---------------------------------------------------------
+def measure(function, min_time=0.2, repeat=5):
+    """Time function() like timeit's autorange: the number of calls per repeat is doubled until a repeat
+    takes min_time, the best of repeat repeats is kept.
+
+    Input Arguments:
+    =================
+    function: a function without arguments
+    min_time: seconds a repeat should take at least
+    repeat: number of repeats
+
+    Return Arguments:
+    =================
+    (seconds per call of the best repeat, number of calls per repeat)
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number, number
+
+
+def run(groups=GROUPS, match=None, min_time=0.2, repeat=5):
+    """Run the benchmark cases of groups whose name contains match (all if None).
+
+    Return Arguments:
+    =================
+    a JSON-ready dict {"meta": {...}, "results": {"group/case": {"group", "seconds", "number", "repeat"}}}
+
+    Example
+    =================
+    run(["DualNumber"], match="+", min_time=0.01)
+    """
+    results = {}
+    for group in groups:
+        if group not in _CASES:
+            raise ValueError(f"group should be one of {', '.join(GROUPS)}")
+        for name, function in _CASES[group]().items():
+            if match is not None and match not in name:
+                continue
+            seconds, number = measure(function, min_time, repeat)
+            results[f"{group}/{name}"] = {"group": group, "seconds": seconds, "number": number, "repeat": repeat}
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "min_time": min_time,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(base, new, threshold=0.1):
+    """Compare two results of run() case by case.
+
+    Input Arguments:
+    =================
+    base, new: dicts returned by run() (or read from their JSON files)
+    threshold: relative slowdown new/base - 1 above which a case is a regression
+
+    Return Arguments:
+    =================
+    a list of (case, base seconds, new seconds, new/base, regressed) for the cases in both results,
+    sorted from the largest slowdown
+    """
+    rows = []
+    for case, entry in new["results"].items():
+        if case not in base["results"]:
+            continue
+        before, after = base["results"][case]["seconds"], entry["seconds"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append((case, before, after, ratio, ratio > 1 + threshold))
+    rows.sort(key=lambda row: -row[3])
+    return rows
+
+
+# BEGIN COMMAND LINE ---------------------------------------------------------
+def _format_seconds(seconds):
+    """Seconds per call in the unit that fits, e.g. 312.5 ns or 1.2 ms."""
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.1f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def main(argv=None):
+    """Command line of `python -m AutoDiff.bench`, returns the exit status."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run"] + argv
+    parser = argparse.ArgumentParser(prog="python -m AutoDiff.bench", description="Micro-benchmarks of AutoDiff.")
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-g", "--group", action="append", choices=GROUPS, help="group to run, repeatable (default: all)")
+    run_parser.add_argument("-k", "--match", help="only run the cases whose name contains this text")
+    run_parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    run_parser.add_argument("--quick", action="store_true", help="shorter timings, for a rough check")
+    compare_parser = commands.add_parser("compare", help="flag the cases that got slower")
+    compare_parser.add_argument("base", help="JSON results of the reference run")
+    compare_parser.add_argument("new", help="JSON results to check")
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                                help="relative slowdown that counts as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        min_time, repeat = (0.02, 3) if args.quick else (0.2, 5)
+        results = run(args.group or GROUPS, args.match, min_time, repeat)
+        for case, entry in results["results"].items():
+            print(f"{case:<48}{_format_seconds(entry['seconds']):>12}")
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+        return 0
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    rows = compare(base, new, args.threshold)
+    for case, before, after, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{case:<48}{_format_seconds(before):>12}{_format_seconds(after):>12}{ratio:>8.2f}x  {flag}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} of {len(rows)} cases slower by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
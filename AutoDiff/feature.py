@@ -1,11 +1,13 @@
 from .AutoDiff import AutoDiff as AD 
+from .AutoDiff import RAutoDiff as RAD
 from .ElementFunction import *
-import matplotlib.pyplot as plt
+from .Parameters import Parameters
 import numpy as np
 import numpy.linalg as la
 #from mpl_toolkits import mplot3d
 
-def grad_descent(function, x0, alpha=1e-5, max_iter=int(1e6), converge_threshold=1e-8, verbose=False):
+def grad_descent(function, x0, alpha=1e-5, max_iter=int(1e6), converge_threshold=1e-8, verbose=False, mode="forward", trace=False,
+                 vector_input=False):
     """Gradient descent algorithm for finding the minimum of a function.
     
     Input Arguments:
@@ -15,23 +17,42 @@ def grad_descent(function, x0, alpha=1e-5, max_iter=int(1e6), converge_threshold
     and it must be a int/float/np.number type
     x0: an initial value of the function variable (x), 
     must be a 1D np.array for multiple variables,
-    and a scalar for single variable
+    and a scalar for single variable,
+    or Parameters (see Parameters.py) for a function of nested parameters, e.g. a dict of weight matrices,
+    which function then takes as its single argument
     alpha: learning rate
     max_iter: maximum number of iterations
     converge_threshold: threshold for convergence
-    verbose: whether to print the intermediate results and visualize the process
+    verbose: whether to print the intermediate results and visualize the process,
+    the animation of a function of one variable needs matplotlib (see plotting.py)
+    mode: "forward" to take the gradient with AutoDiff, "reverse" to take it with RAutoDiff,
+    reverse mode needs one sweep for the whole gradient and is faster for many variables
+    trace: whether to record the function once and replay the recorded trace in every iteration,
+    True replays the trace and "compile" runs code generated from it, see AutoDiff(trace=...)
+    vector_input: whether function takes all variables as one np.array x instead of one argument per variable,
+    its dimension is the length of x0, see AutoDiff(vector_input=...)
     
     Return Arguments:
     =================
     x: the input which gives the minimum of the function f(x)
-    or the value returned when the maximum number of iterations is reached
+    or the value returned when the maximum number of iterations is reached,
+    Parameters of the layout of x0 if x0 is Parameters (x0 itself is not modified)
     """
-    f = AD(function)
-    # check if user inputs a scalar function
-    if f.dim_f > 1:
-        raise TypeError("The function output must be a scalar.")
+    if isinstance(x0, Parameters):
+        return _grad_descent_parameters(function, x0, alpha, max_iter, converge_threshold, verbose, mode, trace)
+    dim_x = None
+    if vector_input:
+        if not isinstance(x0, np.ndarray) or x0.ndim != 1:
+            raise TypeError("The initial guess must be a 1D np.array for a vector_input function.")
+        dim_x = len(x0)
+    if mode == "forward":
+        f = AD(function, trace=trace, dim_x=dim_x, vector_input=vector_input)
+    elif mode == "reverse":
+        f = RAD(function, trace=trace, dim_x=dim_x, vector_input=vector_input)
+    else:
+        raise ValueError("mode must be either 'forward' or 'reverse'.")
     # check the initial guess dim
-    if f.dim_x == 1:
+    if f.dim_x == 1 and not vector_input:
         if not isinstance(x0, (int, float, np.number)):
             raise TypeError("The initial guess must be a scalar since your function has single variable.")
     else:
@@ -43,39 +64,70 @@ def grad_descent(function, x0, alpha=1e-5, max_iter=int(1e6), converge_threshold
             raise TypeError("The initial guess must be a 1D np.array for multi-variable function.")
         if not all(isinstance(x0_i, (int, float, np.number)) for x0_i in x0):
             raise TypeError("The initial guess must be a 1D np.array of numbers for multi-variable function.")
+    # check if user inputs a scalar function, its output dimension comes from the value at x0
+    f(x0)
+    if f.dim_f > 1:
+        raise TypeError("The function output must be a scalar.")
 
     # multi-variable function
-    if f.dim_x > 1:
-        # add a dimension to x0 to 
-        # let the dim to (1,n) match with the f.grad() output
-        x = np.array([x0])
+    if f.dim_x > 1 or vector_input:
+        # x, the gradient of shape (1,n) and the step are updated in place
+        x = np.array(x0, dtype=np.float64)
+        gradient = np.empty((1, f.dim_x))
+        step = np.empty(f.dim_x)
         for i in range(max_iter):
-            x_prev = x
-            x = x - alpha*f.grad(x[0]) # use x[0] to get the 1D array
+            value, _ = f.value_and_grad(x, out=gradient)
+            np.multiply(gradient[0], alpha, out=step)
             if i%5000==0 and verbose:
-                print(f"Iteration {i}: x={x[0]}, f(x)={f(x[0])}")
-            if la.norm(x-x_prev) < converge_threshold:
-                # get the 1D array
-                return x[0]
+                print(f"Iteration {i}: x={x}, f(x)={value}")
+            x -= step
+            if la.norm(step) < converge_threshold:
+                return x
         print("Maximum number of iterations reached.")
-        return x[0]
+        return x
 
     # single-variable function
-    if f.dim_x == 1:
+    if f.dim_x == 1 and not vector_input:
         x = x0
         for i in range(max_iter):
             x_prev = x
-            x = x - alpha*f.grad(x)
+            value, gradient = f.value_and_grad(x)
+            x = x - alpha*gradient
             if i%300==0 and verbose:
-                print(f"Iteration {i}: x={x:.7f}, f(x)={f(x):.7f}")
+                print(f"Iteration {i}: x={x_prev:.7f}, f(x)={value:.7f}")
                 ## show animation for 1D function
-                x_demo = np.linspace(-4,5,100)
-                plt.plot(x_demo, [f(x) for x in x_demo], 'b-')
-                plt.plot(x, f(x), 'ro')
-                plt.pause(0.25)
-                plt.cla()
+                from .plotting import plot_descent_step
+                plot_descent_step(f, x_prev, value)
             if la.norm(x-x_prev) < converge_threshold:
                 return x
         print("Maximum number of iterations reached.")
         return x
 
+
+
+def _grad_descent_parameters(function, x0, alpha, max_iter, converge_threshold, verbose, mode, trace):
+    """grad_descent() for Parameters x0: every step updates one flat buffer in place,
+    the gradient comes as Parameters over the Jacobian, so nothing is flattened or unflattened."""
+    if mode == "forward":
+        f = AD(function, trace=trace, parameters=x0)
+    elif mode == "reverse":
+        f = RAD(function, trace=trace, parameters=x0)
+    else:
+        raise ValueError("mode must be either 'forward' or 'reverse'.")
+    # check if user inputs a scalar function, its output dimension comes from the value at x0
+    f(x0)
+    if f.dim_f > 1:
+        raise TypeError("The function output must be a scalar.")
+    x = x0.copy()
+    step = np.empty_like(x.flat)
+    buffer = np.empty((1, x.size))
+    for i in range(max_iter):
+        value, gradient = f.value_and_grad(x, out=buffer)
+        np.multiply(gradient.flat, alpha, out=step)
+        if i%5000==0 and verbose:
+            print(f"Iteration {i}: f(x)={value}")
+        x.flat[:] -= step
+        if la.norm(step) < converge_threshold:
+            return x
+    print("Maximum number of iterations reached.")
+    return x
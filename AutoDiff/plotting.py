@@ -0,0 +1,30 @@
+# Optional plotting of the package. It is only imported when a plot is requested, e.g. by
+# grad_descent(..., verbose=True) of a function of one variable, so that importing AutoDiff and
+# AutoDiff.feature does not load matplotlib. Install matplotlib (the "plot" extra) to use it.
+try:
+    import matplotlib.pyplot as plt
+except ImportError as error:
+    raise ImportError("Plotting needs matplotlib, install it with `pip install matplotlib`.") from error
+import numpy as np
+
+
+def plot_descent_step(f, x, value, domain=(-4, 5), pause=0.25):
+    """Draw one frame of the gradient descent animation of a function of one variable.
+
+    Input Arguments:
+    =================
+    f: an AutoDiff object of the function
+    x: the current point, value: f(x)
+    domain: the interval the function is drawn on
+    pause: seconds the frame is shown
+
+    Examples
+    =================
+    f = AutoDiff(lambda x: (x-1)**2)
+    plot_descent_step(f, 4.0, f(4.0))
+    """
+    x_demo = np.linspace(domain[0], domain[1], 100)
+    plt.plot(x_demo, [f(x_i) for x_i in x_demo], 'b-')
+    plt.plot(x, value, 'ro')
+    plt.pause(pause)
+    plt.cla()
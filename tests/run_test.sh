@@ -6,6 +6,13 @@ tests=(
     test_DualNumber.py
     test_ElementFunction.py
     test_feature.py
+    test_ReverseNode.py
+    test_DualArray.py
+    test_TaylorNumber.py
+    test_Trace.py
+    test_Parameters.py
+    test_import.py
+    test_bench.py
 )
 
 # Must add the module source path because we use `import cs107_package` in
@@ -1,9 +1,10 @@
 import sys
 sys.path.append('../')
 from AutoDiff.AutoDiff import AutoDiff as AD
-from AutoDiff.AutoDiff import exam_user_function
+from AutoDiff.AutoDiff import RAutoDiff as RAD
+from AutoDiff.AutoDiff import exam_user_function, color_columns
 from AutoDiff.ElementFunction import *
-from AutoDiff.DualNumber import DualNumber
+from AutoDiff.DualNumber import DualNumber, unchecked
 import numpy as np
 import pdb
 import pytest
@@ -385,5 +386,505 @@ class TestAutoDiff:
         x_vec2Bd = [5,5,3]
         assert np.allclose(AD2B.grad(x_vec2Bd), np.array([-0.08685889638, 0, 0,0.28366218546, 0,0]).reshape(2,3)),"Incorrect function evaluation with input dimension>1."
         """==============================================================="""
-        
-        
+
+    def test_grad_chunk_size(self):
+        """ test that every chunk size gives the same Jacobian as one pass """
+        f = lambda x, y, z: [sin(x*y), exp(x) + y*z, z, 3.0]
+        x_vec = [0.5, 2.0, -1.0]
+        expected = np.array([[2.0*np.cos(1.0), 0.5*np.cos(1.0), 0],
+                             [np.exp(0.5), -1.0, 2.0],
+                             [0, 0, 1],
+                             [0, 0, 0]])
+        for chunk_size in [None, 1, 2, 3, 10]:
+            assert np.allclose(AD(f, chunk_size=chunk_size).grad(x_vec), expected), "incorrect gradient evaluation with chunked seed directions."
+        # scalar output returned as a list
+        f = AD(lambda x, y: [x*y], chunk_size=1)
+        assert np.allclose(f.grad([2.0, 3.0]), np.array([[3.0, 2.0]])), "incorrect gradient evaluation for a list of one output."
+        # invalid chunk size
+        with pytest.raises(TypeError):
+            AD(lambda x, y: x*y, chunk_size=1.5)
+        with pytest.raises(ValueError):
+            AD(lambda x, y: x*y, chunk_size=0)
+
+
+    def test_grad_batch(self):
+        """ test batched Jacobians against one grad call per point """
+        X = np.array([[0.5, 2.0], [1.0, -1.0], [0.1, 0.3]])
+        for f in [AD(lambda x, y: sin(x*y) + exp(x)/y),
+                  AD(lambda x, y: [sin(x*y), x+y, 2.0, log(x**2 + y**2)]),
+                  AD(lambda x, y: np.array([tanh(x*y), logistic(x) ** 2]), chunk_size=1)]:
+            J = f.grad_batch(X)
+            assert J.shape == (3, f.dim_f, 2), "grad_batch returns a wrong shape."
+            assert np.allclose(J, np.stack([np.reshape(f.grad(x), (f.dim_f, 2)) for x in X])), "incorrect batched gradient evaluation."
+        # 1-D input of a 1 to 1 function
+        f = AD(lambda x: x**3)
+        assert np.allclose(f.grad_batch(np.array([1.0, 2.0])), np.array([3.0, 12.0]).reshape(2, 1, 1)), "incorrect batched gradient evaluation at 1-D input."
+        # wrong input shape/type
+        with pytest.raises(ValueError):
+            AD(lambda x, y: x*y).grad_batch(np.array([1.0, 2.0]))
+        with pytest.raises(ValueError):
+            AD(lambda x, y: x*y).grad_batch(np.ones((3, 3)))
+        with pytest.raises(TypeError):
+            AD(lambda x, y: x*y).grad_batch(np.array([["a", "b"]]))
+
+    def test_call_batch(self):
+        """ test batched function evaluation with a 2D array input """
+        X = np.array([[0.5, 2.0], [1.0, -1.0], [0.1, 0.3]])
+        f = AD(lambda x, y: sin(x*y))
+        assert np.allclose(f(X), [f(x) for x in X]) and f(X).shape == (3,), "incorrect batched function evaluation for scalar output."
+        f = AD(lambda x, y: [sin(x*y), x+y, 2.0])
+        assert np.allclose(f(X), [f(x) for x in X]) and f(X).shape == (3, 3), "incorrect batched function evaluation for list output."
+        with pytest.raises(ValueError):
+            f(np.ones((3, 3)))
+
+    def test_hessian(self):
+        """ test exact Hessians against analytic second derivatives """
+        f = AD(lambda x, y, z: [x**2 * y, sin(x*y) + exp(z)*y, 3.0, z])
+        H = f.hessian([1.0, 2.0, 0.5])
+        assert H.shape == (4, 3, 3), "hessian returns a wrong shape."
+        expected = np.array([[[4.0, 2.0, 0], [2.0, 0, 0], [0, 0, 0]],
+                             [[-4*np.sin(2.0), np.cos(2.0) - 2*np.sin(2.0), 0],
+                              [np.cos(2.0) - 2*np.sin(2.0), -np.sin(2.0), np.exp(0.5)],
+                              [0, np.exp(0.5), 2*np.exp(0.5)]],
+                             np.zeros((3, 3)), np.zeros((3, 3))])
+        assert np.allclose(H, expected), "incorrect Hessian evaluation."
+        # 1 to 1 function and elementary functions with domain checks
+        f = AD(lambda x: log(x) + sqrt(x) + tan(x) / x)
+        x = 0.7
+        d2 = -1/x**2 - 0.25*x**-1.5 + (2*np.tan(x)/np.cos(x)**2*x**2 - 2*x/np.cos(x)**2 + 2*np.tan(x))/x**3
+        assert np.allclose(f.hessian(x), d2), "incorrect Hessian evaluation at 1-D input."
+        # numpy objective on object arrays
+        inputs = np.array([[0.5, 1.0], [-1.5, 0.2]])
+        f = AD(lambda w0, w1: sum(log(logistic(list(np.dot(inputs, np.array([w0, w1])))))))
+        w = np.array([0.3, -0.4])
+        p = 1/(1 + np.exp(-inputs @ w))
+        assert np.allclose(f.hessian(w)[0], -(inputs.T * p * (1 - p)) @ inputs), "incorrect Hessian evaluation of a numpy objective."
+        # wrong input
+        with pytest.raises(ValueError):
+            f.hessian([1.0])
+
+    def test_taylor(self):
+        """ test Taylor coefficients along a direction """
+        f = AD(lambda x: exp(x))
+        assert np.allclose(f.taylor(0, 1, 4), [1, 1, 1/2, 1/6, 1/24]), "incorrect Taylor coefficients of exp."
+        # t -> f(1 + t, 2 - 2t) with f = (x*y, x**2 + sin(y), 7)
+        f = AD(lambda x, y: [x * y, x**2 + sin(y), 7.0])
+        T = f.taylor([1.0, 2.0], [1.0, -2.0], 3)
+        assert T.shape == (3, 4), "taylor returns a wrong shape."
+        assert np.allclose(T[0], [2, 0, -2, 0]), "incorrect Taylor coefficients of a product."
+        assert np.allclose(T[1], [1 + np.sin(2), 2 - 2*np.cos(2), 1 - 2*np.sin(2), 8*np.cos(2)/6]), "incorrect Taylor coefficients of a sum."
+        assert np.all(T[2] == [7, 0, 0, 0]), "incorrect Taylor coefficients of a constant."
+        # the first two coefficients agree with value and directional derivative
+        assert np.allclose(T[:2, 1], f.grad([1.0, 2.0])[:2] @ [1.0, -2.0]), "Taylor coefficients disagree with grad."
+        # the second coefficient agrees with the Hessian
+        H = f.hessian([1.0, 2.0])
+        assert np.allclose(T[:2, 2], np.einsum('i,kij,j->k', [1.0, -2.0], H[:2], [1.0, -2.0]) / 2), "Taylor coefficients disagree with hessian."
+        with pytest.raises(ValueError):
+            f.taylor([1.0, 2.0], [1.0], 3)
+        with pytest.raises(ValueError):
+            f.taylor([1.0, 2.0], [1.0, 0.0], -1)
+        with pytest.raises(TypeError):
+            f.taylor([1.0, 2.0], [1.0, 0.0], 2.0)
+
+    def test_trace(self):
+        """ test grad replays a recorded trace and falls back to normal evaluation """
+        f = lambda x, y: [sin(x*y) + exp(y)/x, 3.0, x**y]
+        ad, ad_trace = AD(f), AD(f, trace=True)
+        for point in ([1.0, 2.0], [0.5, -1.0], [2.0, 0.3]):
+            assert np.array_equal(ad.grad(point), ad_trace.grad(point)), "replay gives a wrong Jacobian."
+        assert len(ad_trace._plan) > 0, "grad did not record a trace."
+        assert AD(f, trace=True).trace_stats is None
+        ad_cse = AD(lambda x, y: [sin(x*y), x*y + y, cos(x*y)], trace=True)
+        ad_cse.grad([1.0, 2.0])
+        assert ad_cse.trace_stats == {"ops": 4, "fold": 0, "cse": 2, "dead": 0}, "trace is not optimized."
+        assert ad_trace([2.0, 0.3]) == f(2.0, 0.3)
+        # 1 to 1 function keeps the output format
+        assert AD(lambda x: [x**2], trace=True).grad(3) == [6.0]
+        # another branch than the traced one runs the normal way
+        g = AD(lambda x: x**2 if x > 0 else -x, trace=True)
+        assert g.grad(2.0) == 4.0 and g.grad(-2.0) == -1.0 and g.grad(3.0) == 6.0, "trace does not fall back on another branch."
+        # a function that can not be traced runs the normal way
+        h = AD(lambda x: x * x.real, trace=True)
+        assert h.grad(3.0) == 3.0 and h._plan is False, "untraceable function is not run the normal way."
+        # a domain error at the first point is raised and the next point is traced
+        k = AD(lambda x: log(x), trace=True)
+        with pytest.raises(ValueError):
+            k.grad(-1.0)
+        assert k.grad(2.0) == 0.5 and k._plan, "trace is not recorded after a domain error."
+        with pytest.raises(ValueError):
+            k.grad(-1.0)
+        # the reverse mode replays in forward mode
+        assert np.allclose(RAD(f, trace=True).grad([1.0, 2.0]), ad.grad([1.0, 2.0]))
+        with pytest.raises(TypeError):
+            AD(f, trace=1)
+        # generated code
+        ad_compiled = AD(f, trace="compile")
+        assert ad_compiled.source is None
+        assert np.allclose(ad_compiled.grad([1.0, 2.0]), ad.grad([1.0, 2.0])), "generated code gives a wrong Jacobian."
+        assert np.allclose(ad_compiled([0.5, 3.0]), f(0.5, 3.0)) and "def jacobian(v0, v1):" in ad_compiled.source
+        assert AD(lambda x: [x**2], trace="compile").grad(3) == [6.0]
+        g = AD(lambda x: x**2 if x > 0 else -x, trace="compile")
+        assert g(2.0) == 4.0 and g(-2.0) == 2.0 and g.grad(-2.0) == -1.0, "generated code does not fall back on another branch."
+
+    def test_sparse(self):
+        """ test sparsity detection, column coloring and compressed evaluation """
+        # tridiagonal pattern needs 3 colors
+        rows = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4])
+        cols = np.array([0, 1, 0, 1, 2, 1, 2, 3, 2, 3, 4, 3, 4])
+        assert np.all(color_columns(rows, cols, 5) == [0, 1, 2, 0, 1]), "color_columns gives a wrong coloring."
+        n = 30
+        args = ", ".join(f"x{i}" for i in range(n))
+        terms = lambda i: " ".join([f"2*x{i}**2"] + ([f"- x{i-1}*x{i}"] if i else []) + ([f"+ sin(x{i+1})"] if i < n - 1 else []))
+        f = eval(f"lambda {args}: [{', '.join(terms(i) for i in range(n))}, 3.0]")
+        x = np.linspace(0.1, 1, n)
+        dense = AD(f).grad(x)
+        for kwargs in ({}, {"chunk_size": 2}, {"trace": True}, {"trace": "compile"}):
+            f_sparse = AD(f, sparse=True, **kwargs)
+            assert np.allclose(f_sparse.grad(x), dense), "compressed evaluation gives a wrong Jacobian."
+            assert f_sparse._sparsity[3].max() + 1 == 3, "tridiagonal Jacobian does not use 3 colors."
+        rows, cols = AD(f).sparsity(x)
+        assert len(rows) == 3 * n - 2 and np.all(dense[rows, cols] != 0), "sparsity gives a wrong pattern."
+        mask = np.ones_like(dense, dtype=bool)
+        mask[rows, cols] = False
+        assert np.all(dense[mask] == 0), "sparsity misses a nonzero entry."
+        rows, cols, values = AD(f).grad_sparse(x)
+        assert np.array_equal(values, dense[rows, cols]), "grad_sparse gives wrong values."
+        # the pattern is detected again on another branch
+        g = AD(lambda x, y: [x * y, y] if x > 0 else [x, x * y], sparse=True)
+        assert np.array_equal(g.grad([1.0, 2.0]), [[2.0, 1.0], [0.0, 1.0]])
+        assert np.array_equal(g.grad([-1.0, 2.0]), [[1.0, 0.0], [2.0, -1.0]]), "sparsity is not detected again on another branch."
+        # a replayed trace keeps the coloring it was seeded with while the pattern changes with the branch
+        branches = lambda x, y, z: [x * y, z * 2.0] if x > 0 else [x * y * z, z * 2.0]
+        kinks = lambda x, y: max(x, y) * 2 + (x if x > 1 else -x)
+        for trace in (True, "compile"):
+            g = AD(branches, sparse=True, trace=trace)
+            for x in ([1.0, 2.0, 3.0], [-1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [-1.0, 2.0, 3.0]):
+                assert np.allclose(g.grad(x), AD(branches).grad(x)), "sparse replay after a change of branch is wrong."
+            g = AD(kinks, sparse=True, trace=trace)
+            for x in ([2.5, 1.2], [1.3, 2.1], [2.5, 1.2], [0.5, 2.1]):
+                assert np.allclose(g.grad(x), AD(kinks).grad(x)), "sparse replay after a change of branch is wrong."
+        # a function that can not be traced gets a dense pattern
+        h = AD(lambda x, y: [x * x.real, y], sparse=True)
+        assert np.array_equal(h.grad([3.0, 1.0]), [[3.0, 0.0], [0.0, 1.0]]) and len(h.sparsity([3.0, 1.0])[0]) == 4
+        with pytest.raises(ValueError):
+            AD(lambda x, y: log(x) * y, sparse=True).grad([-1.0, 1.0])
+        with pytest.raises(TypeError):
+            AD(f, sparse="yes")
+
+    def test_jvp(self):
+        """ test Jacobian-vector products against grad """
+        f = lambda x, y, z: [x*y*z, sin(x) + exp(y), 3.0]
+        ad = AD(f)
+        x, v = [1.0, 2.0, 0.5], [0.3, -1.0, 2.0]
+        output, tangent = ad.jvp(x, v)
+        assert np.allclose(output, f(*x)) and isinstance(output, list), "jvp gives a wrong value."
+        assert np.allclose(tangent, ad.grad(x) @ v) and tangent.shape == (3,), "jvp gives a wrong directional derivative."
+        # scalar function and np.array output
+        assert AD(lambda x: x**3).jvp(2, 0.5) == (8.0, 6.0)
+        output, tangent = AD(lambda x, y: np.array([x/y])).jvp([1, 2], [1, 1])
+        assert isinstance(output, np.ndarray) and np.allclose(tangent, [0.25])
+        # several directions in one pass
+        V = np.array([[1.0, 0, 0], [0, 1.0, 0], [0, 0, 1.0], v])
+        output, tangents = ad.jvp_batch(x, V)
+        assert tangents.shape == (4, 3) and np.allclose(tangents, V @ ad.grad(x).T), "jvp_batch gives wrong directional derivatives."
+        assert np.allclose(AD(lambda x: x**3).jvp_batch(2, [1, 2])[1], [[12], [24]])
+        with pytest.raises(ValueError):
+            ad.jvp(x, [1.0])
+        with pytest.raises(ValueError):
+            ad.jvp_batch(x, [[1.0, 2.0]])
+        with pytest.raises(TypeError):
+            ad.jvp(x, ["a", 1, 2])
+
+    def test_hvp(self):
+        """ test Hessian-vector products against the Hessian """
+        f = AD(lambda x, y, z: [x**2 * y + sin(y*z), exp(x) / z + sqrt(y), 2.0, x + y])
+        x, v = [0.5, 2.0, 1.5], [1.0, -0.5, 2.0]
+        Hv = f.hvp(x, v)
+        assert Hv.shape == (4, 3), "hvp returns a wrong shape."
+        assert np.allclose(Hv, f.hessian(x) @ v), "hvp disagrees with the Hessian."
+        assert np.allclose(AD(lambda x: x**3).hvp(2.0, 0.5), [[6.0]])
+        # logistic regression loss
+        inputs = np.array([[0.5, 1.0], [-1.5, 0.2], [0.3, -0.7]])
+        loss = AD(lambda w0, w1: -sum(log(logistic(list(np.dot(inputs, np.array([w0, w1])))))))
+        w = np.array([0.3, -0.4])
+        p = 1/(1 + np.exp(-inputs @ w))
+        H = (inputs.T * p * (1 - p)) @ inputs
+        assert np.allclose(loss.hvp(w, [1.0, 2.0])[0], H @ [1.0, 2.0]), "hvp of a loss function is not correct."
+        with pytest.raises(ValueError):
+            f.hvp(x, [1.0, 2.0])
+
+    def test_value_and_grad(self):
+        """ test that value_and_grad matches __call__ and grad with one evaluation """
+        calls = []
+        def g(x, y):
+            calls.append(1)
+            return np.array([x*y, exp(x) - y])
+        for cls in (AD, RAD):
+            for trace in (False, True, "compile"):
+                f = cls(g, trace=trace)
+                calls.clear()
+                value, J = f.value_and_grad([0.5, 2.0])
+                assert len(calls) <= 2, "value_and_grad evaluates the function more than once."
+                assert isinstance(value, np.ndarray) and value.dtype == np.float64
+                assert np.allclose(value, f([0.5, 2.0])), "value_and_grad returns a wrong value."
+                assert np.allclose(J, f.grad([0.5, 2.0])), "value_and_grad returns a wrong gradient."
+        assert AD(lambda x: x**2).value_and_grad(3) == (9.0, 6.0)
+        assert AD(lambda x: [x**2, 1]).value_and_grad(3)[0] == [9.0, 1]
+        assert RAD(lambda x, y: x*y + 1).value_and_grad([2, 3])[0] == 7.0
+        f = AD(lambda x, y: x*y, cache_size=4)
+        f.value_and_grad([2, 3])
+        assert f([2, 3]) == 6.0 and f.value_and_grad([2, 3])[0] == 6.0
+        assert f.cache_stats["hits"] == 2
+        with pytest.raises(TypeError):
+            f.value_and_grad(["a", 1])
+
+    def test_cache(self):
+        """ test the LRU cache of __call__ and grad """
+        calls = []
+        def g(x, y):
+            calls.append(1)
+            return [x*y, sin(x) + y]
+        for cls in (AD, RAD):
+            calls.clear()
+            f = cls(g, cache_size=2)
+            # the output dimension comes from one evaluation
+            assert f.dim_f == 2
+            probes = len(calls)
+            J = f.grad([1, 2])
+            assert np.allclose(f([1, 2]), [2, np.sin(1) + 2]), "grad does not cache the function value."
+            assert isinstance(f([1, 2]), list), "the cached value has the wrong format."
+            J[0, 0] = 100.0
+            assert np.allclose(f.grad([1.0, 2.0]), [[2, 1], [np.cos(1), 1]]), "the cached Jacobian was modified."
+            assert len(calls) - probes == 1, "a cached point was evaluated again."
+            assert f.cache_stats == {"hits": 3, "misses": 1, "size": 1, "max_size": 2}
+            f([3, 4]); f([1, 2]); f([5, 6])
+            assert f.cache_stats["size"] == 2
+            # [3, 4] is the least recently used point and has been evicted
+            f([3, 4])
+            assert f.cache_stats["misses"] == 4 and f.cache_stats["hits"] == 4
+            f.cache_clear()
+            assert f.cache_stats == {"hits": 0, "misses": 0, "size": 0, "max_size": 2}
+        f = AD(lambda x: x**2)
+        f.grad(1); f(1)
+        assert f.cache_stats == {"hits": 0, "misses": 0, "size": 0, "max_size": 0}, "the cache is on by default."
+        assert AD(lambda x: [x**2], cache_size=1).grad(3) == [6.0]
+        # a Jacobian cached by a call with out= has the format of grad() on a hit without it
+        for g, expected in ((lambda x: x**2, 6.0), (lambda x: [x**2], [6.0])):
+            f = AD(g, cache_size=4)
+            J = np.empty((1, 1))
+            assert f.grad(3.0, out=J) is J and J[0, 0] == 6.0
+            J[0, 0] = 0.0
+            for J_hit in (f.grad(3.0), f.value_and_grad(3.0)[1]):
+                assert np.shape(J_hit) == np.shape(expected) and isinstance(J_hit, list) == isinstance(expected, list) and J_hit == expected, "a cache hit has the format of out=."
+            assert f.grad(3.0, out=J) is J and J[0, 0] == 6.0 and f.cache_stats["hits"] == 3
+        with pytest.raises(TypeError):
+            AD(lambda x: x, cache_size=1.5)
+        with pytest.raises(ValueError):
+            AD(lambda x: x, cache_size=-1)
+
+    def test_unchecked(self):
+        """ test the entry points take x_vec as it is inside unchecked() """
+        f = AD(lambda x, y: [log(x) * y, sqrt(x + y)])
+        g = AD(lambda x: x**2, cache_size=4)
+        with unchecked():
+            assert np.allclose(f([2, 1]), [np.log(2), np.sqrt(3)])
+            assert np.allclose(f.grad(np.array([2.0, 1.0])), [[0.5, np.log(2)], [0.5/np.sqrt(3), 0.5/np.sqrt(3)]])
+            assert np.allclose(f.value_and_grad((2.0, 1.0))[1], f.grad([2.0, 1.0]))
+            with np.errstate(all="ignore"):
+                assert np.isnan(f([1.0, -2.0])[1]), "the domain of sqrt is checked inside unchecked()"
+            assert g(3) == 9 and g.grad(np.array([3.0])) == 6.0 and g.grad([3]) == 6.0
+            assert np.allclose(f(np.array([[2.0, 1.0], [3.0, 1.0]]))[:, 1], [np.sqrt(3), 2.0])
+            # a traced function is not recorded outside the domain and runs unchecked there
+            h = AD(lambda x: log(x) + sqrt(x), trace=True)
+            with np.errstate(all="ignore"):
+                assert np.isnan(h.grad(-1.0)) and np.isclose(h.grad(4.0), 0.5) and h._plan, "tracing fails inside unchecked()"
+        with pytest.raises(ValueError):
+            f([1.0, -2.0])
+        with pytest.raises(TypeError):
+            f.grad(["a", 1])
+
+    def test_declared_dims(self):
+        """ test the constructor does not evaluate the function and the lazy output dimension """
+        calls = []
+        def g(x, y):
+            calls.append(1)
+            return [sqrt(x - 1) * y, y]
+        # undefined at (1, 1), the probe of old versions raised a ValueError here
+        f = AD(g)
+        assert calls == [], "the constructor evaluates the function."
+        assert np.allclose(f.grad([5, 2]), [[0.5, 2], [0, 1]]) and f.dim_f == 2 and f.output_kind == "list"
+        assert len(calls) == 2, "the first grad evaluates the function more than once for its output dimension."
+        # the output dimension is cached for the code of g
+        calls.clear()
+        f = RAD(g)
+        assert f.dim_f == 2 and calls == []
+        assert f([5, 2]) == [4.0, 2] and calls == [1]
+        # the output dimension of a function of *x or of a vector x depends on dim_x, it is cached per dim_x
+        fn = lambda *x: list(x)
+        assert np.allclose(AD(fn, dim_x=3).grad([1, 2, 3]), np.eye(3))
+        f = AD(fn, dim_x=5)
+        assert np.allclose(f.grad([1, 2, 3, 4, 5]), np.eye(5)) and f.dim_f == 5, "dim_f of another dim_x is reused."
+        fv = lambda x: x * 2.0
+        assert AD(fv, dim_x=2, vector_input=True).grad([1, 2]).shape == (2, 2)
+        assert AD(fv, dim_x=4, vector_input=True).grad([1, 2, 3, 4]).shape == (4, 4)
+        # declared
+        f = AD(lambda *x: np.array([x[0] * x[1], x[2]]), dim_x=3, dim_f=2, output_kind="array")
+        assert f.dim_x == 3 and f.dim_f == 2 and f.output_kind == "array"
+        assert np.allclose(f.grad([1, 2, 3]), [[2, 1, 0], [0, 0, 1]])
+        f = AD(lambda x: log(x - 1), output_kind="scalar")
+        assert f.dim_f == 1 and str(f) == "AutoDiff has a R^1 to R^1 function" and f.grad(2) == 1.0
+        # the first call finds the output
+        f = AD(lambda x, y: [x, y, x*y])
+        assert np.allclose(f([1, 2]), [1, 2, 2]) and f.dim_f == 3 and f.output_kind == "list"
+        assert AD(lambda x: [x, 2*x]).grad_batch(np.array([1.0, 2.0])).shape == (2, 2, 1)
+        with pytest.raises(TypeError):
+            AD(lambda x: "p")(1)
+        with pytest.raises(ValueError):
+            AD(lambda x: [x, x], dim_f=3).output_kind
+        with pytest.raises(ValueError):
+            AD(lambda x, y: x, dim_x=3)
+        with pytest.raises(ValueError):
+            AD(lambda x: x, output_kind="tuple")
+        with pytest.raises(ValueError):
+            AD(lambda x: x, dim_f=2, output_kind="scalar")
+        with pytest.raises(TypeError):
+            AD(lambda x: x, dim_f=1.0)
+        with pytest.raises(TypeError):
+            AD(lambda: 1)
+
+    def test_vector_input(self):
+        """ test functions of a single array argument """
+        rng = np.random.default_rng(1)
+        A = rng.normal(size=(6, 40))
+        y = rng.random(6) > 0.5
+        def loss(w):
+            p = logistic(A @ w)
+            return -np.sum(log(p * y + (1 - p) * (1 - y))) + 0.5 * np.sum(w * w)
+        w = rng.normal(size=40) * 0.1
+        p = 1/(1 + np.exp(-A @ w))
+        gradient = A.T @ (p - y) + w
+        for chunk_size in (None, 7):
+            f = AD(loss, dim_x=40, vector_input=True, chunk_size=chunk_size)
+            value, J = f.value_and_grad(w)
+            assert J.shape == (1, 40) and np.allclose(J[0], gradient), "gradient of a vector_input function is wrong."
+            assert np.isclose(value, loss(w)) and np.isclose(f(w), value) and np.isclose(f(list(w)), value)
+        f = AD(lambda x: [x[0] * x[1], np.sum(sin(x)), 2.0], dim_x=3, vector_input=True)
+        x = [1.0, 2.0, 3.0]
+        assert np.allclose(f.grad(x), [[2, 1, 0], np.cos(x), [0, 0, 0]]) and f.dim_f == 3
+        assert np.allclose(f.hessian(x)[1], np.diag(-np.sin(x))), "hessian of a vector_input function is wrong."
+        assert np.allclose(f.jvp(x, [0, 1, 0])[1], [1, np.cos(2), 0])
+        assert np.allclose(RAD(lambda x: x[0] * x[1] + np.sum(exp(x)), dim_x=2, vector_input=True).grad([0.0, 1.0]), [[2, np.e]])
+        assert AD(lambda x: x[0]**2, dim_x=1, vector_input=True).grad(3) == 6.0
+        with pytest.raises(ValueError):
+            f(np.ones(4))
+        with pytest.raises(ValueError):
+            f.grad_batch(np.ones((2, 3)))
+        with pytest.raises(ValueError):
+            AD(lambda x: np.sum(x), vector_input=True)
+        with pytest.raises(ValueError):
+            AD(lambda x, y: x, dim_x=2, vector_input=True)
+        with pytest.raises(ValueError):
+            AD(lambda x: np.sum(x), dim_x=2, vector_input=True, trace=True)
+
+    def test_out_buffers(self):
+        """ test grad() and value_and_grad() write into out= and value_out= and reuse their workspace """
+        g = lambda x, y, z: [x * y, sin(z) + 1, 2.0, exp(x) / z]
+        J = np.empty((4, 3))
+        v = np.empty(4)
+        for f in (AD(g), AD(g, chunk_size=2), AD(g, sparse=True), AD(g, trace=True), AD(g, cache_size=4), RAD(g)):
+            for x in ([1.0, 2.0, 3.0], [0.5, -1.0, 2.0], [1.0, 2.0, 3.0]):
+                J.fill(np.nan)
+                value, Jacobian = f.value_and_grad(x, out=J, value_out=v)
+                assert Jacobian is J and value is v, "value_and_grad() does not return its buffers."
+                assert np.allclose(J, AD(g).grad(x)) and np.allclose(v, g(*x)), "buffers of value_and_grad() are not correct."
+                assert f.grad(x, out=J) is J and np.allclose(J, AD(g).grad(x))
+        # a 1 to 1 mapping writes its (1, 1) Jacobian
+        J1 = np.empty((1, 1))
+        f = AD(lambda x: x ** 2, cache_size=2)
+        assert f.grad(3.0, out=J1) is J1 and J1[0, 0] == 6.0 and f.grad(3.0) == 6.0
+        assert f.grad(3.0, out=J1) is J1 and J1[0, 0] == 6.0, "out= of a cached 1 to 1 mapping is not correct."
+        v1 = np.empty(1)
+        assert f.value_and_grad(3.0, value_out=v1)[0] is v1 and v1[0] == 9.0 and f(3.0) == 9.0, "value_out= changed the cached value."
+        # vector_input functions and Parameters
+        f = AD(lambda w: np.sum(w * w) + w[0], dim_x=50, vector_input=True, chunk_size=16)
+        J = np.empty((1, 50))
+        for w in (np.ones(50), np.arange(50.0)):
+            assert f.grad(w, out=J) is J and np.allclose(J[0], 2 * w + np.eye(50)[0])
+        from AutoDiff.Parameters import Parameters
+        p = Parameters({"W": np.ones((2, 2)), "b": 1.0})
+        gradient = AD(lambda p: np.sum(p["W"]) * p["b"], parameters=p).grad(p, out=J[:, :5])
+        assert np.shares_memory(gradient["W"], J) and np.all(gradient["W"] == 1.0) and gradient["b"] == 4.0, "gradient of Parameters is not a view into out."
+        # the workspace follows a change of chunk_size
+        f = AD(g)
+        f.grad([1.0, 2.0, 3.0])
+        f.chunk_size = 1
+        assert np.allclose(f.grad([0.5, -1.0, 2.0]), AD(g).grad([0.5, -1.0, 2.0]))
+        with pytest.raises(ValueError):
+            AD(g).grad([1.0, 2.0, 3.0], out=np.empty((3, 4)))
+        with pytest.raises(ValueError):
+            AD(g).grad([1.0, 2.0, 3.0], out=np.empty((3, 4)).T)
+        with pytest.raises(TypeError):
+            AD(g).grad([1.0, 2.0, 3.0], out=np.empty((4, 3), dtype=np.float32))
+        with pytest.raises(ValueError):
+            AD(g).grad([1.0, 2.0, 3.0], value_out=np.empty(3))
+
+    def test_accumulate(self):
+        """ test loss functions that sum their terms with an Accumulator or fsum """
+        def loss(*w):
+            total = accumulator(w[0] ** 2)
+            for i, w_i in enumerate(w[1:], 1):
+                total += (w_i - i) ** 2
+            total *= 0.5
+            return total
+        w = [0.5 * i + 0.25 for i in range(20)]
+        for f in (AD(loss, dim_x=20), AD(loss, dim_x=20, chunk_size=3)):
+            value, J = f.value_and_grad(w)
+            assert np.isclose(value, 0.5 * sum((0.25 - 0.5 * i) ** 2 for i in range(20))), "value of an accumulated loss is wrong."
+            assert np.allclose(J[0], [0.25 - 0.5 * i for i in range(20)]), "gradient of an accumulated loss is wrong."
+        f = AD(lambda *w: fsum(w_i ** 2 for w_i in w) + fsum([w[0], 1.0]), dim_x=20)
+        assert np.allclose(f.grad(w)[0], 2 * np.array(w) + np.eye(20)[0]), "gradient of an fsum loss is wrong."
+        assert np.allclose(f.hessian(w), 2 * np.eye(20)), "hessian of an fsum loss is wrong."
+        assert np.allclose(AD(loss, dim_x=20).hessian(w), np.eye(20)), "hessian of an accumulated loss is wrong."
+        assert np.allclose(RAD(loss, dim_x=20).grad(w), AD(loss, dim_x=20).grad(w)), "reverse mode gradient of an accumulated loss is wrong."
+
+class TestRAutoDiff:
+    """Test class for the reverse mode RAutoDiff"""
+
+    def test_grad_matches_forward(self):
+        """ test that reverse mode returns the forward mode Jacobian in the same layout """
+        functions = [
+            (lambda x: x**2, 10.0),
+            (lambda x: [x**2], 10.0),
+            (lambda x: np.array([x**2]), [1.0]),
+            (lambda x: np.array([x**2, sin(x), 2.0]), 1.0),
+            (lambda x, y: x**2 + sin(y), [1.0, 2.0]),
+            (lambda x, y: [x*y], [2.0, 3.0]),
+            (lambda x, y, z: [log10(1/x), sin(x), x**y, z, 3.0], [5, 5, 3]),
+            (lambda x, y, z: np.array([tanh(x*y) / z, logistic(x) ** z, sqrt(y) - arctan(z)]), [0.3, 2.0, 1.5]),
+        ]
+        for f, x_vec in functions:
+            forward, reverse = AD(f).grad(x_vec), RAD(f).grad(x_vec)
+            assert type(forward) == type(reverse), "reverse mode gradient has a different type than forward mode."
+            assert np.allclose(forward, reverse), "incorrect gradient evaluation in reverse mode."
+            assert np.shape(forward) == np.shape(reverse), "reverse mode gradient has a different shape than forward mode."
+
+    def test_grad_numpy_objective(self):
+        """ test a loss function built from np.dot and np.sum on object arrays """
+        inputs = np.array([[0.52, 1.12, 0.77], [0.88, -1.08, 0.15]])
+        def loss(w0, w1, w2):
+            return np.sum(tanh(np.dot(inputs, np.array([w0, w1, w2]))) ** 2)
+        x_vec = [0.1, -0.2, 0.3]
+        assert np.allclose(RAD(loss).grad(x_vec), AD(loss).grad(x_vec)), "incorrect gradient evaluation in reverse mode."
+        assert RAD(loss)(x_vec) == AD(loss)(x_vec), "incorrect function evaluation in reverse mode."
+
+    def test_input_validation(self):
+        """ test that reverse mode validates the input as forward mode """
+        f = RAD(lambda x, y: x*y)
+        assert str(f) == "RAutoDiff has a R^2 to R^1 function", "RAutoDiff.__str__() is not implemented correctly."
+        with pytest.raises(ValueError):
+            f.grad([1.0])
+        with pytest.raises(TypeError):
+            f.grad(np.array([1, "p"]))
+        with pytest.raises(TypeError):
+            RAD(lambda x: x).grad("p")
+
@@ -0,0 +1,78 @@
+import sys
+sys.path.append('../')
+from AutoDiff.DualArray import DualArray
+from AutoDiff.ElementFunction import *
+import pytest
+import numpy as np
+
+
+class TestDualArray:
+    """Test class for DualArray types"""
+
+    def test_init(self):
+        """test real and dual parts are stored as float64 arrays"""
+        x1 = DualArray([1, 2])
+        assert x1.real.dtype == np.float64 and np.all(x1.dual == 1.0), "DualArray is not initialized correctly"
+        x2 = DualArray([1.0, 2.0], [0.5, 0.0])
+        assert np.all(x2.dual == [0.5, 0.0]) and x2.shape == (2,) and len(x2) == 2, "DualArray is not initialized correctly"
+        x3 = DualArray([1.0, 2.0], np.eye(2))
+        assert x3.dual.shape == (2, 2), "DualArray with tangent vectors is not initialized correctly"
+        with pytest.raises(ValueError):
+            DualArray([1.0, 2.0], [1.0, 2.0, 3.0])
+        with pytest.raises(TypeError):
+            DualArray(["a", "b"])
+
+    def test_arithmetic(self):
+        """test the overloaded operators against DualNumber rules"""
+        x = DualArray([1.0, 2.0], [1.0, 0.5])
+        y = DualArray([3.0, 4.0], [0.0, 2.0])
+        z = x * y + x / y - y ** 2 + 2 ** x - (-x) + 1 - 3 * x
+        real = np.array([1*3 + 1/3 - 9 + 2 + 1 + 1 - 3, 2*4 + 2/4 - 16 + 4 + 2 + 1 - 6])
+        dual = np.array([3 + 1/3 + 2*np.log(2) + 1 - 3,
+                         0.5*4 + 2*2 + (0.5*4 - 2*2)/16 - 2*4*2 + 4*np.log(2)*0.5 + 0.5 - 1.5])
+        assert np.allclose(z.real, real) and np.allclose(z.dual, dual), "DualArray arithmetic is not implemented correctly"
+        w = x ** y
+        assert np.allclose(w.dual, [3*1**2*1.0, 4*2**3*0.5 + 16*np.log(2)*2]), "DualArray __pow__ is not implemented correctly"
+        """test comparisons act on real parts"""
+        assert np.all((x < y) == [True, True]) and np.all((x == 1.0) == [True, False]), "DualArray comparisons failed"
+        """test tangent vectors of different lengths cannot be combined"""
+        with pytest.raises(ValueError):
+            DualArray([1.0], [[1.0, 0.0]]) + DualArray([1.0], [[1.0, 0.0, 0.0]])
+
+    def test_element_functions(self):
+        """test the elementary functions dispatch to one vectorized call"""
+        r = np.array([0.2, 0.4, 0.6])
+        x = DualArray(r, [1.0, 2.0, 3.0])
+        for f, df in [(sin, np.cos), (cos, lambda t: -np.sin(t)), (exp, np.exp), (log, lambda t: 1/t),
+                      (tanh, lambda t: 1 - np.tanh(t)**2), (sqrt, lambda t: 0.5/np.sqrt(t)),
+                      (arctan, lambda t: 1/(1 + t**2)), (logistic, lambda t: np.exp(-t)/(1 + np.exp(-t))**2)]:
+            y = f(x)
+            assert isinstance(y, DualArray), "elementary function of a DualArray should be a DualArray"
+            assert np.allclose(y.dual, df(r) * [1.0, 2.0, 3.0]), f"Function {f.__name__}() with DualArray failed"
+        """test numpy ufuncs dispatch to the same rules"""
+        assert np.allclose(np.sin(x).real, np.sin(r)) and np.allclose(np.exp(x).dual, np.exp(r) * [1.0, 2.0, 3.0]), "np ufunc on DualArray failed"
+        """test domain checks are vectorized"""
+        with pytest.raises(ValueError):
+            log(DualArray([1.0, -1.0]))
+        with pytest.raises(ValueError):
+            sqrt(DualArray([1.0, 0.0]))
+
+    def test_numpy_functions(self):
+        """test np.dot, np.sum, np.mean, np.stack and indexing"""
+        inputs = np.array([[0.52, 1.12, 0.77], [0.88, -1.08, 0.15]])
+        w = DualArray([0.1, 0.2, 0.3], np.eye(3))
+        loss = np.sum(log(logistic(np.dot(inputs, w))))
+        expected = np.dot(1 - 1/(1 + np.exp(-inputs @ w.real)), inputs)
+        assert np.allclose(loss.dual, expected), "np.dot/np.sum on DualArray failed"
+        assert np.allclose((inputs @ w).real, inputs @ w.real), "np.matmul on DualArray failed"
+        assert np.allclose(np.dot(w, w).dual, 2 * w.real), "np.dot of two DualArrays failed"
+        assert np.allclose(np.mean(w).dual, [1/3, 1/3, 1/3]), "np.mean on DualArray failed"
+        s = np.stack([w, w.real])
+        assert s.shape == (2, 3) and np.all(s.dual[1] == 0), "np.stack on DualArray failed"
+        assert np.all(w[1:].dual == np.eye(3)[1:]) and w[0].shape == (), "DualArray indexing failed"
+        w[0] = 5.0
+        assert w.real[0] == 5.0 and np.all(w.dual[0] == 0), "DualArray item assignment failed"
+        m = np.reshape(DualArray(np.arange(6.0), np.eye(6)), (2, 3))
+        assert m.shape == (2, 3) and np.all(m.dual[1, 0] == np.eye(6)[3]), "np.reshape on DualArray failed"
+        assert m.T.shape == (3, 2) and np.all(np.transpose(m).dual[0, 1] == np.eye(6)[3]), "transpose of DualArray failed"
+        assert m.reshape(-1).shape == (6,) and m.transpose(1, 0).shape == (3, 2)
@@ -1,6 +1,6 @@
 import sys
 sys.path.append('../')
-from AutoDiff.DualNumber import DualNumber
+from AutoDiff.DualNumber import DualNumber, Accumulator, accumulator, fsum, unchecked
 import pytest
 import sys
 import numpy as np
@@ -173,7 +173,7 @@ class TestDualNumber:
         assert x8.real == 19.6 and x8.dual == 13.2, "DualNumber __truediv__  for dual is not implemented correctly"
         x9 = DualNumber(5.5, 5)
         x9 /=DualNumber(6, 10)
-        assert x9.real == (5.5/6) and x9.dual == (-25/36), "DualNumber __truediv__  for dual is not implemented correctly"
+        assert x9.real == (5.5/6) and np.isclose(x9.dual, -25/36, rtol=1e-15), "DualNumber __truediv__  for dual is not implemented correctly"
         """test division by zero"""
         try:
             x1/0
@@ -298,3 +298,131 @@ class TestDualNumber:
         assert x6 >= x4, "__ge__ is not working correctly"
         assert x7 >= x4, "__ge__ is not working correctly"
         assert x4 >= x8, "__gt__ is not working correctly"
+
+    def test_vector_dual(self):
+        """test multi-directional DualNumber whose dual part is a tangent vector"""
+        x = DualNumber(3, np.array([1.0, 0.0]))
+        y = DualNumber(2, np.array([0.0, 1.0]))
+        z = x * y + x / y - y ** 2
+        assert z.real == 6 + 1.5 - 4, "vector-mode DualNumber real part is not computed correctly"
+        assert np.allclose(z.dual, [2 + 0.5, 3 - 0.75 - 4]), "vector-mode DualNumber dual part is not computed correctly"
+        w = x ** y
+        assert np.allclose(w.dual, [2 * 3, 9 * np.log(3)]), "vector-mode DualNumber __pow__ is not implemented correctly"
+        # the tangent of a quotient does not square the denominator, which would overflow or underflow
+        for b in (1e200, 1e-200):
+            u = DualNumber(1.0, np.array([1.0, 0.0])) / DualNumber(b, np.array([0.0, b]))
+            assert u.real == 1 / b and np.allclose(u.dual, [1 / b, -1 / b], rtol=1e-12, atol=0), "vector-mode DualNumber __truediv__ loses precision"
+            v = Accumulator(1.0, np.array([1.0, 0.0]))
+            v /= DualNumber(b, np.array([0.0, b]))
+            assert np.allclose(v.dual, u.dual, rtol=1e-12, atol=0), "Accumulator /= loses precision"
+        v = 1.0 / DualNumber(1e155, np.array([1.0, 2.0]))
+        assert np.allclose(v.dual, [-1e-310, -2e-310], rtol=1e-9, atol=0), "vector-mode DualNumber __rtruediv__ loses precision"
+        """test invalid tangent vectors"""
+        with pytest.raises(TypeError):
+            DualNumber(1, np.array([[1.0, 0.0]]))
+        with pytest.raises(TypeError):
+            DualNumber(1, np.array(["a", "b"]))
+
+    def test_slots_and_fast_paths(self):
+        """test DualNumber stores only its real and dual parts"""
+        x = DualNumber(3, 2)
+        assert not hasattr(x, "__dict__"), "DualNumber should be slotted"
+        with pytest.raises(AttributeError):
+            x.other = 1
+        """test scalar operands keep int/float parts and unsupported operands raise TypeError"""
+        y = 2 * x + 1
+        assert y.real == 7 and y.dual == 4 and isinstance(y.real, int), "DualNumber scalar fast path is not implemented correctly"
+        for bad in ["p", [1, 2], (1,), None]:
+            with pytest.raises(TypeError):
+                x + bad
+            with pytest.raises(TypeError):
+                bad * x
+        """test numpy arrays broadcast over DualNumber operands"""
+        z = x + np.array([1.0, 2.0])
+        assert z[0].real == 4.0 and z[1].real == 5.0 and z[1].dual == 2, "DualNumber with np.array operand failed"
+
+    def test_nested_dual(self):
+        """test nested DualNumbers carry second derivatives"""
+        x = DualNumber(DualNumber(2.0, 1.0), DualNumber(1.0, 0.0))
+        y = x ** 3 / x + 1 / x
+        assert y.real.real == 4.5, "nested DualNumber real part is not computed correctly"
+        assert np.isclose(y.dual.real, 2 * 2.0 - 1 / 4) and np.isclose(y.dual.dual, 2 + 2 / 8), "nested DualNumber second derivative is not computed correctly"
+        z = 2 ** x
+        assert np.isclose(z.dual.dual, 4 * np.log(2) ** 2), "nested DualNumber __rpow__ is not implemented correctly"
+        w = x ** x
+        assert np.isclose(w.dual.dual, 4 * ((np.log(2) + 1) ** 2 + 1 / 2)), "nested DualNumber __pow__ is not implemented correctly"
+        """test numpy ufuncs call the elementary functions"""
+        v = np.exp(DualNumber(1.0, 2.0))
+        assert np.isclose(v.real, np.e) and np.isclose(v.dual, 2 * np.e), "np.exp on DualNumber failed"
+        u = np.sin(np.array([DualNumber(0.0, 1.0), DualNumber(1.0, 1.0)]))
+        assert np.isclose(u[1].dual, np.cos(1.0)), "np.sin on an object array of DualNumbers failed"
+        """test modulo"""
+        m = DualNumber(7, 2) % 3
+        assert m.real == 1 and m.dual == 2, "DualNumber __mod__ is not implemented correctly"
+
+    def test_unchecked(self):
+        """test the constructor skips its type checks inside unchecked()"""
+        with unchecked():
+            x = DualNumber(np.float32(1.5), [1.0])
+            with unchecked():
+                pass
+            DualNumber("a")
+        assert x.real == 1.5 and x.dual == [1.0]
+        with pytest.raises(TypeError):
+            DualNumber("a")
+
+    def test_accumulator(self):
+        """test the in-place operators of Accumulator and that ordinary DualNumbers are never mutated"""
+        x = DualNumber(2.0, np.array([1.0, 0.0]))
+        y = DualNumber(3.0, np.array([0.0, 1.0]))
+        # += on a DualNumber rebinds, the object it referred to keeps its value
+        total = x
+        total += y
+        assert total is not x and x.real == 2.0 and np.all(x.dual == [1.0, 0.0]), "+= mutated a DualNumber"
+        acc = Accumulator(x)
+        alias = acc
+        acc += y
+        acc *= x
+        acc /= y
+        acc -= 1
+        acc += 2.5
+        acc *= 2
+        acc /= 4
+        expected = ((((x + y) * x) / y - 1) + 2.5) * 2 / 4
+        assert alias is acc and isinstance(acc, Accumulator), "in-place operators did not update the Accumulator"
+        assert np.isclose(acc.real, expected.real) and np.allclose(acc.dual, expected.dual), "in-place operators are not correct"
+        assert x.real == 2.0 and np.all(x.dual == [1.0, 0.0]), "Accumulator shares the dual part of its start value"
+        # results computed from an Accumulator do not see its later updates
+        snapshot, plus, shifted = acc.snapshot(), +acc, acc + 1
+        acc += x
+        assert type(snapshot) is DualNumber and type(plus) is DualNumber and type(shifted) is DualNumber
+        assert np.allclose(snapshot.dual, expected.dual) and np.allclose(plus.dual, expected.dual) and np.allclose(shifted.dual, expected.dual), "result shares the dual part of an Accumulator"
+        # the operand may be the Accumulator itself, and the dual parts may be scalars or nested
+        acc = Accumulator(2.0, 1.0)
+        acc *= acc
+        assert acc.real == 4.0 and acc.dual == 4.0
+        acc /= acc
+        assert acc.real == 1.0 and acc.dual == 0.0
+        acc = Accumulator(DualNumber(DualNumber(2.0, 1.0), DualNumber(1.0, 0.0)))
+        acc *= acc
+        assert acc.real.real == 4.0 and acc.dual.real == 4.0 and acc.dual.dual == 2.0, "nested Accumulator is not correct"
+        assert Accumulator().real == 0.0 and Accumulator().dual == 0.0
+        assert type(accumulator(x)) is Accumulator and accumulator(x) is not x and accumulator(1.5) == 1.5
+        with pytest.raises(TypeError):
+            acc += "a"
+        with pytest.raises(TypeError):
+            Accumulator("a")
+
+    def test_fsum(self):
+        """test fsum against a sum with +"""
+        terms = [DualNumber(0.1 * i, np.array([i, 1.0])) for i in range(10)] + [DualNumber(1.0, 2.0), 3, 0.5]
+        s = fsum(terms)
+        expected = sum(terms)
+        assert np.isclose(s.real, expected.real) and np.allclose(s.dual, expected.dual), "fsum is not correct"
+        assert fsum([0.1] * 10) == 1.0 and fsum(DualNumber(0.1, 1.0) for _ in range(10)).real == 1.0, "fsum is not exactly rounded"
+        assert fsum([]) == 0.0 and fsum([DualNumber(1.0, 2.0), DualNumber(0.5, 1.0)]).dual == 3.0
+        # nested DualNumbers are added with +
+        n = fsum([DualNumber(DualNumber(1.0, 1.0), 1.0), DualNumber(2.0, 1.0)])
+        assert n.real.real == 3.0 and n.dual == 2.0
+        # the terms are not modified
+        assert np.all(terms[1].dual == [1.0, 1.0])
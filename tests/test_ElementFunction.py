@@ -1,7 +1,8 @@
 import sys
 sys.path.append('../')
 from AutoDiff.ElementFunction import *
-from AutoDiff.DualNumber import DualNumber
+from AutoDiff.DualNumber import DualNumber, unchecked
+from unittest import mock
 import pytest
 import numpy as np
 
@@ -489,3 +490,63 @@ class TestElementFunction:
         with pytest.raises(TypeError):
             logistic([1,"p",3.5])
     
+
+    def test_with_array(self):
+        x = np.array([[0.5, 1.0], [2.0, 3.0]])
+        for f, f_np in [(sin, np.sin), (cos, np.cos), (exp, np.exp), (sqrt, np.sqrt), (log, np.log),
+                        (log10, np.log10), (tanh, np.tanh), (arctan, np.arctan)]:
+            y = f(x)
+            assert isinstance(y, np.ndarray) and y.shape == x.shape and np.allclose(y, f_np(x)), f"Function {f.__name__}() with array input failed"
+        assert np.allclose(logBase(2, np.array([1, 2, 8])), [0, 1, 3]), "Function logBase() with int array input failed"
+        with pytest.raises(ValueError):
+            log(np.array([1.0, 0.0]))
+        with pytest.raises(ValueError):
+            sqrt(np.array([[1.0], [-1.0]]))
+        with pytest.raises(ValueError):
+            tan(np.array([0.0, np.pi/2]))
+
+    def test_with_mixed_vector(self):
+        x_vec = [1.5, DualNumber(1, 2), 2, DualNumber(DualNumber(3, 1), 1)]
+        y_vec = sin(x_vec)
+        assert isinstance(y_vec, list) and len(y_vec) == 4, "Function sin() with mixed vector input failed"
+        assert y_vec[0] == np.sin(1.5) and y_vec[2] == np.sin(2)
+        assert np.allclose(y_vec[1].real, np.sin(1)) and np.allclose(y_vec[1].dual, np.cos(1) * 2)
+        # nested DualNumber: the second derivative of sin(x) is -sin(x)
+        assert np.allclose(y_vec[3].dual.dual, -np.sin(3))
+        y_vec = log(np.array([2.0, DualNumber(3, 2)], dtype=object))
+        assert isinstance(y_vec, np.ndarray) and np.allclose(y_vec[1].dual, 2/3), "Function log() with object array input failed"
+        with pytest.raises(ValueError):
+            log([1.0, DualNumber(-1, 1)])
+        with pytest.raises(ValueError):
+            sqrt([DualNumber(1, 1), -2.0])
+
+    def test_backends(self):
+        # python floats go to the math backend and stay python floats
+        assert type(sin(0.5)) is float and type(sin(DualNumber(0.5)).real) is float, "math backend not used for floats"
+        assert sin(np.float32(0.5)) == pytest.approx(np.sin(0.5))
+        # where math raises, the NumPy backend gives the usual inf/nan
+        with np.errstate(all="ignore"):
+            assert exp(1000.0) == np.inf and logistic(-1000.0) == 0.0
+            assert np.isnan(arcsin(2.0)) and np.isnan(arcsin(DualNumber(2.0)).dual)
+        # tanh and logistic take their derivative from the value
+        assert tanh(DualNumber(400.0)).dual == 0.0, "derivative of tanh overflows"
+        y = logistic(DualNumber(30.0))
+        assert np.isclose(y.dual, np.exp(-30)/(1+np.exp(-30))**2, rtol=0, atol=1e-15), "derivative of logistic failed"
+        # both backends agree
+        x = np.linspace(-0.9, 0.9, 7)
+        for f in (sin, cos, tan, arcsin, arccos, arctan, exp, sinh, cosh, tanh, logistic):
+            assert np.allclose(f(x), [f(float(x_i)) for x_i in x]), f"backends of {f.__name__}() disagree"
+            duals = f([DualNumber(float(x_i), 1.0) for x_i in x])
+            assert np.allclose([y.dual for y in duals], [f(DualNumber(float(x_i), 1.0)).dual for x_i in x])
+
+    def test_unchecked(self):
+        # the domain checks are skipped and NaN/inf propagate
+        with unchecked(), np.errstate(all="ignore"):
+            assert np.isnan(log(-1.0)) and np.isnan(sqrt(DualNumber(-4.0, 1.0)).real)
+            assert log(np.array([0.0, 1.0]))[0] == -np.inf and np.isnan(logBase(2, [-2.0])[0])
+            assert np.isfinite(tan(np.pi/2))
+        with pytest.raises(ValueError):
+            log(-1.0)
+        # on a number or a DualNumber, unchecked() skips the call of the domain check altogether
+        with unchecked(), mock.patch("AutoDiff.ElementFunction._Rule.check", side_effect=AssertionError("checked")):
+            assert sqrt(4.0) == 2.0 and sqrt(DualNumber(4.0, 1.0)).dual == 0.25
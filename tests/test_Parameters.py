@@ -0,0 +1,86 @@
+import sys
+sys.path.append('../')
+from AutoDiff.Parameters import Parameters
+from AutoDiff.AutoDiff import AutoDiff, RAutoDiff
+from AutoDiff.DualArray import DualArray
+from AutoDiff.ElementFunction import *
+import pytest
+import numpy as np
+
+
+class TestParameters:
+    """Test class for Parameters types"""
+
+    def test_init(self):
+        """test the leaves are views into one flat buffer"""
+        W = np.arange(6.0).reshape(2, 3)
+        p = Parameters({"layers": [{"W": W, "b": np.array([6.0, 7.0])}], "scale": (8, np.float32(9.0))})
+        assert p.size == 10 and p.flat.dtype == np.float64 and np.all(p.flat == np.arange(10.0)), "flat buffer is not correct"
+        assert isinstance(p.tree["scale"], tuple) and p["layers"][0]["W"].shape == (2, 3) and p["scale"][0].shape == ()
+        assert np.shares_memory(p["layers"][0]["W"], p.flat) and not np.shares_memory(W, p.flat), "leaves are not views"
+        p["layers"][0]["W"][1, 2] = -1.0
+        p.flat[9] = 0.5
+        assert p.flat[5] == -1.0 and p["scale"][1] == 0.5, "leaves and the flat buffer are not the same memory"
+        assert len(p) == 2 and isinstance(repr(p), str) and isinstance(str(p), str)
+        with pytest.raises(TypeError):
+            Parameters({"W": "a"})
+        with pytest.raises(TypeError):
+            Parameters([np.array(["a"]), True])
+        with pytest.raises(ValueError):
+            Parameters({"W": np.zeros(0)})
+
+    def test_layout(self):
+        """test view(), like() and copy() reuse the layout without copies"""
+        p = Parameters([np.zeros((2, 2)), 0.0])
+        W, c = p.view(np.arange(5.0))
+        assert np.all(W == [[0.0, 1.0], [2.0, 3.0]]) and c == 4.0
+        x = DualArray(np.arange(5.0), np.eye(5))
+        W, c = p.view(x)
+        assert isinstance(W, DualArray) and W.shape == (2, 2) and np.all(W.dual[1, 0] == np.eye(5)[2]), "view of a DualArray is not correct"
+        g = p.like(np.ones(5))
+        assert np.shares_memory(g[0], g.flat) and np.all(g[0] == 1.0)
+        q = p.copy()
+        q.flat[0] = 1.0
+        assert p.flat[0] == 0.0 and q[0][0, 0] == 1.0, "copy() shares the buffer"
+        with pytest.raises(ValueError):
+            p.view(np.zeros(4))
+        with pytest.raises(ValueError):
+            p.like(np.zeros(5, dtype=np.float32))
+
+    def test_grad(self):
+        """test the gradient of a small network comes back in the nested structure"""
+        rng = np.random.default_rng(0)
+        X, y = rng.normal(size=(5, 3)), rng.normal(size=5)
+        p = Parameters({"hidden": [{"W": rng.normal(size=(4, 3)), "b": np.zeros(4)}], "out": (rng.normal(size=4), 0.1)})
+
+        def loss(p):
+            h = tanh(X @ p["hidden"][0]["W"].T + p["hidden"][0]["b"])
+            w, c = p["out"]
+            return np.sum((h @ w + c - y)**2)
+
+        f = AutoDiff(loss, parameters=p)
+        assert f.vector_input and f.dim_x == 21 and f(p) == loss(p.tree)
+        value, g = f.value_and_grad(p)
+        assert isinstance(g, Parameters) and g["hidden"][0]["W"].shape == (4, 3) and value == loss(p.tree)
+        assert np.shares_memory(g["out"][0], g.flat), "gradient leaves are not views into one buffer"
+        # central differences on the flat buffer
+        fd = np.zeros(p.size)
+        for i in range(p.size):
+            up, down = p.copy(), p.copy()
+            up.flat[i] += 1e-6
+            down.flat[i] -= 1e-6
+            fd[i] = (loss(up.tree) - loss(down.tree)) / 2e-6
+        assert np.allclose(g.flat, fd, atol=1e-6), "gradient of the parameters is not correct"
+        assert np.allclose(f.grad(p.flat).flat, g.flat) and np.allclose(AutoDiff(loss, parameters=p, chunk_size=5).grad(p).flat, g.flat)
+        assert np.allclose(RAutoDiff(loss, parameters=p).grad(p).flat, g.flat), "reverse mode gradient of the parameters is not correct"
+        # one Parameters per output component
+        rows = AutoDiff(lambda p: [np.sum(p["out"][0]), p["out"][1] * 2], parameters=p).grad(p)
+        assert len(rows) == 2 and np.all(rows[0]["out"][0] == 1.0) and rows[1]["out"][1] == 2.0 and np.all(rows[1]["hidden"][0]["W"] == 0.0)
+        with pytest.raises(ValueError):
+            f.grad(Parameters([np.zeros(3)]))
+        with pytest.raises(ValueError):
+            AutoDiff(loss, parameters=p, dim_x=3)
+        with pytest.raises(TypeError):
+            AutoDiff(loss, parameters={"W": np.zeros(2)})
+        with pytest.raises(ValueError):
+            AutoDiff(lambda x: np.sum(x)).grad(p)
@@ -0,0 +1,84 @@
+import sys
+sys.path.append('../')
+from AutoDiff.ReverseNode import ReverseNode, backward
+from AutoDiff.ElementFunction import *
+import pytest
+import numpy as np
+
+
+class TestReverseNode:
+    """Test class for ReverseNode types"""
+
+    def test_init(self):
+        """test that nodes are recorded on the tape in evaluation order"""
+        tape = []
+        x = ReverseNode(2.0, tape)
+        y = ReverseNode(3, tape)
+        assert x.real == 2.0 and y.real == 3, "ReverseNode is not initialized correctly"
+        assert tape == [x, y] and x._index == 0 and y._index == 1, "ReverseNode is not recorded on the tape"
+        assert x.parents == (), "ReverseNode input should have no parents"
+        assert str(x) == "ReverseNode(2.0)", "__str__ method is not working properly"
+        with pytest.raises(TypeError):
+            ReverseNode("p", tape)
+        with pytest.raises(TypeError):
+            ReverseNode(1.0, "not a tape")
+
+    def test_arithmetic(self):
+        """test values and local derivatives of the overloaded operators"""
+        tape = []
+        x = ReverseNode(3.0, tape)
+        y = ReverseNode(2.0, tape)
+        cases = [
+            (x + y, 5.0, [1.0, 1.0]), (x + 1, 4.0, [1.0, 0.0]), (1 + x, 4.0, [1.0, 0.0]),
+            (x - y, 1.0, [1.0, -1.0]), (x - 1, 2.0, [1.0, 0.0]), (1 - x, -2.0, [-1.0, 0.0]),
+            (x * y, 6.0, [2.0, 3.0]), (x * 2, 6.0, [2.0, 0.0]), (2 * x, 6.0, [2.0, 0.0]),
+            (x / y, 1.5, [0.5, -0.75]), (x / 2, 1.5, [0.5, 0.0]), (6 / x, 2.0, [-2/3, 0.0]),
+            (x ** y, 9.0, [6.0, 9*np.log(3)]), (x ** 2, 9.0, [6.0, 0.0]), (2 ** x, 8.0, [8*np.log(2), 0.0]),
+            (-x, -3.0, [-1.0, 0.0]), (+x, 3.0, [1.0, 0.0]), (x % 2, 1.0, [1.0, 0.0]), (x % 1.5, 0.0, [1.0, 0.0]),
+        ]
+        for z, value, derivatives in cases:
+            adjoints = backward(z)
+            grad = [adjoints[v._index] if adjoints[v._index] is not None else 0.0 for v in (x, y)]
+            assert np.isclose(z.real, value) and np.allclose(grad, derivatives), "ReverseNode operator is not implemented correctly"
+        with pytest.raises(TypeError):
+            x + "p"
+        with pytest.raises(TypeError):
+            [1, 2] * x
+        with pytest.raises(TypeError):
+            x % y
+
+    def test_large_operands(self):
+        """test the local derivatives of / and ** do not overflow where the derivative itself does not"""
+        tape = []
+        x = ReverseNode(1e300, tape)
+        y = ReverseNode(1e160, tape)
+        adjoints = backward(x / y)
+        assert np.isclose(adjoints[x._index], 1e-160) and np.isclose(adjoints[y._index], -1e-20), "__truediv__ overflows"
+        assert np.isclose(backward(1e300 / y)[y._index], -1e-20) and backward(1.0 / x)[x._index] == -0.0, "__rtruediv__ overflows"
+        z = ReverseNode(0.01, tape)
+        with np.errstate(over="ignore"):
+            assert backward(z ** -154.0)[z._index] == -np.inf, "__pow__ overflows"
+        zero = ReverseNode(0.0, tape)
+        assert np.isclose(backward(x ** 0.5)[x._index], 5e-151) and backward(zero ** 2)[zero._index] == 0.0, "__pow__ is not correct"
+
+    def test_backward(self):
+        """test the backward sweep through elementary functions and shared subexpressions"""
+        tape = []
+        x = ReverseNode(0.5, tape)
+        y = ReverseNode(2.0, tape)
+        xy = x * y
+        z = sin(xy) + exp(x) * xy + log(y)
+        adjoints = backward(z)
+        assert np.isclose(z.real, np.sin(1.0) + np.exp(0.5) + np.log(2.0)), "backward() value is not correct"
+        assert np.isclose(adjoints[x._index], 2*np.cos(1.0) + np.exp(0.5)*1.0 + np.exp(0.5)*2.0), "backward() adjoint is not correct"
+        assert np.isclose(adjoints[y._index], 0.5*np.cos(1.0) + np.exp(0.5)*0.5 + 0.5), "backward() adjoint is not correct"
+        # nodes the output does not depend on
+        assert backward(x + 1)[y._index] is None, "independent node should have no adjoint"
+        with pytest.raises(TypeError):
+            backward(1.0)
+
+    def test_comparisons(self):
+        tape = []
+        x = ReverseNode(3.0, tape)
+        y = ReverseNode(4.0, tape)
+        assert x == 3.0 and x != y and x < y and x <= 3 and y > x and y >= 4, "comparisons are not working correctly"
@@ -0,0 +1,92 @@
+import sys
+sys.path.append('../')
+from AutoDiff.TaylorNumber import TaylorNumber
+from AutoDiff.DualNumber import unchecked
+from AutoDiff.ElementFunction import *
+from math import factorial
+import pytest
+import numpy as np
+
+
+def series(f, x0, order):
+    """Taylor coefficients of an elementary function composed with x0 + t, from its known derivatives."""
+    return np.array([f(k, x0) / factorial(k) for k in range(order + 1)])
+
+
+class TestTaylorNumber:
+    """Test class for TaylorNumber types"""
+
+    def test_init(self):
+        """test coefficients are stored as a float array"""
+        x = TaylorNumber([2, 1, 0])
+        assert x.coefficients.dtype == np.float64 and x.real == 2.0 and x.order == 2, "TaylorNumber is not initialized correctly"
+        assert np.all(TaylorNumber.variable(2, 3, 3).coefficients == [2, 3, 0, 0]), "TaylorNumber.variable is not correct"
+        assert np.all(TaylorNumber([1.0, 1.0, 0.5]).derivatives() == [1, 1, 1]), "TaylorNumber.derivatives is not correct"
+        with pytest.raises(TypeError):
+            TaylorNumber("1")
+        with pytest.raises(TypeError):
+            TaylorNumber([])
+        with pytest.raises(TypeError):
+            TaylorNumber([[1.0]])
+
+    def test_arithmetic(self):
+        """test + - * / ** against polynomial and geometric series"""
+        x = TaylorNumber.variable(2.0, 1.0, 4)
+        assert np.all((x + 1).coefficients == [3, 1, 0, 0, 0]) and np.all((1 - x).coefficients == [-1, -1, 0, 0, 0]), "add/sub is not correct"
+        assert np.all((x * x - 2 * x).coefficients == [0, 2, 1, 0, 0]), "mul is not correct"
+        assert np.allclose((1 / x).coefficients, [0.5, -0.25, 0.125, -0.0625, 0.03125]), "rtruediv is not correct"
+        assert np.allclose((x / x).coefficients, [1, 0, 0, 0, 0]), "truediv is not correct"
+        assert np.allclose((x ** 3).coefficients, [8, 12, 6, 1, 0]), "integer pow is not correct"
+        assert np.allclose((TaylorNumber.variable(0.0, 1.0, 3) ** 2).coefficients, [0, 0, 1, 0]), "integer pow at zero is not correct"
+        r = -1.5
+        assert np.allclose((x ** r).coefficients,
+                           [np.prod([r - i for i in range(k)]) / factorial(k) * 2.0 ** (r - k) for k in range(5)]), "real pow is not correct"
+        assert np.allclose((2 ** x).coefficients, series(lambda k, a: np.log(2) ** k * 2 ** a, 2.0, 4)), "rpow is not correct"
+        assert np.allclose((x ** x).coefficients, (x * log(x)).exp().coefficients), "pow of TaylorNumbers is not correct"
+        assert x > 1 and x == 2.0 and -x < 0 and (+x).coefficients[1] == 1, "comparison or neg/pos is not correct"
+        with pytest.raises(ValueError):
+            x + TaylorNumber.variable(2.0, 1.0, 3)
+        with pytest.raises(TypeError):
+            x * "2"
+        with pytest.raises(ZeroDivisionError):
+            x / TaylorNumber.variable(0.0, 1.0, 4)
+        with pytest.raises(ValueError):
+            TaylorNumber.variable(0.0, 1.0, 4) ** -1
+
+    def test_element_functions(self):
+        """test every elementary function against its known derivatives"""
+        order = 6
+        x0 = 0.3
+        x = TaylorNumber.variable(x0, 1.0, order)
+        sin_d = lambda k, a: np.sin(a + k * np.pi / 2)
+        cos_d = lambda k, a: np.cos(a + k * np.pi / 2)
+        assert np.allclose(sin(x).coefficients, series(sin_d, x0, order)), "sin is not correct"
+        assert np.allclose(cos(x).coefficients, series(cos_d, x0, order)), "cos is not correct"
+        assert np.allclose(exp(x).coefficients, series(lambda k, a: np.exp(a), x0, order)), "exp is not correct"
+        assert np.allclose(sinh(x).coefficients, series(lambda k, a: np.cosh(a) if k % 2 else np.sinh(a), x0, order)), "sinh is not correct"
+        assert np.allclose(cosh(x).coefficients, series(lambda k, a: np.sinh(a) if k % 2 else np.cosh(a), x0, order)), "cosh is not correct"
+        log_d = lambda k, a: np.log(a) if k == 0 else (-1) ** (k - 1) * factorial(k - 1) / a ** k
+        assert np.allclose(log(x).coefficients, series(log_d, x0, order)), "log is not correct"
+        assert np.allclose(log10(x).coefficients, series(log_d, x0, order) / np.log(10)), "log10 is not correct"
+        assert np.allclose(logBase(2, x).coefficients, series(log_d, x0, order) / np.log(2)), "logBase is not correct"
+        assert np.allclose(sqrt(x).coefficients, (x ** 0.5).coefficients), "sqrt is not correct"
+        # identities checked against already tested rules
+        assert np.allclose(tan(x).coefficients, (sin(x) / cos(x)).coefficients), "tan is not correct"
+        assert np.allclose(tanh(x).coefficients, (sinh(x) / cosh(x)).coefficients), "tanh is not correct"
+        assert np.allclose(logistic(x).coefficients, (1 / (1 + exp(-x))).coefficients), "logistic is not correct"
+        assert np.allclose(tan(arctan(x)).coefficients, x.coefficients), "arctan is not correct"
+        assert np.allclose(sin(arcsin(x)).coefficients, x.coefficients), "arcsin is not correct"
+        assert np.allclose(cos(arccos(x)).coefficients, x.coefficients), "arccos is not correct"
+        # lists and numpy ufuncs dispatch to the same rules
+        assert np.allclose(sin([x, 1.0])[0].coefficients, sin(x).coefficients), "sin of a list is not correct"
+        assert np.allclose(np.exp(x).coefficients, exp(x).coefficients), "np.exp on a TaylorNumber is not correct"
+        with pytest.raises(ValueError):
+            log(-x)
+        with pytest.raises(ValueError):
+            sqrt([-x])
+        with pytest.raises(ValueError):
+            arcsin(x + 1)
+        # inside unchecked() the domain checks are skipped and NaN/inf propagate, as for DualNumber
+        with unchecked(), np.errstate(all="ignore"):
+            assert np.isnan(log(-x).real) and np.isnan(sqrt(-x).real) and np.isnan(arcsin(x + 1).coefficients[1])
+            assert np.isnan(arccos(x + 1).coefficients[1]) and np.isfinite(tan(TaylorNumber.variable(np.pi / 2, 1.0, 2)).real)
@@ -0,0 +1,133 @@
+import sys
+sys.path.append('../')
+from AutoDiff.Trace import Trace, TraceNode
+from AutoDiff.ElementFunction import *
+import math
+import pytest
+import numpy as np
+
+
+class TestTrace:
+    """Test class for Trace and TraceNode types"""
+
+    def test_record(self):
+        """test every operation on a TraceNode is recorded once"""
+        plan = Trace(lambda x, y: x * y + 2 * x - y / 3, [1.0, 2.0])
+        assert len(plan) == 5 and plan.dim_x == 2 and plan.dim_f == 1, "Trace did not record the operations"
+        assert isinstance(str(TraceNode(1.0, plan)), str)
+        with pytest.raises(TypeError):
+            Trace(lambda x: [x, "a"], [1.0])
+        with pytest.raises(TypeError):
+            Trace(lambda x: np.array([[x]]), [1.0])
+        with pytest.raises(TypeError):
+            Trace(lambda x: float(x), [1.0])
+        with pytest.raises(ValueError):
+            Trace(lambda x: log(x), [-1.0])
+
+    def test_value(self):
+        """test a replay gives the values of a normal evaluation in the output format of the function"""
+        f = lambda x, y: [sin(x * y) + exp(y) / x, x ** 2 - 3 ** y, 4.0, tanh(x) % 1, -(+x) - 1]
+        plan = Trace(f, [1.0, 2.0])
+        for point in ([1.0, 2.0], [0.3, -1.5], [-2.0, 0.5]):
+            assert plan.value(point) == f(*point), "replay gives another value than the function"
+        plan = Trace(lambda x: np.array([cos(x), sqrt(x)]), [1.0])
+        assert isinstance(plan.value([4.0]), np.ndarray) and np.all(plan.value([4.0]) == [np.cos(4.0), 2.0])
+        assert Trace(lambda x: log10(x), [1.0]).value([100.0]) == 2.0
+
+    def test_jacobian(self):
+        """test a replay with tangents against forward mode"""
+        from AutoDiff.AutoDiff import AutoDiff
+        f = lambda x, y, z: [x * y / z, x ** y + arctan(z), logistic(x) - arcsin(y / 4) * arccos(z / 4), log(x) * cosh(y) * sinh(z), 5 - 2 / x]
+        plan = Trace(f, [1.0, 2.0, 3.0])
+        for point in ([1.0, 2.0, 3.0], [2.5, -1.0, 0.5]):
+            output, J = plan.jacobian(point)
+            assert output == f(*point), "replay with tangents gives another value than the function"
+            assert np.allclose(J, AutoDiff(f).grad(point)), "replay with tangents gives a wrong Jacobian"
+        # a quotient by a large number does not overflow and fall back to a normal evaluation
+        g = lambda x, y: [x / y, 1.0 / y, x / 1e-300]
+        for point in ([1e300, 1e160], [1.0, 1e200]):
+            for replay in (Trace(g, [1.0, 2.0]), Trace(g, [1.0, 2.0]).compile()):
+                output, J = replay.jacobian(point)
+                assert output == g(*point) and np.array_equal(J, AutoDiff(g).grad(point)), "replay of a quotient overflows"
+
+    def test_miss(self):
+        """test a replay outside the recorded branch or domain returns None"""
+        f = lambda x, y: x * y if x > y else x - y
+        plan = Trace(f, [2.0, 1.0])
+        assert plan.value([3.0, 0.0]) == 0.0 and plan.value([0.0, 3.0]) is None, "guard of a comparison does not work"
+        assert plan.jacobian([0.0, 3.0]) is None
+        plan = Trace(lambda x: log(x) + tan(x) + 1 / x, [1.0])
+        assert plan.value([-1.0]) is None and plan.value([np.pi / 2]) is None, "domain check of a replay does not work"
+        assert plan.jacobian([0.0]) is None, "division by zero in a replay is not a miss"
+
+    def test_compile(self):
+        """test the generated code against a normal evaluation"""
+        from AutoDiff.AutoDiff import AutoDiff
+        f = lambda x, y, z: [x * y / z - 1 / x, x ** y + arctan(z) - 2 ** y, logistic(x) - arcsin(y / 4) * arccos(z / 4),
+                             log(x) * cosh(y) * sinh(z) + log10(x) % 1, sqrt(x) * tanh(y) * tan(z) / cos(x) ** -2, 5.0, -(+z)]
+        plan = Trace(f, [1.0, 2.0, 3.0])
+        assert plan.compile() is plan and plan.compile()._compiled is not None, "compile() does not cache the generated code"
+        source = plan.source
+        assert source.startswith("def value(v0, v1, v2):") and "def jacobian(v0, v1, v2):" in source, "generated source is not correct"
+        assert "DualNumber" not in source and "math.atan(" in source, "generated source does not use plain floats"
+        for point in ([1.0, 2.0, 3.0], [2.5, -1.0, 0.5]):
+            assert np.allclose(plan.value(point), f(*point)), "generated value is not correct"
+            output, J = plan.jacobian(point)
+            assert np.allclose(output, f(*point)) and np.allclose(J, AutoDiff(f).grad(point)), "generated Jacobian is not correct"
+        # the output format and the guards carry over to the generated code
+        plan = Trace(lambda x: np.array([x * 2, 1.0]) if x > 0 else np.array([x, 0.0]), [1.0]).compile()
+        assert isinstance(plan.value([3.0]), np.ndarray) and plan.value([-3.0]) is None
+        assert np.all(plan.jacobian([3.0])[1] == [[2.0], [0.0]])
+        plan = Trace(lambda x: log(x) + arcsin(x) + x * np.inf, [0.5]).compile()
+        assert plan.value([-1.0]) is None and plan.value([2.0]) is None and plan.value([0.5]) == np.inf, "domain checks of the generated code do not work"
+        plan = Trace(lambda x, y: x ** 0.5 + x ** y, [1.0, 2.0]).compile()
+        assert plan.value([-1.0, 2.0]) is None and plan.value([4.0, 0.5]) == 4.0, "negative base of a fractional power is not a miss"
+
+    def test_optimize(self):
+        """test each optimization pass and that an optimized trace gives the same numbers"""
+        plan = Trace(lambda x, y: [sin(x * y), x * y + y, cos(y * x)], [1.0, 2.0])
+        assert len(plan) == 6 and plan.optimize() == {"fold": 0, "cse": 2, "dead": 0} and len(plan) == 4, "cse did not remove x*y"
+        f = lambda x, y: [-(-(x * 1 + 0)) * y, +(x ** 1) / 1 - 0, 2 * x + x * 2 + exp(y) - exp(y)] if x > y and x > y else [x, y, x]
+        plan = Trace(f, [3.0, 2.0])
+        removed = plan.optimize()
+        assert removed == {"fold": 5, "cse": 3, "dead": 1} and plan.removed == removed, "optimization passes do not remove the expected records"
+        for point in ([3.0, 2.0], [4.5, -1.0]):
+            output, J = plan.jacobian(point)
+            assert output == f(*point) and np.array_equal(J, Trace(f, [3.0, 2.0]).jacobian(point)[1]), "optimized replay is not exact"
+            assert np.array_equal(plan.compile().jacobian(point)[1], J), "optimized generated code is not correct"
+        assert plan.value([1.0, 2.0]) is None, "guard is removed by the optimization"
+        # the output may be an alias of an input
+        plan = Trace(lambda x: x - 0, [1.0])
+        assert plan.optimize()["fold"] == 1 and len(plan) == 0 and plan.jacobian([5.0]) == (5.0, np.array([[1.0]]))
+        # cse does not merge operations with the constants 0.0 and -0.0
+        g = lambda x: [x * 0.0, x * -0.0, x + 0.0, x + -0.0, 0.0 - x, -0.0 - x]
+        plan = Trace(g, [1.0])
+        assert plan.optimize()["cse"] == 0
+        for x in (-0.0, 0.0, 2.0):
+            assert [math.copysign(1.0, y) for y in plan.value([x])] == [math.copysign(1.0, y) for y in g(x)], "cse merges signed zeros"
+        # folding is exact in IEEE arithmetic, at -0.0 and at 0 too
+        for g in (lambda x: x + 0, lambda x: 0 + x, lambda x: x - 0, lambda x: x + (-0.0), lambda x: x - (-0.0),
+                  lambda x: x * 1, lambda x: x / 1, lambda x: x ** 1, lambda x: -(-x)):
+            plan = Trace(g, [1.0])
+            plan.optimize()
+            for x in (-0.0, 0.0):
+                optimized, recorded = plan.jacobian([x]), Trace(g, [1.0]).jacobian([x])
+                if recorded is None:
+                    assert optimized is None, "folding removes a check of the domain"
+                else:
+                    assert math.copysign(1.0, optimized[0]) == math.copysign(1.0, recorded[0]), "folding changes the sign of zero"
+                    assert np.array_equal(optimized[1], recorded[1], equal_nan=True), "folding changes the derivative"
+
+    def test_sparsity_and_seed(self):
+        """test the structural sparsity pattern and compressed replays"""
+        f = lambda x, y, z: [x * y, sin(z) + 1, 2.0, exp(x) / z if x > 0 else z]
+        plan = Trace(f, [1.0, 2.0, 3.0])
+        rows, cols = plan.sparsity()
+        assert list(zip(rows, cols)) == [(0, 0), (0, 1), (1, 2), (3, 0), (3, 2)], "sparsity pattern is not correct"
+        # y and z never share an output component, so they can share a tangent entry
+        plan.seed(np.array([0, 1, 1]))
+        output, compressed = plan.jacobian([1.0, 2.0, 3.0])
+        J = Trace(f, [1.0, 2.0, 3.0]).jacobian([1.0, 2.0, 3.0])[1]
+        assert compressed.shape == (4, 2) and np.allclose(compressed, np.stack([J[:, 0], J[:, 1] + J[:, 2]], axis=1)), "compressed replay is not correct"
+        assert np.allclose(plan.compile().jacobian([1.0, 2.0, 3.0])[1], compressed), "compressed generated code is not correct"
+        assert plan.has_guards and not Trace(lambda x: x, [1.0]).has_guards
@@ -0,0 +1,39 @@
+import sys
+sys.path.append('../')
+from AutoDiff.bench import run, compare, measure, main, GROUPS
+import json
+import pytest
+
+
+class TestBench:
+    """Test class for the benchmark suite"""
+
+    def test_run(self):
+        """test every group has cases and run() gives JSON-ready results"""
+        results = run(GROUPS, match="dim_x=4 dim_f=4", min_time=0.0, repeat=1)
+        assert set(results["results"]) == {"AutoDiff/__call__ dim_x=4 dim_f=4", "AutoDiff/grad dim_x=4 dim_f=4"}
+        assert json.loads(json.dumps(results)) == results, "results are not JSON"
+        for group in GROUPS:
+            cases = run([group], min_time=0.0, repeat=1)["results"]
+            assert len(cases) > 10 and all(entry["seconds"] > 0 and entry["group"] == group for entry in cases.values())
+        assert {"x / y", "x / 2.5", "2.5 / x"} <= {case.split("/", 1)[1] for case in run(["DualNumber"], match="/", min_time=0.0, repeat=1)["results"]}
+        seconds, number = measure(lambda: None, min_time=0.001, repeat=2)
+        assert seconds > 0 and number > 1
+        with pytest.raises(ValueError):
+            run(["Plotting"])
+
+    def test_compare(self, tmp_path, capsys):
+        """test compare() and the command line flag the cases slower than the threshold"""
+        base = {"meta": {}, "results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}}
+        new = {"meta": {}, "results": {"a": {"seconds": 1.05}, "b": {"seconds": 1.5}, "d": {"seconds": 1.0}}}
+        rows = compare(base, new, threshold=0.1)
+        assert [(row[0], row[4]) for row in rows] == [("b", True), ("a", False)], "compare() does not flag the regression"
+        assert compare(base, new, threshold=0.01)[1][4]
+        (tmp_path / "base.json").write_text(json.dumps(base))
+        (tmp_path / "new.json").write_text(json.dumps(new))
+        assert main(["compare", str(tmp_path / "base.json"), str(tmp_path / "new.json")]) == 1
+        assert "REGRESSION" in capsys.readouterr().out
+        assert main(["compare", str(tmp_path / "base.json"), str(tmp_path / "new.json"), "-t", "0.6"]) == 0
+        # run is the default command
+        assert main(["-g", "DualNumber", "-k", "x + y", "--quick", "-o", str(tmp_path / "run.json")]) == 0
+        assert list(json.loads((tmp_path / "run.json").read_text())["results"]) == ["DualNumber/x + y"]
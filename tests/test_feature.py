@@ -53,3 +53,59 @@ class Test_grad_descent:
         
     
 
+    def test_grad_descent_evaluations(self):
+        # every iteration evaluates the function once, the value comes with the gradient
+        calls = []
+        def f(x, y):
+            calls.append(1)
+            return sin((x-0.1)**2+(y)**2)
+        grad_descent(f, np.array([0.5, 0.2]), alpha=1e-2, max_iter=10, verbose=True)
+        # plus the probe evaluations of the constructor
+        assert len(calls) <= 10 + 2, 'gradient descent evaluates the function more than once per iteration'
+
+    def test_grad_descent_undefined_at_one(self):
+        # the output dimension comes from the initial guess, not from an evaluation at (1, ..., 1)
+        f = lambda x, y: (x - 2)**2 + log(y - 1)**2
+        x = grad_descent(f, np.array([3.0, 1.5]), alpha=1e-1, max_iter=2000)
+        assert np.allclose(x, [2.0, 2.0], atol=1e-3), 'gradient descent of a function undefined at 1 failed'
+
+    def test_grad_descent_vector_input(self):
+        # the function takes all variables as one array
+        f = lambda x: np.sum((x - np.arange(4))**2)
+        x = grad_descent(f, np.zeros(4), alpha=1e-1, max_iter=1000, vector_input=True)
+        assert np.allclose(x, np.arange(4), atol=1e-3), 'gradient descent of a vector_input function failed'
+        with pytest.raises(TypeError):
+            grad_descent(f, 0.0, vector_input=True)
+
+    def test_grad_descent_parameters(self):
+        # the function takes a dict of weights, the result has the same structure
+        x0 = Parameters({"W": np.zeros((2, 2)), "b": 0.0})
+        f = lambda p: np.sum((p["W"] - np.eye(2))**2) + (p["b"] - 3)**2
+        for mode in ("forward", "reverse"):
+            p = grad_descent(f, x0, alpha=1e-1, max_iter=1000, mode=mode)
+            assert isinstance(p, Parameters) and np.allclose(p["W"], np.eye(2), atol=1e-3) and np.isclose(p["b"], 3, atol=1e-3), 'gradient descent of Parameters failed'
+        assert np.all(x0.flat == 0.0), 'gradient descent modified the initial guess'
+        with pytest.raises(TypeError):
+            grad_descent(lambda p: [p["b"], p["b"]], x0)
+
+    def test_grad_descent_reverse_mode(self):
+        # reverse mode gives the same iterates as forward mode
+        f = lambda x, y: sin((x-0.1)**2+(y)**2)
+        x0 = np.array([0.5, 0.2])
+        x_forward = grad_descent(f, x0, alpha=1e-2, max_iter=100)
+        x_reverse = grad_descent(f, x0, alpha=1e-2, max_iter=100, mode="reverse")
+        assert np.allclose(x_forward, x_reverse), 'reverse mode gradient descent failed'
+        # test wrong mode
+        with pytest.raises(ValueError):
+            grad_descent(f, x0, mode="backward")
+
+    def test_grad_descent_trace(self):
+        # replaying the recorded trace gives the same iterates
+        f = lambda x, y: sin((x-0.1)**2+(y)**2)
+        x0 = np.array([0.5, 0.2])
+        x_plain = grad_descent(f, x0, alpha=1e-2, max_iter=100)
+        x_trace = grad_descent(f, x0, alpha=1e-2, max_iter=100, trace=True)
+        assert np.array_equal(x_plain, x_trace), 'gradient descent with trace failed'
+        x_compiled = grad_descent(f, x0, alpha=1e-2, max_iter=100, trace="compile")
+        assert np.allclose(x_plain, x_compiled), 'gradient descent with generated code failed'
+        assert grad_descent(lambda x: (x-1)**2, 0.0, alpha=1e-1, max_iter=500, trace=True) == pytest.approx(1.0), 'gradient descent with trace failed'
@@ -0,0 +1,63 @@
+import sys
+sys.path.append('../')
+import os
+import subprocess
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def run(code, *options):
+    """Run code in a fresh interpreter at the root of the repository and return its stderr."""
+    result = subprocess.run([sys.executable, *options, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stderr
+
+
+def cumulative_import_times(stderr):
+    """Parse the output of python -X importtime into {module: cumulative seconds}."""
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative) * 1e-6
+    return times
+
+
+class TestImport:
+    """Test class for the import of the package"""
+
+    def test_lazy_package(self):
+        """test import AutoDiff loads nothing and the public names load their submodule on first use"""
+        run("import sys, AutoDiff; assert 'numpy' not in sys.modules and 'AutoDiff.AutoDiff' not in sys.modules")
+        run("import types, AutoDiff as ad; ad.sin; import AutoDiff.AutoDiff as m; assert isinstance(m, types.ModuleType)")
+        run("import sys, AutoDiff.feature; assert 'matplotlib' not in sys.modules")
+        run("import sys, AutoDiff as ad; ad.grad_descent(lambda x: (x-1)**2, 4.0, alpha=1e-1); assert 'matplotlib' not in sys.modules")
+
+    def test_public_api(self):
+        """test the names of the top-level API"""
+        import types
+        from unittest import mock
+        import AutoDiff
+        import AutoDiff.DualNumber as dn
+        from AutoDiff.AutoDiff import AutoDiff as AD
+        assert isinstance(dn, types.ModuleType) and AutoDiff.DualNumber is dn, "the package hides a submodule"
+        with mock.patch("AutoDiff.DualNumber.DualNumber") as patched:
+            assert dn.DualNumber is patched
+        assert set(AutoDiff.__all__) <= set(dir(AutoDiff)) and "grad_descent" in AutoDiff.__all__
+        assert AutoDiff.fsum is dn.fsum and AutoDiff.RAutoDiff.__name__ == "RAutoDiff"
+        f = AD(lambda x, y: AutoDiff.sin(x * y))
+        assert f.grad([0.0, 2.0])[0, 0] == 2.0
+        from AutoDiff import feature, Trace
+        assert feature.grad_descent is AutoDiff.grad_descent and Trace.Trace.__name__ == "Trace"
+        with pytest.raises(AttributeError):
+            AutoDiff.plot
+        with pytest.raises(ImportError):
+            from AutoDiff import not_a_name
+
+    def test_import_time(self):
+        """test the cold start of the package loads neither matplotlib nor the submodules it does not need"""
+        times = cumulative_import_times(run("import AutoDiff.feature", "-X", "importtime"))
+        assert not any(module.startswith("matplotlib") for module in times), "import AutoDiff.feature loads matplotlib"
+        assert "AutoDiff.plotting" not in times and "AutoDiff.bench" not in times, "import AutoDiff.feature loads an optional module"
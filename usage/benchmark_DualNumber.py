@@ -0,0 +1,94 @@
+import sys
+sys.path.append('../')
+
+from AutoDiff.DualNumber import DualNumber
+import timeit
+
+""" benchmark of the scalar hot path of DualNumber
+
+LegacyDualNumber below reproduces the DualNumber design before it was slotted:
+every operator converts its operand with check_type_convert (a throwaway DualNumber for scalars)
+and builds its result through the validating __init__, and instances carry a __dict__.
+Run `python benchmark_DualNumber.py` to print the operations per second of both classes. """
+
+
+def legacy_convert(other):
+    if isinstance(other, LegacyDualNumber):
+        return other
+    return LegacyDualNumber(other, 0.0)
+
+
+class LegacyDualNumber:
+    def __init__(self, real, dual=1.0):
+        if isinstance(real, (int, float)):
+            self._real = real
+        else:
+            raise TypeError("Real part of DualNumber must be an int or float.")
+        if isinstance(dual, (int, float)):
+            self._dual = dual
+        else:
+            raise TypeError("Dual part of DualNumber must be an int or float.")
+
+    @property
+    def real(self):
+        return self._real
+
+    @property
+    def dual(self):
+        return self._dual
+
+    def __add__(self, other):
+        other = legacy_convert(other)
+        return LegacyDualNumber(self._real + other._real, self._dual + other._dual)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        other = legacy_convert(other)
+        return LegacyDualNumber(self._real - other._real, self._dual - other._dual)
+
+    def __mul__(self, other):
+        other = legacy_convert(other)
+        return LegacyDualNumber(self._real * other._real, self._real * other._dual + self._dual * other._real)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        other = legacy_convert(other)
+        return LegacyDualNumber(self._real/other._real, (self._dual*other._real-self._real*other._dual)/other._real**2)
+
+    def __pow__(self, other):
+        other = legacy_convert(other)
+        return LegacyDualNumber(self._real**other._real, self._real**other._real*(self._dual*other._real/self._real))
+
+
+CASES = {
+    "x + y": "x + y",
+    "x + 2.0": "x + 2.0",
+    "2.0 + x": "2.0 + x",
+    "x - y": "x - y",
+    "x * y": "x * y",
+    "x * 2.0": "x * 2.0",
+    "3 * x": "3 * x",
+    "x / y": "x / y",
+    "x / 2.0": "x / 2.0",
+    "x ** 2": "x ** 2",
+    "polynomial 3*x*x + 2*x*y - y/4 + 1": "3*x*x + 2*x*y - y/4 + 1",
+}
+
+
+def ops_per_second(cls, statement, number=200000):
+    """Best of 5 repeats of `number` evaluations of statement, in evaluations per second."""
+    namespace = {"x": cls(1.5, 1.0), "y": cls(2.5, 0.0)}
+    best = min(timeit.repeat(statement, globals=namespace, number=number, repeat=5))
+    return number / best
+
+
+if __name__ == "__main__":
+    print(f"{'operation':<40}{'legacy ops/s':>15}{'DualNumber ops/s':>18}{'speedup':>10}")
+    for name, statement in CASES.items():
+        legacy = ops_per_second(LegacyDualNumber, statement)
+        current = ops_per_second(DualNumber, statement)
+        print(f"{name:<40}{legacy:>15,.0f}{current:>18,.0f}{current / legacy:>9.2f}x")
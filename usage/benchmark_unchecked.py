@@ -0,0 +1,54 @@
+import sys
+sys.path.append('../')
+
+from AutoDiff.AutoDiff import AutoDiff, unchecked
+from AutoDiff.DualNumber import DualNumber
+from AutoDiff.ElementFunction import *
+import numpy as np
+import timeit
+
+""" benchmark of the unchecked mode
+
+Every case below runs once with the usual input validation and once inside `with unchecked():`,
+where the DualNumber constructor, the elementary functions and the AutoDiff entry points skip their
+type and domain checks. Run `python benchmark_unchecked.py` to print the calls per second of both. """
+
+
+f_small = AutoDiff(lambda x, y: log(x) * tan(y) + sqrt(x * y))
+# AutoDiff counts the named arguments, so the 50 variables are spelled out
+names = ", ".join(f"x{i}" for i in range(50))
+f_wide = AutoDiff(eval(f"lambda {names}: sum(log([{names}])) + sqrt(x0 * x49) * tan(x1)"))
+x_wide = list(np.linspace(1.0, 2.0, 50))
+
+CASES = {
+    "DualNumber(1.5, 1.0)": "DualNumber(1.5, 1.0)",
+    "log(x)": "log(x)",
+    "tan(x)": "tan(x)",
+    "sqrt(x)": "sqrt(x)",
+    "logBase(2, x)": "logBase(2, x)",
+    "R^2 -> R   f([1.5, 0.5])": "f_small([1.5, 0.5])",
+    "R^2 -> R   f.grad([1.5, 0.5])": "f_small.grad([1.5, 0.5])",
+    "R^50 -> R  f(x)": "f_wide(x_wide)",
+    "R^50 -> R  f.grad(x)": "f_wide.grad(x_wide)",
+}
+
+
+def calls_per_second(statement, number=20000, repeat=7):
+    """Calls per second of statement with and without the checks, best of `repeat` rounds of `number`
+    evaluations. The two modes alternate round by round, so that a slower or busier stretch of the machine
+    is shared by both instead of showing up as a speedup or a slowdown of one of them."""
+    timer = timeit.Timer(statement, globals={**globals(), "x": DualNumber(1.5, 1.0)})
+    checked, fast = [], []
+    for _ in range(repeat):
+        checked.append(timer.timeit(number))
+        with unchecked():
+            fast.append(timer.timeit(number))
+    return number / min(checked), number / min(fast)
+
+
+if __name__ == "__main__":
+    print(f"{'operation':<34}{'checked calls/s':>17}{'unchecked calls/s':>19}{'speedup':>10}")
+    for name, statement in CASES.items():
+        number = 200 if "R^50" in name else 20000
+        checked, fast = calls_per_second(statement, number)
+        print(f"{name:<34}{checked:>17,.0f}{fast:>19,.0f}{fast / checked:>9.2f}x")
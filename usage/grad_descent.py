@@ -48,9 +48,9 @@ def logistic_predictions(weights, inputs):
     # Outputs probability of a label being true according to logistic model.
     return sigmoid(np.dot(inputs, weights))
 
-def training_loss(w0, w1, w2):
+def training_loss(weights):
     # Training loss is the negative log-likelihood of the training labels.
-    preds = logistic_predictions(np.array([w0,w1,w2]), inputs)
+    preds = logistic_predictions(weights, inputs)
     label_probabilities = preds * targets + (1 - preds) * (1 - targets)
     return -np.sum(log(label_probabilities))
 
@@ -62,14 +62,33 @@ inputs = np.array([[0.52, 1.12,  0.77],
 targets = np.array([True, True, False, True])
 
 # Define a function that returns gradients of training loss using AutoDiff.
-training_gradient_fun = AD(training_loss).grad
+# training_loss takes the weights as one array, so AutoDiff needs their number.
+training_gradient_fun = AD(training_loss, dim_x=3, vector_input=True).grad
 
 # Optimize weights using gradient descent.
 # You will see the loss is reduced significantly.
 weights = np.array([0.0, 0.0, 0.0])
-print("Initial loss:", training_loss(*weights))
+print("Initial loss:", training_loss(weights))
 for i in range(1000):
     weights -= training_gradient_fun(weights)[0] * 0.01
 
-print("Trained loss:", training_loss(*weights))
+print("Trained loss:", training_loss(weights))
 
+
+print(""" ------------train a small network demo--------------  """)
+
+""" train a small network demo
+The weights of a network are kept in a Parameters object, a dict of weight matrices whose entries are
+views into one flat buffer. The loss takes the dict, and grad_descent updates the flat buffer in place."""
+from AutoDiff.Parameters import Parameters
+
+def network_loss(params):
+    hidden = tanh(inputs @ params["W"].T + params["b"])
+    preds = sigmoid(hidden @ params["v"])
+    label_probabilities = preds * targets + (1 - preds) * (1 - targets)
+    return -np.sum(log(label_probabilities))
+
+params = Parameters({"W": 0.1 * np.ones((4, 3)), "b": np.zeros(4), "v": np.full(4, 0.1)})
+print("Initial loss:", network_loss(params.tree))
+params = grad_descent(network_loss, params, alpha=0.05, max_iter=1000)
+print("Trained loss:", network_loss(params.tree))